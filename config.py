@@ -43,6 +43,30 @@ GEMINI_RPM_LIMIT = 2          # Requests per minute (Very slow!)
 GEMINI_TPM_LIMIT = 32_000     # Tokens per minute
 GEMINI_DAILY_LIMIT = 50       # Strict daily limit for Pro
 GEMINI_MAX_BATCH_TOKENS = 30_000 # Pro has a huge context window, so we use it
+GEMINI_SENIOR_RESERVE = 1     # Daily requests the Junior phase leaves for the Senior Manager
+JUNIOR_CONCURRENCY = int(os.getenv("JUNIOR_CONCURRENCY", 0))  # Junior calls in flight (0 = derive from RPM)
+# Batch mode packs several tickers into one Junior request (up to GEMINI_MAX_BATCH_TOKENS).
+# The number of tickers analyzed per day is still DAILY_SCAN_LIMIT in both modes; raise it to use the saved requests.
+JUNIOR_BATCH_MODE = os.getenv("JUNIOR_BATCH_MODE", "true").lower() == "true"
+JUNIOR_BATCH_MAX_TICKERS = int(os.getenv("JUNIOR_BATCH_MAX_TICKERS", 8))
+# Cheap triage model screens candidates first; only escalated tickers reach the Pro Junior
+JUNIOR_TRIAGE_ENABLED = os.getenv("JUNIOR_TRIAGE_ENABLED", "true").lower() == "true"
+GEMINI_TRIAGE_MODEL = os.getenv("GEMINI_TRIAGE_MODEL", "gemini-2.0-flash")
+JUNIOR_TRIAGE_MIN_SCORE = int(os.getenv("JUNIOR_TRIAGE_MIN_SCORE", 40))   # ESCALATE verdicts below this are dropped
+JUNIOR_TRIAGE_BATCH_SIZE = int(os.getenv("JUNIOR_TRIAGE_BATCH_SIZE", 20)) # Tickers per triage request
+JUNIOR_TRIAGE_SEARCH = os.getenv("JUNIOR_TRIAGE_SEARCH", "false").lower() == "true"  # Ground triage with Google Search (slower, costs grounding quota)
+# Models metered separately from the Pro limits above (Flash free tier)
+GEMINI_MODEL_LIMITS = {
+    GEMINI_TRIAGE_MODEL.replace("models/", ""): {"rpm": 15, "tpm": 1_000_000, "daily": 1500},
+}
+GEMINI_POOL_SIZE = 8          # Keep-alive HTTP connections to the Gemini API
+GEMINI_TIMEOUT_SECONDS = 300  # Pro + Google Search can take minutes
+GEMINI_QUOTA_LEDGER_PATH = os.getenv("GEMINI_QUOTA_LEDGER_PATH", "data/gemini_quota.json")
+# Same-day re-runs reuse Gemini responses from disk instead of spending quota
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "data/llm_cache")
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", 20))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", 50))
 # --------------------------------------
 
 # 4. SCALABLE SENTIMENT SETTINGS (NEW)
@@ -77,6 +101,14 @@ GEMINI_SENIOR_MODEL = "gemini-3-pro-preview"
 DAILY_SCAN_LIMIT = int(os.getenv("DAILY_SCAN_LIMIT", 20))
 #DAILY_SCAN_LIMIT = 10
 COOLDOWN_DAYS = int(os.getenv("COOLDOWN_DAYS", 10)) # <--- NEW: Default 10 Days
+# Change detection: re-analyze inside the cooldown when the stock moved this much,
+# otherwise keep the last report until it is REANALYZE_MAX_AGE_DAYS old.
+REANALYZE_PRICE_MOVE_PCT = float(os.getenv("REANALYZE_PRICE_MOVE_PCT", 7.0))
+REANALYZE_MAX_AGE_DAYS = int(os.getenv("REANALYZE_MAX_AGE_DAYS", 30))
+JUNIOR_SNAPSHOT_PATH = os.getenv("JUNIOR_SNAPSHOT_PATH", "data/junior_snapshots.json")
+# Priority queue for Junior slots (depth below SMA, staleness, move, holdings, waiting time)
+JUNIOR_QUEUE_PATH = os.getenv("JUNIOR_QUEUE_PATH", "data/junior_queue.json")
+JUNIOR_QUEUE_LOOKAHEAD = int(os.getenv("JUNIOR_QUEUE_LOOKAHEAD", 2 * JUNIOR_BATCH_MAX_TICKERS))  # Ranking window (~two Junior batches); 0 = rank the full scan first (blocks on the download)
 
 JUNIOR_SCORE_THRESHOLD = int(os.getenv("JUNIOR_SCORE_THRESHOLD", 88)) 
 
@@ -110,6 +142,53 @@ EMAIL_SENDER = "onboarding@resend.dev" # Or your verified domain email
 EMAIL_RECIPIENT = os.getenv("EMAIL")
 
 GOOGLE_SHEET_NAME = "TradingBot_History"
+# Local SQLite replica of every history tab (reads are local, syncs fetch only new rows)
+SHEETS_MIRROR_PATH = os.getenv("SHEETS_MIRROR_PATH", "data/sheets_mirror.db")
+SHEETS_MIRROR_MIN_SYNC_SECONDS = int(os.getenv("SHEETS_MIRROR_MIN_SYNC_SECONDS", 300))   # Re-check Sheets at most this often per tab
+SHEETS_MIRROR_FULL_RESYNC_HOURS = int(os.getenv("SHEETS_MIRROR_FULL_RESYNC_HOURS", 24))  # Full rebuild picks up manual edits
+# Sheets logging is buffered per tab and written with one append_rows call
+SHEETS_WRITER_FLUSH_ROWS = int(os.getenv("SHEETS_WRITER_FLUSH_ROWS", 50))        # Flush a tab once this many rows wait
+SHEETS_WRITER_FLUSH_SECONDS = int(os.getenv("SHEETS_WRITER_FLUSH_SECONDS", 120)) # ...or once its oldest row is this old
+SHEETS_TAIL_CHUNK_ROWS = int(os.getenv("SHEETS_TAIL_CHUNK_ROWS", 200))  # Rows per step when reading a sheet bottom-up (rank lookups)
+
+# --- LOCAL DATA CACHES ---
+# Parquet OHLCV store shared by the scanner, trader and backtests.
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", "data/price_store")
+PRICE_STORE_KEEP_BARS = int(os.getenv("PRICE_STORE_KEEP_BARS", 300))  # Newest daily bars kept per field (never below the longest screen window)
+# S&P 500 constituent snapshot, re-scraped from Wikipedia at most once per TTL.
+UNIVERSE_SNAPSHOT_PATH = os.getenv("UNIVERSE_SNAPSHOT_PATH", "data/sp500_universe.json")
+UNIVERSE_TTL_HOURS = int(os.getenv("UNIVERSE_TTL_HOURS", 24))
+UNIVERSE_RETRY_MINUTES = int(os.getenv("UNIVERSE_RETRY_MINUTES", 60))  # After a failed scrape, serve the stale list this long before retrying
+# Bulk downloads are split into chunks fetched on a bounded worker pool.
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", 100))
+DOWNLOAD_MAX_WORKERS = int(os.getenv("DOWNLOAD_MAX_WORKERS", 4))
+DOWNLOAD_MAX_RETRIES = int(os.getenv("DOWNLOAD_MAX_RETRIES", 3))
+# Scanner indicators computed in one pass (see lib/gvqm_indicators.py SCREENS).
+SCANNER_SCREENS = os.getenv("SCANNER_SCREENS", "sma_distance,rsi,drawdown_52w,atr_pct,volume_spike").split(",")
+# Latest-trade quotes are cached for this many seconds within a pipeline run.
+QUOTE_TTL_SECONDS = int(os.getenv("QUOTE_TTL_SECONDS", 60))
+JUNIOR_QUOTE_MAX_AGE_SECONDS = int(os.getenv("JUNIOR_QUOTE_MAX_AGE_SECONDS", 900))  # Research prompts reuse the scan-time quote (orders still use QUOTE_TTL_SECONDS)
+
+# --- ORDER CONFIRMATION ---
+# Listen to Alpaca trade updates to confirm orders instead of sleeping.
+ORDER_EVENTS_STREAM = os.getenv("ORDER_EVENTS_STREAM", "true").lower() == "true"
+ORDER_CONFIRM_TIMEOUT = float(os.getenv("ORDER_CONFIRM_TIMEOUT", 5))
+
+# --- EXECUTION ---
+# Tickers executed in parallel (same ticker is always serialized).
+EXECUTION_MAX_WORKERS = int(os.getenv("EXECUTION_MAX_WORKERS", 4))
+# Alpaca allows 200 requests/min per account; all execution threads share it.
+ALPACA_RATE_LIMIT_PER_MIN = int(os.getenv("ALPACA_RATE_LIMIT_PER_MIN", 200))
+# Log the planned bracket changes (and their broker-call cost) without sending them.
+ORDER_PLANNER_DRY_RUN = os.getenv("ORDER_PLANNER_DRY_RUN", "false").lower() == "true"
+
+# --- BROKER BACKEND ---
+# "alpaca" = live paper account. "sim" = in-memory simulated broker (offline runs/benchmarks).
+BROKER_BACKEND = os.getenv("BROKER_BACKEND", "alpaca").lower()
+SIM_CASH = float(os.getenv("SIM_CASH", 100000))
+SIM_LATENCY_MS = float(os.getenv("SIM_LATENCY_MS", 0))
+SIM_ERROR_RATE = float(os.getenv("SIM_ERROR_RATE", 0))
+SIM_SETTLE_SECONDS = float(os.getenv("SIM_SETTLE_SECONDS", 0))
 
 DEBUG_MODE = False
 
@@ -1,86 +1,100 @@
-import yfinance as yf
+import numpy as np
 import pandas as pd
-import requests
-import io
+import config
+import lib.gvqm_price_store as price_store
+import lib.gvqm_universe as universe
+import lib.gvqm_indicators as indicators
+
+SMA_WINDOW = indicators.SMA_WINDOW
+SCREEN_COLUMNS = ["ticker", "close", "sma", "distance_pct", "rank"]
+SCANNER_SCREENS = getattr(config, 'SCANNER_SCREENS', list(indicators.SCREENS))
 
 def get_sp500_tickers():
     """
-    Fetches the current S&P 500 tickers from Wikipedia.
-    Includes a fallback list.
+    Returns the current S&P 500 tickers in Yahoo format (BRK-B).
+    Served from the cached universe snapshot (see gvqm_universe).
     """
-    url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
-    fallback = ['PGR', 'AMZN', 'META', 'CRM', 'LMT']  # Minimal fallback list]
-    
-    try:
-        # Use requests with a browser header to avoid 403 Forbidden errors
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        table = pd.read_html(io.StringIO(response.text))
-        tickers = table[0]['Symbol'].tolist()
-        
-        return tickers
+    return universe.get_yahoo_tickers()
 
-    except Exception as e:
-        print(f"Scanner: Error fetching S&P 500 list ({e}). Using fallback.")
-        return fallback
+def build_feature_frame(tickers=None, screens=None):
+    """
+    Per-ticker feature frame (SMA distance, RSI, 52w drawdown, ATR%, volume spike...)
+    computed in one pass over the stored price matrix. Reused by the junior and
+    senior stages so nobody recomputes these (or asks the LLM for them).
+    """
+    names = list(screens or SCANNER_SCREENS)
+    if "sma_distance" not in names: names.insert(0, "sma_distance")  # The distress gate itself
+    frames = {f: price_store.get_field(f, tickers) for f in indicators.required_fields(names)}
+    return indicators.compute_features(frames, names)
+
+def screen_distressed(features):
+    """
+    Keeps tickers trading BELOW their 250-day SMA.
+    Returns the screen table ranked deepest discount first, with every feature column.
+    """
+    if features is None or features.empty or "distance_pct" not in features:
+        return pd.DataFrame(columns=SCREEN_COLUMNS)
+
+    table = features[features["distance_pct"] < 0].reset_index()
+    table = table.sort_values("distance_pct", kind="stable").reset_index(drop=True)
+    table["rank"] = np.arange(1, len(table) + 1)
+    return table
+
+def screen_below_sma(close, window=SMA_WINDOW):
+    """Close-only SMA screen (kept for callers that only hold a Close matrix)."""
+    if close is None or close.empty:
+        return pd.DataFrame(columns=SCREEN_COLUMNS)
+    features = indicators.compute_features({"Close": close}, ["sma_distance"])
+    return screen_distressed(features)
 
 def find_distressed_stocks():
     """
     SCREENS the S&P 500 for stocks trading BELOW their 250-day SMA.
+    Returns the ranked screen table (see screen_distressed).
     """
     print("Scanner: Fetching S&P 500 tickers...")
     tickers = get_sp500_tickers()
-    
-    # --- FIX 1: Ensure tickers are Yahoo-compatible (BRK.B -> BRK-B) ---
-    tickers = [t.replace('.', '-') for t in tickers]
-    # -------------------------------------------------------------------
-    
-    distressed_candidates = []
-    
+
     print(f"Scanner: Screening {len(tickers)} stocks for 250-SMA breakdown...")
-    print("Scanner: Downloading data in bulk (this may take 1-3 minutes)...")
-    
+    print("Scanner: Syncing local price store (only missing bars are downloaded)...")
+
     try:
-        # --- FIX 2 & 3: Clean Logs and Fix Warnings ---
-        data = yf.download(
-            tickers, 
-            period="2y", 
-            interval="1d", 
-            progress=False,    # <--- Silence the progress bar spam
-            auto_adjust=True,  # <--- Fix the FutureWarning
-            threads=True      # <--- Keep disabled for Render stability
-        )['Close']
-        # ----------------------------------------------
+        price_store.refresh(tickers)
+        features = build_feature_frame(tickers)
+    except Exception as e:
+        print(f"Scanner Critical Error: {e}")
+        return pd.DataFrame(columns=SCREEN_COLUMNS)
+
+    print(f"Scanner: Calculating indicators and filtering ({', '.join(SCANNER_SCREENS)})...")
 
+    distressed = screen_distressed(features)
+
+    print(f"Scanner: Found {len(distressed)} potential candidates trading below 250 SMA.")
+    return distressed
+
+def stream_distressed_stocks(on_chunk=None):
+    """
+    STREAMING variant of find_distressed_stocks.
+    Yields one feature dict (ticker, close, sma, distance_pct, rsi, ...) for every
+    stock below its 250-day SMA as soon as the download chunk containing it has
+    been screened, so downstream analysis can start before the whole universe
+    is fetched. (Order follows chunk completion, not the global ranking.)
+    on_chunk(tickers) runs once per screened chunk, before its rows are
+    yielded (e.g. to batch-fetch their quotes).
+    """
+    print("Scanner: Fetching S&P 500 tickers...")
+    tickers = get_sp500_tickers()
+    print(f"Scanner: Streaming 250-SMA screen over {len(tickers)} stocks...")
+
+    found = 0
+    try:
+        for ready in price_store.iter_refresh(tickers):
+            chunk_screen = screen_distressed(build_feature_frame(ready))
+            if on_chunk and not chunk_screen.empty: on_chunk(list(chunk_screen["ticker"]))
+            for row in chunk_screen.drop(columns=["rank"]).to_dict("records"):
+                found += 1
+                yield row
     except Exception as e:
         print(f"Scanner Critical Error: {e}")
-        return []
-    
-    print("Scanner: Calculating indicators and filtering...")
-    
-    for ticker in tickers:
-        try:
-            # Handle case where bulk download might miss a column
-            if ticker not in data.columns:
-                continue
-                
-            prices = data[ticker].dropna()
-            
-            if len(prices) < 250:
-                continue 
-                
-            current_price = prices.iloc[-1]
-            sma_250 = prices.rolling(window=250).mean().iloc[-1]
-            
-            if current_price < sma_250:
-                distressed_candidates.append(ticker)
-                
-        except Exception:
-            continue
 
-    print(f"Scanner: Found {len(distressed_candidates)} potential candidates trading below 250 SMA.")
-    return distressed_candidates
\ No newline at end of file
+    print(f"Scanner: Stream complete. {found} candidates trading below 250 SMA.")
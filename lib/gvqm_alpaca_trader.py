@@ -1,20 +1,29 @@
 import config
 import datetime
 import time
-from alpaca.trading.client import TradingClient
+import threading
 from alpaca.trading.requests import LimitOrderRequest, TakeProfitRequest, StopLossRequest, GetOrdersRequest
 from alpaca.trading.enums import OrderSide, TimeInForce, OrderClass, QueryOrderStatus, OrderType
-from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockLatestTradeRequest, StockBarsRequest
-from alpaca.data.timeframe import TimeFrame
 
 # --- IMPORTS ---
 import lib.gvqm_pending_orders_manager as pending_mgr
 import lib.gvqm_alpaca_filled_orders_manager as filled_mgr
+import lib.gvqm_universe as universe
+import lib.gvqm_market_data as market_data
+import lib.gvqm_portfolio_snapshot as portfolio_snapshot
+import lib.gvqm_order_events as order_events
+import lib.gvqm_rate_limiter as rate_limiter
+import lib.gvqm_broker as broker
 
 # Initialize Clients
-trading_client = TradingClient(config.ALPACA_KEY_ID, config.ALPACA_SECRET_KEY, paper=True)
-data_client = StockHistoricalDataClient(config.ALPACA_KEY_ID, config.ALPACA_SECRET_KEY)
+# Every trading call (from any execution thread) draws from one shared budget
+trading_bucket = rate_limiter.TokenBucket(getattr(config, 'ALPACA_RATE_LIMIT_PER_MIN', 200), 60, capacity=20)
+# Clients resolve on first use (live Alpaca or the simulator, see gvqm_broker)
+trading_client = rate_limiter.RateLimitedClient(broker.LazyClient("trading"), trading_bucket)
+data_client = broker.LazyClient("data")
+quotes = market_data.QuoteCache(data_client)
+portfolio = portfolio_snapshot.PortfolioSnapshot(trading_client)
+_print_lock = threading.Lock()
 
 # ==========================================================
 #  🎨 THE 3-COLUMN EXECUTION MATRIX (NUMERIC VERIFICATION)
@@ -83,20 +92,23 @@ def log_execution_matrix(ticker, command, initial_state, request_data, final_sta
         else: res_lines.append("Act SL: None")
     
     # --- PRINT TABLE ---
+    # Built first and printed in one go, so concurrent executions don't interleave rows
     col_width = 32
-    print(f"\n[{timestamp}] [EXECUTION] ║ {ticker:<6} | {command}")
-    print("=" * 105)
-    print(f"{'CURRENT STATE (Broker)':<{col_width}} | {'REQUEST (Senior Mgr)':<{col_width}} | {'UPDATED STATE (Broker)':<{col_width}}")
-    print("-" * 105)
+    table = [f"\n[{timestamp}] [EXECUTION] ║ {ticker:<6} | {command}"]
+    table.append("=" * 105)
+    table.append(f"{'CURRENT STATE (Broker)':<{col_width}} | {'REQUEST (Senior Mgr)':<{col_width}} | {'UPDATED STATE (Broker)':<{col_width}}")
+    table.append("-" * 105)
     
     max_rows = max(len(cur_lines), len(req_lines), len(res_lines))
     for i in range(max_rows):
         c1 = cur_lines[i] if i < len(cur_lines) else ""
         c2 = req_lines[i] if i < len(req_lines) else ""
         c3 = res_lines[i] if i < len(res_lines) else ""
-        print(f"{c1:<{col_width}} | {c2:<{col_width}} | {c3:<{col_width}}")
-    print("-" * 105)
-    print("\n")
+        table.append(f"{c1:<{col_width}} | {c2:<{col_width}} | {c3:<{col_width}}")
+    table.append("-" * 105)
+    table.append("\n")
+    with _print_lock:
+        print("\n".join(table))
 
 # --- SHARED UTILS ---
 def log_trader(message):
@@ -118,22 +130,30 @@ def _inject_log_params(result_list, qty, buy, tp, sl):
         item['take_profit'] = tp
         item['stop_loss'] = sl
 
-def normalize_ticker(ticker): return ticker.replace('-', '.') if ticker else ticker
+def normalize_ticker(ticker): return universe.to_alpaca(ticker)
 
-def get_current_price(ticker):
-    ticker = normalize_ticker(ticker)
-    try:
-        req = StockLatestTradeRequest(symbol_or_symbols=ticker)
-        return float(data_client.get_stock_latest_trade(req)[ticker].price)
+def get_current_price(ticker, max_age=None):
+    try: return quotes.get(normalize_ticker(ticker), max_age)
     except: return None
 
+def prefetch_prices(tickers):
+    """Warms the quote cache for many tickers with batched multi-symbol requests."""
+    quotes.prefetch([normalize_ticker(t) for t in tickers if t])
+
+def reset_run_caches():
+    """Drops run-scoped cached quotes and the broker snapshot (call at the start of each pipeline run)."""
+    quotes.clear()
+    portfolio.clear()
+
+def get_sma_many(tickers, window=250):
+    """Returns {ticker: SMA or None} for many tickers (price store first, then one batched bars request)."""
+    symbol_map = {t: normalize_ticker(t) for t in tickers if t}
+    try: smas = market_data.get_sma_many(data_client, symbol_map.values(), window)
+    except: smas = {}
+    return {t: smas.get(s) for t, s in symbol_map.items()}
+
 def get_simple_moving_average(ticker, window=250):
-    try:
-        start_dt = datetime.datetime.now() - datetime.timedelta(days=window * 2) 
-        req = StockBarsRequest(symbol_or_symbols=[normalize_ticker(ticker)], timeframe=TimeFrame.Day, start=start_dt, limit=window+10)
-        closes = [b.close for b in data_client.get_stock_bars(req)[normalize_ticker(ticker)]]
-        return float(sum(closes[-window:]) / window) if len(closes) >= window else None
-    except: return None
+    return get_sma_many([ticker], window).get(ticker)
 
 def get_position(ticker):
     for _ in range(3):
@@ -145,48 +165,35 @@ def get_position(ticker):
 #  👀 THE CONTEXT FETCHER
 # ==========================================================
 def _fetch_snapshot(ticker):
-    state = {
-        "shares": 0.0, 
-        "avg_entry": 0.0, 
-        "pending_buy": None, 
-        "tp": 0.0, 
-        "sl": 0.0, 
-        "manual": False
-    }
-    
     try:
-        # 1. Shares & Entry Price
-        try:
-            pos = trading_client.get_open_position(normalize_ticker(ticker))
-            state["shares"] = float(pos.qty)
-            state["avg_entry"] = float(pos.avg_entry_price)
-        except:
-            state["shares"] = 0.0
-            state["avg_entry"] = 0.0
-
-        # 2. Orders
-        req = GetOrdersRequest(status=QueryOrderStatus.ALL, symbols=[ticker], limit=500)
-        all_orders = trading_client.get_orders(filter=req)
-  
-        live_statuses = ['new', 'partially_filled', 'accepted', 'pending_new', 'pending_replace', 'held']
-        orders = [o for o in all_orders if (o.status.value if hasattr(o.status, 'value') else str(o.status)) in live_statuses]
-
-        if any(o.side == OrderSide.BUY and o.type == OrderType.MARKET for o in orders):
-            state["manual"] = True
-            return state
-
-        buy = next((o for o in orders if o.side == OrderSide.BUY), None)
-        if buy: state["pending_buy"] = float(buy.limit_price)
-
-        tp = next((o for o in orders if o.side == OrderSide.SELL and o.type == OrderType.LIMIT), None)
-        if tp: state["tp"] = float(tp.limit_price)
-
-        sl = next((o for o in orders if o.side == OrderSide.SELL and o.type in [OrderType.STOP, OrderType.STOP_LIMIT]), None)
-        if sl: state["sl"] = float(sl.stop_price) if sl.stop_price else float(sl.limit_price)
-        
-        return state
+        return portfolio.get_state(ticker)
     except:
-        return state
+        return {
+            "shares": 0.0, 
+            "avg_entry": 0.0, 
+            "pending_buy": None, 
+            "tp": 0.0, 
+            "sl": 0.0, 
+            "manual": False
+        }
+
+def _state_matches(state, buy_limit, take_profit, stop_loss):
+    """True when the broker shows the bracket we asked for (1 cent tolerance)."""
+    def near(target, actual): return target <= 0 or (actual is not None and abs(target - actual) < 0.02)
+    if state["shares"] <= 0 and not state["pending_buy"]: return False
+    if state["shares"] <= 0 and not near(buy_limit, state["pending_buy"]): return False
+    return near(take_profit, state["tp"]) and near(stop_loss, state["sl"])
+
+def _await_broker_state(ticker, buy_limit, take_profit, stop_loss):
+    """Waits (event-driven, adaptive polling) until the broker reflects our write."""
+    def check():
+        portfolio.invalidate(ticker)
+        return _state_matches(_fetch_snapshot(ticker), buy_limit, take_profit, stop_loss)
+    order_events.wait_until(ticker, check, label="bracket state")
+
+def get_live_tickers():
+    """Symbols with a position or a live order (served from the account-wide snapshot)."""
+    return portfolio.symbols()
 
 def get_position_details(ticker):
     ticker = normalize_ticker(ticker)
@@ -215,6 +222,7 @@ def get_position_details(ticker):
 
 def execute_update(ticker, take_profit, stop_loss, buy_limit=0):
     ticker = normalize_ticker(ticker)
+    broker.ensure_stream()
     req_data = {"limit": buy_limit, "tp": take_profit, "sl": stop_loss}
     
     # 1. SNAPSHOT BEFORE
@@ -226,10 +234,7 @@ def execute_update(ticker, take_profit, stop_loss, buy_limit=0):
 
     # 2. EXECUTE
     try:
-        req_filter = GetOrdersRequest(status=QueryOrderStatus.ALL, symbols=[ticker], limit=500)
-        all_orders = trading_client.get_orders(filter=req_filter)
-        live_statuses = ['new', 'partially_filled', 'accepted', 'pending_new', 'pending_replace', 'held']
-        orders = [o for o in all_orders if (o.status.value if hasattr(o.status, 'value') else str(o.status)) in live_statuses]
+        orders = portfolio.live_orders(ticker)
 
         buy = next((o for o in orders if o.side == OrderSide.BUY), None)
   
@@ -267,9 +272,12 @@ def execute_update(ticker, take_profit, stop_loss, buy_limit=0):
     except Exception as e:
         final_res = _enforce_contract({"event": "ERROR", "info": str(e)})
 
+    # Our own write: only this symbol needs a fresh broker read
+    portfolio.invalidate(ticker)
+
     # 3. VERIFY
-    if final_res[0].get("event") not in ["ERROR", "HOLD"]:
-        time.sleep(2) 
+    if final_res[0].get("event") not in ["ERROR", "HOLD", "DRY_RUN"]:
+        _await_broker_state(ticker, buy_limit, take_profit, stop_loss)
     
     final_state = _fetch_snapshot(ticker)
     
@@ -279,6 +287,7 @@ def execute_update(ticker, take_profit, stop_loss, buy_limit=0):
 
 def execute_entry(ticker, investment_amount, buy_limit, take_profit, stop_loss):
     ticker = normalize_ticker(ticker)
+    broker.ensure_stream()
     req_data = {"limit": buy_limit, "tp": take_profit, "sl": stop_loss, "amt": investment_amount}
     
     # 1. SNAPSHOT
@@ -315,9 +324,11 @@ def execute_entry(ticker, investment_amount, buy_limit, take_profit, stop_loss):
     except Exception as e:
         final_res = _enforce_contract({"event": "ERROR", "info": str(e)})
 
+    portfolio.invalidate(ticker)
+
     # 3. VERIFY
     if final_res[0].get("event") not in ["ERROR", "HOLD"]:
-        time.sleep(2) 
+        _await_broker_state(ticker, buy_limit, take_profit, stop_loss)
         
     final_state = _fetch_snapshot(ticker)
     log_execution_matrix(ticker, "ENTRY", initial_state, req_data, final_state, final_res)
@@ -0,0 +1,86 @@
+import datetime
+import threading
+import config
+import lib.gvqm_order_events as order_events
+
+# ==========================================================
+#  🔌 BROKER BACKEND SELECTION
+# ==========================================================
+# The trader talks to "a TradingClient-shaped object" and "a data-client-
+# shaped object". This module decides which:
+#   BROKER_BACKEND=alpaca -> live Alpaca clients (paper account)
+#   BROKER_BACKEND=sim    -> in-memory SimBroker (no network, no keys)
+# Clients are built on FIRST USE, so importing the trader never connects.
+# Tests/benchmarks can install their own simulator with use_backend().
+
+BACKEND = getattr(config, 'BROKER_BACKEND', 'alpaca')
+
+_clients = {}
+_lock = threading.Lock()
+
+def log_broker(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [BROKER] {message}")
+
+def _store_price(symbol):
+    """Last stored close, so the simulator can quote symbols without a price path."""
+    import lib.gvqm_price_store as price_store
+    import lib.gvqm_universe as universe
+    close = price_store.get_field("Close", [universe.to_yahoo(symbol)])
+    series = close.iloc[:, 0].dropna() if not close.empty else None
+    return float(series.iloc[-1]) if series is not None and not series.empty else None
+
+def _build_sim():
+    import lib.gvqm_sim_broker as sim_broker
+    sim = sim_broker.SimBroker(
+        cash=getattr(config, 'SIM_CASH', 100000.0),
+        latency=getattr(config, 'SIM_LATENCY_MS', 0) / 1000.0,
+        error_rate=getattr(config, 'SIM_ERROR_RATE', 0.0),
+        settle_seconds=getattr(config, 'SIM_SETTLE_SECONDS', 0.0),
+    )
+    sim.price_fallback = _store_price
+    return sim
+
+def _build(kind):
+    if BACKEND == "sim":
+        if "sim" not in _clients: use_backend(_build_sim())
+        return _clients[kind]
+
+    log_broker(f"Connecting {kind} client to Alpaca...")
+    if kind == "trading":
+        from alpaca.trading.client import TradingClient
+        return TradingClient(config.ALPACA_KEY_ID, config.ALPACA_SECRET_KEY, paper=True)
+    from alpaca.data.historical import StockHistoricalDataClient
+    return StockHistoricalDataClient(config.ALPACA_KEY_ID, config.ALPACA_SECRET_KEY)
+
+def get_client(kind):
+    """kind: 'trading' or 'data'."""
+    with _lock:
+        if kind not in _clients: _clients[kind] = _build(kind)
+        return _clients[kind]
+
+def use_backend(sim):
+    """Routes every client (and trade updates) to a SimBroker instance."""
+    global BACKEND
+    import lib.gvqm_sim_broker as sim_broker
+    BACKEND = "sim"
+    _clients.update({"sim": sim, "trading": sim, "data": sim_broker.SimDataClient(sim)})
+    source = order_events.FakeTradeUpdates()
+    order_events.hub.source = None
+    order_events.use_source(source)
+    sim.on_update = source.emit
+    log_broker(f"Using simulated broker ({type(sim).__name__}).")
+    return sim
+
+def ensure_stream():
+    """Trade updates: Alpaca websocket for the live backend, the simulator's own feed otherwise."""
+    if BACKEND == "sim": get_client("trading")
+    else: order_events.ensure_stream()
+
+class LazyClient:
+    """Resolves the real client on first attribute access."""
+    def __init__(self, kind):
+        self._kind = kind
+
+    def __getattr__(self, name):
+        return getattr(get_client(self._kind), name)
@@ -0,0 +1,113 @@
+import time
+import datetime
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import config
+
+# ==========================================================
+#  📦 CHUNKED BULK DOWNLOADER
+# ==========================================================
+# Splits a universe into chunks, fetches them on a bounded worker pool and
+# retries ONLY the symbols that came back empty (with exponential backoff),
+# merging each retry into its chunk. One slow or broken symbol can no longer
+# stall or kill the whole scan.
+#
+# `fetch(chunk_tickers)` must return {field: wide frame (date x ticker)}.
+
+CHUNK_SIZE = getattr(config, 'DOWNLOAD_CHUNK_SIZE', 100)
+MAX_WORKERS = getattr(config, 'DOWNLOAD_MAX_WORKERS', 4)
+MAX_RETRIES = getattr(config, 'DOWNLOAD_MAX_RETRIES', 3)
+BACKOFF_SECONDS = 2
+
+def log_download(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [DOWNLOADER] {message}")
+
+def _missing_symbols(tickers, frames):
+    close = frames.get("Close")
+    if close is None or close.empty: return list(tickers)
+    present = set(close.columns[close.notna().any()])
+    return [t for t in tickers if t not in present]
+
+def _merge(frame_lists):
+    """{field: [wide frames]} -> {field: one frame, first copy of each column kept}."""
+    frames = {}
+    for field, frame_list in frame_lists.items():
+        merged = pd.concat(frame_list, axis=1)
+        frames[field] = merged.loc[:, ~merged.columns.duplicated()].sort_index()
+    return frames
+
+def _run_chunk(fetch, index, chunk, attempt, delay):
+    if delay: time.sleep(delay)
+    start = time.time()
+    try:
+        frames, error = fetch(chunk) or {}, None
+    except Exception as e:
+        frames, error = {}, str(e)
+    return {
+        "index": index, "tickers": chunk, "attempt": attempt,
+        "frames": frames, "error": error,
+        "seconds": round(time.time() - start, 2),
+    }
+
+def iter_chunks(tickers, fetch, chunk_size=CHUNK_SIZE, max_workers=MAX_WORKERS, max_retries=MAX_RETRIES):
+    """
+    Yields one result dict per chunk AS SOON AS it is final (every symbol
+    fetched, or retries used up). A retry only re-requests the chunk's
+    symbols that are still missing. Keys: index, tickers, attempt, frames,
+    error, seconds, missing, ok.
+    """
+    tickers = list(tickers)
+    chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+    if not chunks: return
+    collected = {i: {} for i in range(len(chunks))}  # index -> {field: [frames from each attempt]}
+    seconds = {i: 0.0 for i in range(len(chunks))}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {pool.submit(_run_chunk, fetch, i, c, 1, 0) for i, c in enumerate(chunks)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                res = fut.result()
+                index, attempt = res["index"], res["attempt"]
+                seconds[index] += res["seconds"]
+                for field, frame in res["frames"].items():
+                    collected[index].setdefault(field, []).append(frame)
+                missing = _missing_symbols(res["tickers"], res["frames"])
+
+                if missing and attempt <= max_retries:
+                    delay = BACKOFF_SECONDS * 2 ** (attempt - 1)
+                    reason = res["error"] or (f"{len(missing)} missing" if len(missing) < len(res["tickers"]) else "no data")
+                    log_download(f"⚠️ Chunk {index+1}/{len(chunks)} incomplete ({reason}). Retry {attempt}/{max_retries} for {len(missing)} tickers in {delay}s...")
+                    pending.add(pool.submit(_run_chunk, fetch, index, missing, attempt + 1, delay))
+                    continue
+
+                frames = _merge(collected.pop(index))
+                res.update({"tickers": chunks[index], "frames": frames, "seconds": round(seconds[index], 2),
+                            "missing": _missing_symbols(chunks[index], frames)})
+                res["ok"] = len(res["missing"]) < len(chunks[index])
+                icon = "✅" if res["ok"] else "❌"
+                log_download(f"{icon} Chunk {index+1}/{len(chunks)}: {len(chunks[index])} tickers in {res['seconds']}s (attempt {attempt}, {len(res['missing'])} missing)")
+                yield res
+
+def fetch_in_chunks(tickers, fetch, chunk_size=CHUNK_SIZE, max_workers=MAX_WORKERS, max_retries=MAX_RETRIES):
+    """
+    Blocking variant of iter_chunks. Returns (frames, report) where frames is
+    {field: merged wide frame} and report summarises timings and missing symbols.
+    """
+    start = time.time()
+    parts = {}
+    report = {"chunks": [], "missing": [], "failed_chunks": 0, "seconds": 0.0}
+
+    for res in iter_chunks(tickers, fetch, chunk_size, max_workers, max_retries):
+        report["chunks"].append({k: res[k] for k in ("index", "tickers", "attempt", "seconds", "error", "ok")})
+        report["missing"].extend(res["missing"])
+        if not res["ok"]: report["failed_chunks"] += 1
+        for field, frame in res["frames"].items():
+            parts.setdefault(field, []).append(frame)
+
+    frames = _merge(parts)
+
+    report["seconds"] = round(time.time() - start, 2)
+    log_download(f"Done: {len(report['chunks'])} chunks in {report['seconds']}s | {report['failed_chunks']} failed | {len(report['missing'])} missing symbols{': ' + str(report['missing'][:10]) if report['missing'] else ''}")
+    return frames, report
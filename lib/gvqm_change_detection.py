@@ -0,0 +1,101 @@
+import os
+import json
+import datetime
+import threading
+import config
+
+# ==========================================================
+#  🔍 CHANGE DETECTION FOR JUNIOR RE-ANALYSIS
+# ==========================================================
+# Every filed report stores the price + scanner features it was based on.
+# Next time the ticker shows up we compare against that snapshot:
+#   - moved materially (price or any feature past its threshold) -> re-analyze,
+#     even inside the cooldown window
+#   - nothing material changed -> keep the existing report, no LLM call,
+#     until it is REANALYZE_MAX_AGE_DAYS old
+# Tickers reported before snapshots existed fall back to COOLDOWN_DAYS.
+
+SNAPSHOT_PATH = getattr(config, 'JUNIOR_SNAPSHOT_PATH', "data/junior_snapshots.json")
+PRICE_MOVE_PCT = getattr(config, 'REANALYZE_PRICE_MOVE_PCT', 7.0)
+MAX_AGE_DAYS = getattr(config, 'REANALYZE_MAX_AGE_DAYS', 30)
+COOLDOWN_DAYS = getattr(config, 'COOLDOWN_DAYS', 10)
+
+# Absolute change (in the feature's own units) that counts as material
+FEATURE_THRESHOLDS = {
+    "distance_pct": 5.0,       # % points vs the 250 SMA
+    "rsi": 10.0,
+    "drawdown_52w_pct": 5.0,   # % points
+    "atr_pct": 1.5,            # % points of daily range
+    "volume_spike": 1.5,       # x average volume
+}
+
+_lock = threading.Lock()
+_snapshots = None
+
+def log_changes(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [CHANGE_DETECT] {message}")
+
+# --- SNAPSHOT STORE ---
+def load():
+    """{ticker: {"date", "price", "features"}} (cached after the first read)."""
+    global _snapshots
+    with _lock:
+        if _snapshots is None:
+            try:
+                with open(SNAPSHOT_PATH) as f:
+                    _snapshots = json.load(f)
+            except (OSError, ValueError):
+                _snapshots = {}
+        return _snapshots
+
+def record(ticker, price, features):
+    """Stores the inputs a freshly filed report was based on."""
+    snapshots = load()
+    with _lock:
+        snapshots[ticker] = {
+            "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "price": float(price) if price else None,
+            "features": features or {},
+        }
+        os.makedirs(os.path.dirname(SNAPSHOT_PATH) or ".", exist_ok=True)
+        tmp_path = SNAPSHOT_PATH + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshots, f)
+        os.replace(tmp_path, SNAPSHOT_PATH)
+
+# --- DECISION ---
+def _pct_move(old, new):
+    if not old or not new: return 0.0
+    return abs(new / old - 1) * 100
+
+def assess(ticker, candidate, last_report_date, now):
+    """
+    Returns (analyze, reason). `candidate` is the scanner feature dict;
+    `last_report_date` is the newest report's datetime (None = never reported).
+    """
+    if last_report_date is None: return True, "no previous report"
+    age_days = (now - last_report_date).days
+
+    snap = load().get(ticker)
+    if not snap:
+        return age_days >= COOLDOWN_DAYS, f"cooldown ({age_days}d old, no snapshot)"
+    if age_days >= MAX_AGE_DAYS:
+        return True, f"report is {age_days}d old"
+
+    old_features = snap.get("features", {})
+    move = _pct_move(old_features.get("close", snap.get("price")), candidate.get("close"))
+    if move >= PRICE_MOVE_PCT:
+        return True, f"price moved {move:.1f}%"
+
+    for name, threshold in FEATURE_THRESHOLDS.items():
+        old, new = old_features.get(name), candidate.get(name)
+        if old is None or new is None: continue
+        try:
+            delta = abs(float(new) - float(old))
+        except (TypeError, ValueError):
+            continue
+        if delta >= threshold:
+            return True, f"{name} moved {delta:.1f}"
+
+    return False, f"unchanged since {snap['date']}"
@@ -0,0 +1,56 @@
+import datetime
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import config
+
+# ==========================================================
+#  ⚙️ CONCURRENT EXECUTION ENGINE
+# ==========================================================
+# Runs independent tickers in parallel on a bounded pool. Commands for the
+# SAME symbol are serialized by a per-symbol lock, so a ticker never has
+# two bracket rebuilds racing each other. Broker throughput is capped by
+# the trader's rate-limited client, not here.
+
+MAX_WORKERS = getattr(config, 'EXECUTION_MAX_WORKERS', 4)
+
+_symbol_locks = defaultdict(threading.Lock)
+_registry_lock = threading.Lock()
+
+def log_engine(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [EXEC_ENGINE] {message}")
+
+def symbol_lock(symbol):
+    with _registry_lock:
+        return _symbol_locks[str(symbol).upper().replace('-', '.')]
+
+def run_orders(orders, execute_fn, max_workers=MAX_WORKERS):
+    """
+    Executes `execute_fn(order)` for every order dict concurrently.
+    Returns [(order, events)] in the ORIGINAL order, where events is the
+    trader's event-dict list (exceptions become a single ERROR event).
+    """
+    def run(order):
+        with symbol_lock(order.get('ticker')):
+            return execute_fn(order)
+
+    if not orders: return []
+    workers = max(1, min(max_workers, len(orders)))
+    log_engine(f"Executing {len(orders)} commands on {workers} workers...")
+
+    started = datetime.datetime.now()
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run, o) for o in orders]
+        for order, fut in zip(orders, futures):
+            try:
+                events = fut.result()
+            except Exception as e:
+                events = [{"event": "ERROR", "info": str(e)}]
+            if isinstance(events, dict): events = [events]
+            results.append((order, events or []))
+
+    elapsed = (datetime.datetime.now() - started).total_seconds()
+    log_engine(f"✅ {len(orders)} commands finished in {elapsed:.1f}s.")
+    return results
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================================
+#  📐 SCREEN REGISTRY (vectorized, whole-universe indicators)
+# ==========================================================
+# Every screen works on the SAME packed price matrix: each field is
+# (bars x tickers) with every ticker's valid bars pushed to the bottom, so
+# row -1 is the latest bar of every column and row -k..-1 are its last k bars.
+# Packing happens once per run; each screen then only touches the tail rows it
+# needs, so adding a screen never adds another pass over the raw data.
+#
+# To add a screen: write fn(packed) -> {column: array[n_tickers]} and
+# register it in SCREENS with the fields it reads and the bars it needs.
+
+SMA_WINDOW = 250
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+DRAWDOWN_WINDOW = 252
+VOLUME_WINDOW = 20
+
+def pack(frames):
+    """
+    Aligns all fields on the Close validity mask.
+    Returns {"tickers": Index, "counts": array, <field>: 2D array}.
+    """
+    close = frames["Close"]
+    valid = close.notna().to_numpy()
+    order = np.argsort(valid, axis=0, kind="stable")
+    packed = {"tickers": close.columns, "counts": valid.sum(axis=0)}
+    for field, frame in frames.items():
+        values = frame.reindex(index=close.index, columns=close.columns).to_numpy(dtype=float)
+        packed[field] = np.take_along_axis(values, order, axis=0)
+    return packed
+
+def _tail(packed, field, n):
+    arr = packed[field]
+    if arr.shape[0] >= n: return arr[-n:]
+    pad = np.full((n - arr.shape[0], arr.shape[1]), np.nan)
+    return np.vstack([pad, arr])
+
+def _sma_distance(packed):
+    closes = _tail(packed, "Close", SMA_WINDOW)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sma = closes.mean(axis=0)
+        distance = (closes[-1] - sma) / sma * 100
+    return {"sma": sma, "distance_pct": distance}
+
+def _rsi(packed):
+    # Wilder's RSI, seeded on the oldest window of a 10x lookback tail.
+    closes = _tail(packed, "Close", RSI_WINDOW * 10 + 1)
+    deltas = np.diff(closes, axis=0)
+    gains, losses = np.clip(deltas, 0, None), np.clip(-deltas, 0, None)
+    avg_gain = gains[:RSI_WINDOW].mean(axis=0)
+    avg_loss = losses[:RSI_WINDOW].mean(axis=0)
+    for i in range(RSI_WINDOW, len(deltas)):
+        avg_gain = (avg_gain * (RSI_WINDOW - 1) + gains[i]) / RSI_WINDOW
+        avg_loss = (avg_loss * (RSI_WINDOW - 1) + losses[i]) / RSI_WINDOW
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rs = avg_gain / avg_loss
+        rsi = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + rs))
+    return {"rsi": rsi}
+
+def _drawdown_52w(packed):
+    closes = _tail(packed, "Close", DRAWDOWN_WINDOW)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        drawdown = (closes[-1] / np.nanmax(closes, axis=0) - 1) * 100
+    return {"drawdown_52w_pct": drawdown}
+
+def _atr_pct(packed):
+    high = _tail(packed, "High", ATR_WINDOW)
+    low = _tail(packed, "Low", ATR_WINDOW)
+    prev_close = _tail(packed, "Close", ATR_WINDOW + 1)[:-1]
+    true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        atr_pct = true_range.mean(axis=0) / packed["Close"][-1] * 100
+    return {"atr_pct": atr_pct}
+
+def _volume_spike(packed):
+    volume = _tail(packed, "Volume", VOLUME_WINDOW + 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        spike = volume[-1] / volume[:-1].mean(axis=0)
+    return {"volume_spike": spike}
+
+SCREENS = {
+    "sma_distance": {"fn": _sma_distance, "fields": ("Close",), "bars": SMA_WINDOW},
+    "rsi": {"fn": _rsi, "fields": ("Close",), "bars": RSI_WINDOW * 10 + 1},
+    "drawdown_52w": {"fn": _drawdown_52w, "fields": ("Close",), "bars": DRAWDOWN_WINDOW},
+    "atr_pct": {"fn": _atr_pct, "fields": ("High", "Low", "Close"), "bars": ATR_WINDOW + 1},
+    "volume_spike": {"fn": _volume_spike, "fields": ("Volume",), "bars": VOLUME_WINDOW + 1},
+}
+
+def sma_last(close, window=SMA_WINDOW):
+    """Latest `window`-bar SMA per column of a Close frame (NaN without enough history)."""
+    if close is None or close.empty: return pd.Series(dtype=float)
+    packed = pack({"Close": close})
+    with np.errstate(invalid="ignore"):
+        sma = _tail(packed, "Close", window).mean(axis=0)
+    return pd.Series(np.where(packed["counts"] >= window, sma, np.nan), index=packed["tickers"])
+
+def required_fields(names):
+    fields = {"Close"}
+    for name in names: fields.update(SCREENS[name]["fields"])
+    return sorted(fields)
+
+def compute_features(frames, names=None):
+    """
+    Computes the selected screens over the shared price matrix.
+    Returns a per-ticker feature frame (index = ticker) with 'close', 'bars'
+    and each screen's columns. Values are NaN where a ticker lacks the
+    history (or the field) a screen needs.
+    """
+    names = list(names or SCREENS)
+    close = frames.get("Close")
+    if close is None or close.empty:
+        return pd.DataFrame()
+
+    usable = {f: frames[f] for f in required_fields(names) if f in frames}
+    packed = pack(usable)
+    counts = packed["counts"]
+    features = {"close": np.where(counts > 0, packed["Close"][-1], np.nan), "bars": counts}
+
+    for name in names:
+        screen = SCREENS[name]
+        if any(f not in packed for f in screen["fields"]): continue
+        enough = counts >= screen["bars"]
+        for col, values in screen["fn"](packed).items():
+            features[col] = np.where(enough, values, np.nan)
+
+    return pd.DataFrame(features, index=pd.Index(packed["tickers"], name="ticker"))
+
+def to_snapshot(features):
+    """Rounds one ticker's features (dict or Series) into a JSON-friendly dict, dropping NaNs."""
+    snapshot = {}
+    for key, value in dict(features).items():
+        if key in ("ticker", "rank", "bars"): continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if np.isnan(value): continue
+        snapshot[key] = round(value, 2)
+    return snapshot
@@ -1,10 +1,9 @@
-import requests
 import json
 import config
-import time
 import lib.gvqm_junior_prompts as prompts
+import lib.gvqm_llm_client as llm_client
+import lib.gvqm_llm_cache as llm_cache
 import re
-import os
 
 # 1. Setup Model
 raw_model = getattr(config, 'GEMINI_JUNIOR_MODEL', "gemini-2.0-flash")
@@ -14,8 +13,6 @@ API_KEY = config.GEMINI_API_KEY
 if not API_KEY:
     print("⚠️ [JUNIOR] CRITICAL WARNING: GEMINI_API_KEY is missing.")
 
-BASE_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{MODEL_NAME}:generateContent"
-
 def clean_json_text(text):
     """
     Scans the text for the first JSON object using Regex.
@@ -31,76 +28,219 @@ def clean_json_text(text):
     except:
         return None
 
-def analyze_stock(ticker, current_price):
+def _fingerprint(template, stocks):
+    """Cache key material: the prompt template + each stock with its numbers bucketed (~1%)."""
+    rows = [[ticker, llm_cache.price_bucket(price), llm_cache.bucket_numbers(features)] for ticker, price, features in stocks]
+    return template + json.dumps(rows, sort_keys=True, default=str)
+
+def analyze_stock(ticker, current_price, features=None):
     print(f"🤖 [JUNIOR] Analyzing {ticker} using {MODEL_NAME}...")
     
-    prompt = prompts.HEDGE_FUND_PROMPT.format(ticker=ticker, current_price=current_price)
-    
-    # Safety Settings (Block None to prevent refusals)
-    safety_settings = [
-        {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-        {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-        {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-        {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"}
-    ]
-    
-    payload = {
-        "contents": [{"parts": [{"text": prompt}]}], 
-        "tools": [{"googleSearch": {}}],
-        "safetySettings": safety_settings 
-    }
+    quant_snapshot = json.dumps(features) if features else "Not available"
+    prompt = prompts.HEDGE_FUND_PROMPT.format(ticker=ticker, current_price=current_price, quant_snapshot=quant_snapshot)
     
-    # Retry Loop
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(
-                f"{BASE_URL}?key={API_KEY}", 
-                headers={'Content-Type': 'application/json'}, 
-                data=json.dumps(payload)
-            )
-            
-            if response.status_code == 200:
-                result_json = response.json()
-                try:
-                    candidates = result_json.get('candidates', [])
-                    if not candidates: return None
-                    
-                    parts = candidates[0].get('content', {}).get('parts', [])
-                    if not parts: return None
-                        
-                    text = parts[0].get('text', "")
-                    
-                    # --- NEW ROBUST CLEANING ---
-                    cleaned_json = clean_json_text(text)
-                    
-                    if not cleaned_json:
-                        print(f"   ⚠️ Response contained no JSON. Raw: {text[:50]}...")
-                        # If the AI was chatty, we treat it as a fail and maybe retry or skip
-                        return None
-                        
-                    return json.loads(cleaned_json)
-                    # ---------------------------
-
-                except json.JSONDecodeError:
-                    print(f"   ❌ JSON Decode Error. Content was not valid JSON.")
-                    return None
-                except Exception as e:
-                    print(f"   ❌ Parsing Structure Error: {e}")
-                    return None
-            
-            elif response.status_code in [429, 503]:
-                wait = (attempt + 1) * 10
-                print(f"   ⚠️ API Busy ({response.status_code}). Retrying in {wait}s...")
-                time.sleep(wait)
-                continue
-            
-            else:
-                print(f"   ❌ API Error {response.status_code}: {response.text}")
-                return None
-                
-        except Exception as e:
-            print(f"   ❌ Connection Error: {e}")
+    try:
+        text = llm_client.generate(MODEL_NAME, prompt, agent="JUNIOR",
+                                   fingerprint=_fingerprint(prompts.HEDGE_FUND_PROMPT, [(ticker, current_price, features)]),
+                                   accept=lambda t: clean_json_text(t) is not None)
+    except llm_client.DailyQuotaExceeded as e:
+        print(f"   ⛔ {e}")
+        return None
+    if not text: return None
+
+    try:
+        # --- NEW ROBUST CLEANING ---
+        cleaned_json = clean_json_text(text)
+        
+        if not cleaned_json:
+            print(f"   ⚠️ Response contained no JSON. Raw: {text[:50]}...")
+            # If the AI was chatty, we treat it as a fail and skip
             return None
             
-    return None
\ No newline at end of file
+        return json.loads(cleaned_json)
+        # ---------------------------
+
+    except json.JSONDecodeError:
+        print(f"   ❌ JSON Decode Error. Content was not valid JSON.")
+        return None
+    except Exception as e:
+        print(f"   ❌ Parsing Structure Error: {e}")
+        return None
+
+# ==========================================================
+#  📦 BATCH MODE (several tickers per Gemini request)
+# ==========================================================
+# One request carries as many tickers as fit in GEMINI_MAX_BATCH_TOKENS
+# (prompt + the reports we expect back), capped at JUNIOR_BATCH_MAX_TICKERS.
+# Reports are matched back by their "ticker" field; tickers whose report is
+# missing or malformed are returned so the caller can re-queue them.
+
+BATCH_MAX_TOKENS = getattr(config, 'GEMINI_MAX_BATCH_TOKENS', 10_000)
+BATCH_MAX_TICKERS = getattr(config, 'JUNIOR_BATCH_MAX_TICKERS', 8)
+REPORT_OUTPUT_TOKENS = 800  # One full report is ~500-800 tokens of JSON
+REQUIRED_FIELDS = ["status", "valuation", "rebound_potential", "conviction_score", "action", "execution"]
+
+def _key(ticker):
+    return str(ticker).strip().upper().replace('.', '-')
+
+def _stock_line(item):
+    features = item.get("features")
+    return prompts.BATCH_STOCK_LINE.format(
+        ticker=item["ticker"], current_price=item["price"],
+        quant_snapshot=json.dumps(features) if features else "Not available")
+
+def _batch_prompt(items):
+    return prompts.BATCH_PROMPT.format(
+        count=len(items), stock_lines="".join(_stock_line(i) for i in items), ticker="<TICKER>")
+
+def _item_cost(item):
+    return llm_client.estimate_tokens(_stock_line(item)) + REPORT_OUTPUT_TOKENS
+
+def pack_batches(items, max_tokens=BATCH_MAX_TOKENS, max_tickers=BATCH_MAX_TICKERS):
+    """
+    Groups {"ticker", "price", "features"} items into request-sized lists.
+    Lazy: only pulls the next item when the current batch still has room.
+    """
+    base = llm_client.estimate_tokens(_batch_prompt([]))
+    batch, used = [], base
+    for item in items:
+        cost = _item_cost(item)
+        if batch and (used + cost > max_tokens or len(batch) >= max_tickers):
+            yield batch
+            batch, used = [], base
+        batch.append(item)
+        used += cost
+    if batch: yield batch
+
+def _valid_report(report):
+    return isinstance(report, dict) and report.get("ticker") and all(f in report for f in REQUIRED_FIELDS) \
+        and isinstance(report.get("execution"), dict)
+
+def parse_batch_response(text, tickers):
+    """Returns ({ticker: report}, [tickers without a usable report])."""
+    wanted = {_key(t): t for t in tickers}
+    reports = {}
+    try:
+        match = re.search(r'\[.*\]', text, re.DOTALL)
+        data = json.loads(match.group(0)) if match else json.loads(clean_json_text(text) or "null")
+        if isinstance(data, dict): data = data.get("reports", [data])
+        for report in data or []:
+            if not _valid_report(report): continue
+            ticker = wanted.get(_key(report["ticker"]))
+            if ticker and ticker not in reports:
+                report["ticker"] = ticker
+                reports[ticker] = report
+    except Exception as e:
+        print(f"   ❌ Batch JSON Error: {e}")
+    return reports, [t for t in tickers if t not in reports]
+
+def analyze_batch(items):
+    """One Gemini request for several tickers. Returns (reports, missing_tickers)."""
+    tickers = [i["ticker"] for i in items]
+    print(f"🤖 [JUNIOR] Analyzing batch of {len(items)} ({', '.join(tickers)}) using {MODEL_NAME}...")
+
+    try:
+        fingerprint = _fingerprint(prompts.BATCH_PROMPT, [(i["ticker"], i["price"], i.get("features")) for i in items])
+        text = llm_client.generate(MODEL_NAME, _batch_prompt(items), agent="JUNIOR", fingerprint=fingerprint,
+                                   accept=lambda t: bool(parse_batch_response(t, tickers)[0]))
+    except llm_client.DailyQuotaExceeded as e:
+        print(f"   ⛔ {e}")
+        return {}, tickers
+    if not text: return {}, tickers
+
+    reports, missing = parse_batch_response(text, tickers)
+    if missing:
+        print(f"   ⚠️ Batch returned {len(reports)}/{len(tickers)} usable reports. Missing: {', '.join(missing)}")
+    return reports, missing
+
+# ==========================================================
+#  🔎 TRIAGE (cheap model screens before the Pro analyst)
+# ==========================================================
+# A fast model (GEMINI_TRIAGE_MODEL) screens candidates in large groups
+# with a compact ESCALATE/REJECT schema. Only escalated tickers reach the
+# full HEDGE_FUND_PROMPT analysis on the Pro model. Tickers the triage
+# could not screen (errors, quota, missing verdicts) escalate anyway, so a
+# triage outage never silently drops candidates.
+
+TRIAGE_MODEL = getattr(config, 'GEMINI_TRIAGE_MODEL', "gemini-2.0-flash").replace("models/", "")
+TRIAGE_MIN_SCORE = getattr(config, 'JUNIOR_TRIAGE_MIN_SCORE', 40)
+TRIAGE_BATCH_SIZE = getattr(config, 'JUNIOR_TRIAGE_BATCH_SIZE', 20)
+TRIAGE_SEARCH = getattr(config, 'JUNIOR_TRIAGE_SEARCH', False)
+
+triage_stats = {"screened": 0, "escalated": 0, "rejected": 0, "unscreened": 0, "requests": 0}
+
+def reset_triage_stats():
+    """Call at the start of each pipeline run (the counters are per run)."""
+    triage_stats.update({"screened": 0, "escalated": 0, "rejected": 0, "unscreened": 0, "requests": 0})
+
+def _triage_prompt(items):
+    return prompts.TRIAGE_PROMPT.format(count=len(items), stock_lines="".join(_stock_line(i) for i in items))
+
+def parse_triage_response(text, tickers):
+    """Returns ({ticker: {"verdict", "score", "reason"}}, [tickers without a verdict])."""
+    wanted = {_key(t): t for t in tickers}
+    verdicts = {}
+    try:
+        match = re.search(r'\[.*\]', text, re.DOTALL)
+        for row in json.loads(match.group(0)) if match else []:
+            if not isinstance(row, dict): continue
+            ticker = wanted.get(_key(row.get("ticker", "")))
+            verdict = str(row.get("verdict", "")).upper()
+            if not ticker or ticker in verdicts or verdict not in ("ESCALATE", "REJECT"): continue
+            try: score = float(row.get("score", 0))
+            except (TypeError, ValueError): score = 0.0
+            verdicts[ticker] = {"verdict": verdict, "score": score, "reason": row.get("reason", "")}
+    except Exception as e:
+        print(f"   ❌ Triage JSON Error: {e}")
+    return verdicts, [t for t in tickers if t not in verdicts]
+
+def triage_batch(items):
+    """One cheap request screening several tickers. Returns (verdicts, unscreened_tickers)."""
+    tickers = [i["ticker"] for i in items]
+    print(f"🔎 [TRIAGE] Screening {len(items)} tickers using {TRIAGE_MODEL}...")
+
+    try:
+        fingerprint = _fingerprint(prompts.TRIAGE_PROMPT, [(i["ticker"], i["price"], i.get("features")) for i in items])
+        triage_stats["requests"] += 1
+        text = llm_client.generate(TRIAGE_MODEL, _triage_prompt(items), agent="TRIAGE", search=TRIAGE_SEARCH,
+                                   fingerprint=fingerprint, accept=lambda t: bool(parse_triage_response(t, tickers)[0]))
+    except llm_client.DailyQuotaExceeded as e:
+        print(f"   ⛔ {e}")
+        return {}, tickers
+    if not text: return {}, tickers
+    return parse_triage_response(text, tickers)
+
+def _passes(verdict):
+    return verdict["verdict"] == "ESCALATE" and verdict["score"] >= TRIAGE_MIN_SCORE
+
+def triage_stream(items, batch_size=TRIAGE_BATCH_SIZE):
+    """
+    Lazily screens {"ticker", "price", "features"} items in groups of
+    batch_size and yields only the ones worth a Pro analysis.
+    """
+    stream = iter(items)
+    while True:
+        batch = [item for _, item in zip(range(batch_size), stream)]
+        if not batch: return
+
+        verdicts, unscreened = triage_batch(batch)
+        triage_stats["screened"] += len(verdicts)
+        triage_stats["unscreened"] += len(unscreened)
+        if unscreened:
+            print(f"   ⚠️ [TRIAGE] No verdict for {', '.join(unscreened)}. Escalating them unscreened.")
+
+        for item in batch:
+            verdict = verdicts.get(item["ticker"])
+            if verdict is None or _passes(verdict):
+                triage_stats["escalated"] += 1
+                if verdict: print(f"   ⬆️ [TRIAGE] {item['ticker']} escalated ({verdict['score']:.0f}): {verdict['reason']}")
+                yield item
+            else:
+                triage_stats["rejected"] += 1
+                print(f"   ⬇️ [TRIAGE] {item['ticker']} rejected ({verdict['score']:.0f}): {verdict['reason']}")
+
+def log_triage_summary():
+    s = triage_stats
+    escalation_rate = s["escalated"] / max(1, s["escalated"] + s["rejected"]) * 100
+    print(f"🔎 [TRIAGE] {s['requests']} requests on {TRIAGE_MODEL}: {s['screened']} screened, "
+          f"{s['escalated']} escalated ({escalation_rate:.0f}%), {s['rejected']} rejected, {s['unscreened']} unscreened.")
@@ -1,135 +1,131 @@
-import gspread
-from google.oauth2.service_account import Credentials
 from datetime import datetime
-import os
-import json
 import config
-import time
+import lib.gvqm_change_detection as change_detection
+import lib.gvqm_sheet_mirror as sheet_mirror
+import lib.gvqm_sheet_writer as sheet_writer
+import lib.gvqm_sheets_session as sheets_session
+import lib.gvqm_sheet_query as sheet_query
 
 SHEET_NAME = getattr(config, 'GOOGLE_SHEET_NAME', "TradingBot_History")
 
-SCOPES = [
-    'https://www.googleapis.com/auth/spreadsheets',
-    'https://www.googleapis.com/auth/drive'
-]
-
 def get_client():
-    creds_json = os.getenv("GOOGLE_SHEETS_CREDENTIALS")
-    if not creds_json:
-						
-        if os.path.exists("google_credentials.json"):
-            try:
-                creds_json = open("google_credentials.json").read()
-            except: return None
-   
-        else: return None
-            
-    try:
-        creds_dict = json.loads(creds_json)
-		  
-        creds = Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
-        return gspread.authorize(creds)
-    except Exception as e:
-        print(f"⚠️ [JUNIOR HISTORY] Auth Error: {e}")
-        return None
+    """The shared, process-wide Sheets client (kept for existing callers)."""
+    return sheets_session.get_client()
 
-def log_report(ticker, analysis):
-    # --- RETRY LOOP ---
-    for attempt in range(3):
-        try:
-            client = get_client()
-            if not client: return
+REPORT_HEADERS = [
+    "Date", "Ticker", "Sector", "Action", "Score", 
+    "Status", "Status_Reason", 
+    "Valuation", "Valuation_Reason", 
+    "Rebound", "Rebound_Reason", 
+    "Catalyst", 
+    "Buy_Limit", "Take_Profit", "Stop_Loss",
+    "Intel"
+]
 
-            sh = client.open(SHEET_NAME)
-            sheet = sh.sheet1
-            
-            # --- DEBUG: PRINT URL ---
-            # This tells us EXACTLY where the data is going
-            if attempt == 0:
-                print(f"   📝 Writing to Sheet: {sh.title} (ID: {sh.id})")
-                print(f"   🔗 URL: https://docs.google.com/spreadsheets/d/{sh.id}")
+def log_report(ticker, analysis):
+    """Queues the report row; the batched writer appends it (headers added on an empty sheet)."""
+    exec_plan = analysis.get('execution', {})
+    row = [
+        datetime.now().strftime("%Y-%m-%d %H:%M"),
+        ticker, 
+        analysis.get('sector'), 
+        analysis.get('action'), 
+        analysis.get('conviction_score'),
+        analysis.get('status'), 
+        analysis.get('status_rationale'),
+        analysis.get('valuation'), 
+        analysis.get('valuation_rationale'),
+        analysis.get('rebound_potential'), 
+        analysis.get('rebound_rationale'),
+        analysis.get('catalyst'),
+        exec_plan.get('buy_limit', 0), 
+        exec_plan.get('take_profit', 0), 
+        exec_plan.get('stop_loss', 0),
+        analysis.get('intel')
+    ]
+    sheet_writer.append(sheet_mirror.REPORTS, row, headers=REPORT_HEADERS)
+    print(f"✅ [JUNIOR] Report filed for {ticker}.")
 
-            # --- CLEAN HEADERS (16 Columns) ---
-            if sheet.row_count < 1 or not sheet.row_values(1):
-                 headers = [
-                     "Date", "Ticker", "Sector", "Action", "Score", 
-                     "Status", "Status_Reason", 
-                     "Valuation", "Valuation_Reason", 
-                     "Rebound", "Rebound_Reason", 
-                     "Catalyst", 
-                     "Buy_Limit", "Take_Profit", "Stop_Loss",
-                     "Intel"
-                 ]
-                 sheet.append_row(headers)
+def _load_history_map():
+    """Returns {ticker: last report date string}, or None if the sheet is unreachable."""
+    try:
+        if sheet_mirror.refresh(sheet_mirror.REPORTS):
+            latest = sheet_mirror.latest_by_ticker(sheet_mirror.REPORTS)
+            return {ticker: row.get('Date', '') for ticker, row in latest.items()}
+    except Exception as e:
+        print(f"⚠️ History Mirror Error: {e}")
 
-            exec_plan = analysis.get('execution', {})
-            
-													   
-            row = [
-                datetime.now().strftime("%Y-%m-%d %H:%M"),
-                ticker, 
-                analysis.get('sector'), 
-                analysis.get('action'), 
-                analysis.get('conviction_score'),
-                analysis.get('status'), 
-                analysis.get('status_rationale'),
-                analysis.get('valuation'), 
-                analysis.get('valuation_rationale'),
-                analysis.get('rebound_potential'), 
-                analysis.get('rebound_rationale'),
-                analysis.get('catalyst'),
-	
-			 
-                exec_plan.get('buy_limit', 0), 
-                exec_plan.get('take_profit', 0), 
-                exec_plan.get('stop_loss', 0),
-	
-                analysis.get('intel')
-            ]
-            sheet.append_row(row)
-            print(f"✅ [JUNIOR] Report filed for {ticker}.")
-            return # Success
+    # No usable mirror: read just the Date + Ticker columns straight from the sheet
+    try:
+        history_map = {}
+        for _, row in sheet_query.read_columns(sheet_mirror.REPORTS, ["Date", "Ticker"]):
+            if row["Ticker"]: history_map[row["Ticker"]] = row["Date"]
+        return history_map
+    except Exception as e:
+        print(f"⚠️ History Read Error: {e}")
+        return None
 
-        except Exception as e:
-            print(f"⚠️ Log Error (Attempt {attempt+1}/3): {e}")
-            time.sleep(5)
-            
-    print(f"❌ [JUNIOR] Failed to log {ticker} after 3 attempts.")
+def _is_cooling_down(ticker, history_map, now):
+    if ticker not in history_map: return False
+    try:
+        # Parse YYYY-MM-DD HH:MM
+        last_seen = datetime.strptime(history_map[ticker], "%Y-%m-%d %H:%M")
+        return (now - last_seen).days < config.COOLDOWN_DAYS
+    except: return False
 
 def filter_candidates(candidates, limit=20):
-    for attempt in range(3):
-        try:
-            client = get_client()
-            if not client: return candidates[:limit]
-
-            sheet = client.open(SHEET_NAME).sheet1
-            records = sheet.get_all_values()
-            
-            # No splitting needed anymore, using standard format
-            history_map = {}
-            for r in records[1:]:
-                if len(r) > 1:
-													   
-                    history_map[r[1]] = r[0]
-            break
-        except Exception as e:
-            print(f"⚠️ History Read Error (Attempt {attempt+1}/3): {e}")
-            time.sleep(5)
-            if attempt == 2: return candidates[:limit]
+    history_map = _load_history_map()
+    if history_map is None: return candidates[:limit]
 
     valid = []
     now = datetime.now()
     
     for t in candidates:
-        if t in history_map:
-            try:
-                # Parse YYYY-MM-DD HH:MM
-                last_seen = datetime.strptime(history_map[t], "%Y-%m-%d %H:%M")
-                if (now - last_seen).days < config.COOLDOWN_DAYS: 
-                    continue
-            except: pass
+        if _is_cooling_down(t, history_map, now): continue
         valid.append(t)
         if len(valid) >= limit: break
         
     print(f"✅ [HISTORY] Approved {len(valid)} fresh tickers for today.")
     return valid
+
+def _last_report_date(ticker, history_map):
+    try: return datetime.strptime(history_map[ticker], "%Y-%m-%d %H:%M")
+    except: return None
+
+def stream_fresh_candidates(candidate_stream, limit=20, reused=None):
+    """
+    Streaming variant of filter_candidates.
+    Consumes scanner items (ticker strings or dicts with a 'ticker' key) and
+    yields the ones worth analyzing as they arrive, up to `limit`.
+    Feature dicts go through change detection (re-analyze only on material
+    moves); bare tickers use the plain cooldown.
+    """
+    history_map = _load_history_map() or {}
+    now = datetime.now()
+    approved = reused_count = early = 0
+
+    for item in candidate_stream:
+        if isinstance(item, dict):
+            ticker = item.get('ticker')
+            last_date = _last_report_date(ticker, history_map)
+            analyze, reason = change_detection.assess(ticker, item, last_date, now)
+            if not analyze:
+                reused_count += 1
+                if reused is not None: reused.add(ticker)
+                continue
+            if last_date and (now - last_date).days < config.COOLDOWN_DAYS:
+                early += 1
+                print(f"   🔄 [HISTORY] {ticker}: re-analyzing inside cooldown ({reason}).")
+        else:
+            ticker = item
+            if _is_cooling_down(ticker, history_map, now): continue
+        approved += 1
+        yield item
+        if approved >= limit: break
+
+    print(f"✅ [HISTORY] Approved {approved} tickers for today ({early} early re-checks, {reused_count} unchanged reports reused).")
+
+def record_snapshot(ticker, price, features):
+    """Call after filing a report, so the next run can tell whether anything changed."""
+    try: change_detection.record(ticker, price, features)
+    except Exception as e: print(f"⚠️ [HISTORY] Snapshot save failed for {ticker}: {e}")
@@ -1,4 +1,5 @@
-HEDGE_FUND_PROMPT = """
+# Shared by the single-ticker and batch prompts
+ANALYST_BRIEFING = """
 ### ROLE: Junior Equity Analyst (Conservative Value Fund)
 **Reporting To:** Senior Portfolio Manager who doesn't like to take risk.
 
@@ -44,13 +45,9 @@ You must apply these three filters. If a stock fails any of them, your Manager w
 
 
 
-### TASK: Analyze {ticker}
-**Current Price:** ${current_price}
-
-Using real-time data from Google Search, produce a **Detailed Research Report** for the Manager.
-
+"""
 
-### DATA EXTRACTION RULES (Hard Facts Only)
+DATA_RULES = """### DATA EXTRACTION RULES (Hard Facts Only)
 For 'catalyst' and 'intel', do not give opinions. Give raw data.
 
 **A. CATALYST (Time-Based Facts):**
@@ -59,9 +56,10 @@ For 'catalyst' and 'intel', do not give opinions. Give raw data.
 **B. INTEL (Structural Facts):**
 * Any critical hard facts the manager must know before he makes a financial decision.
 
-### OUTPUT FORMAT (JSON ONLY)
-Return a single JSON object (no markdown):
-{{
+"""
+
+# Format template: doubled braces, {ticker} is filled in
+REPORT_SCHEMA = """{{
   "ticker": "{ticker}",
   "sector": "Technology/Healthcare/etc",
   
@@ -86,4 +84,57 @@ Return a single JSON object (no markdown):
       "stop_loss": 0.00
   }}
 }}
-"""
\ No newline at end of file
+"""
+
+HEDGE_FUND_PROMPT = ANALYST_BRIEFING + """### TASK: Analyze {ticker}
+**Current Price:** ${current_price}
+**Quant Snapshot (precomputed from our price data, trust these numbers):** {quant_snapshot}
+
+Using real-time data from Google Search, produce a **Detailed Research Report** for the Manager.
+
+
+""" + DATA_RULES + """### OUTPUT FORMAT (JSON ONLY)
+Return a single JSON object (no markdown):
+""" + REPORT_SCHEMA
+
+# --- BATCH MODE: several tickers per request, one JSON array back ---
+BATCH_STOCK_LINE = """* **{ticker}** | Current Price: ${current_price} | Quant Snapshot: {quant_snapshot}
+"""
+
+BATCH_PROMPT = ANALYST_BRIEFING + """### TASK: Analyze EACH of these {count} stocks independently
+(Quant Snapshots are precomputed from our price data, trust these numbers.)
+{stock_lines}
+Using real-time data from Google Search, produce a **Detailed Research Report** for the Manager for EVERY ticker above.
+Do not merge, skip or compare stocks. Each report must stand on its own.
+
+
+""" + DATA_RULES + """### OUTPUT FORMAT (JSON ONLY)
+Return a single JSON ARRAY (no markdown) with exactly {count} objects, one per ticker, in the order listed.
+Each object has exactly this shape (with its own ticker):
+[
+""" + REPORT_SCHEMA + """
+]
+"""
+
+# Cheap first pass (triage model): a quick screen, no research report.
+# Only ESCALATE verdicts go on to the full HEDGE_FUND_PROMPT analysis.
+TRIAGE_PROMPT = """
+### ROLE: Screening Assistant for a Conservative Value Fund
+You ONLY output valid JSON.
+
+Each stock below trades BELOW its 250-Day Moving Average. Do a FAST screen, not a research report.
+For each one decide whether it deserves a full analyst review:
+* **ESCALATE:** Plausibly a good business hit by temporary fear, a one-time issue, or a sector sell-off.
+* **REJECT:** Obvious value trap: bankruptcy or going-concern risk, fraud/accounting scandal, delisting,
+  massive dilution, or a structurally dying business.
+When in doubt, ESCALATE. The full review is where the real decision is made.
+
+### STOCKS ({count})
+(Quant Snapshots are precomputed from our price data, trust these numbers.)
+{stock_lines}
+### OUTPUT FORMAT (JSON ONLY)
+Return a single JSON ARRAY (no markdown) with exactly {count} objects, in the order listed:
+[
+  {{"ticker": "<TICKER>", "verdict": "ESCALATE or REJECT", "score": <0-100 likelihood this is a Fat Pitch>, "reason": "<max 15 words>"}}
+]
+"""
@@ -0,0 +1,83 @@
+import math
+import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import config
+import lib.gvqm_llm_client as llm_client
+
+# ==========================================================
+#  🏃 CONCURRENT JUNIOR ANALYSIS
+# ==========================================================
+# Keeps several Junior analyses in flight instead of one at a time. The
+# shared LLM client's token buckets still decide WHEN each request may go
+# out, so concurrency only fills the gaps while earlier calls are waiting
+# on Gemini. Candidates are pulled from the stream lazily (only as slots
+# free up) and every finished report is handed back on the calling thread
+# immediately, so Sheets writes stay single-threaded.
+
+EXPECTED_LATENCY_SECONDS = 60  # Grounded Pro calls take ~30-90s
+
+def log_runner(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [JUNIOR_RUNNER] {message}")
+
+def _label(job):
+    """A candidate dict, or a batch (list) of them."""
+    if isinstance(job, list): return ", ".join(str(j.get('ticker')) for j in job)
+    return job.get('ticker')
+
+def default_workers():
+    """
+    In-flight requests the RPM budget can sustain (Little's law: rate x latency),
+    capped by the HTTP pool. JUNIOR_CONCURRENCY overrides it.
+    """
+    configured = getattr(config, 'JUNIOR_CONCURRENCY', 0)
+    if configured: return configured
+    rpm = getattr(config, 'GEMINI_RPM_LIMIT', 15)
+    return max(1, min(llm_client.POOL_SIZE, math.ceil(rpm * EXPECTED_LATENCY_SECONDS / 60)))
+
+def run(candidates, analyze, on_result, max_workers=None, should_stop=None):
+    """
+    analyze(candidate) -> report or None (runs on a worker thread).
+    on_result(candidate, report, error) is called on THIS thread as each one finishes.
+    should_stop(in_flight_count) is checked before every new submission.
+    Returns (submitted, failed).
+    """
+    workers = max_workers or default_workers()
+    log_runner(f"Running Junior analysis with up to {workers} requests in flight...")
+
+    stream = iter(candidates)
+    in_flight = {}
+    submitted = failed = 0
+    exhausted = False
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            # Top up free slots
+            while not exhausted and len(in_flight) < workers:
+                if should_stop and should_stop(len(in_flight)):
+                    exhausted = True
+                    break
+                candidate = next(stream, None)
+                if candidate is None:
+                    exhausted = True
+                    break
+                in_flight[pool.submit(analyze, candidate)] = candidate
+                submitted += 1
+
+            if not in_flight: break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for fut in done:
+                candidate = in_flight.pop(fut)
+                try:
+                    report, error = fut.result(), None
+                except Exception as e:
+                    report, error = None, e
+                    failed += 1
+                    log_runner(f"❌ {_label(candidate)} failed: {e}")
+                try:
+                    on_result(candidate, report, error)
+                except Exception as e:
+                    log_runner(f"⚠️ Result handler failed for {_label(candidate)}: {e}")
+
+    return submitted, failed
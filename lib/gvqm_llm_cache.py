@@ -0,0 +1,124 @@
+import os
+import json
+import math
+import time
+import hashlib
+import datetime
+import threading
+import config
+
+# ==========================================================
+#  💾 ON-DISK LLM RESPONSE CACHE
+# ==========================================================
+# Content-addressed: one JSON file per response, named by
+# sha256(model + day + fingerprint). The fingerprint is the prompt, or a
+# caller-supplied stand-in with volatile numbers bucketed (see
+# bucket_numbers) so a re-run an hour later still hits.
+# Entries expire after LLM_CACHE_TTL_HOURS; when the directory grows past
+# LLM_CACHE_MAX_MB the least recently used files are evicted.
+
+ENABLED = getattr(config, 'LLM_CACHE_ENABLED', True)
+CACHE_DIR = getattr(config, 'LLM_CACHE_DIR', "data/llm_cache")
+TTL_HOURS = getattr(config, 'LLM_CACHE_TTL_HOURS', 20)
+MAX_BYTES = getattr(config, 'LLM_CACHE_MAX_MB', 50) * 1024 * 1024
+PRICE_BUCKET_PCT = 1.0  # Prices within ~1% of each other share a bucket
+
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+def log_cache(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [LLM_CACHE] {message}")
+
+# --- KEYS ---
+def price_bucket(value):
+    """
+    Log-spaced bucket index: 100.0 and 100.4 match, 100 and 103 don't.
+    Negative values (e.g. % changes) bucket by magnitude with their sign kept;
+    0 is its own bucket.
+    """
+    value = float(value)
+    if value == 0 or math.isnan(value): return 0
+    if math.isinf(value): return str(value)
+    index = round(math.log(abs(value)) / math.log(1 + PRICE_BUCKET_PCT / 100))
+    return f"{'-' if value < 0 else '+'}{index}"
+
+def bucket_numbers(obj):
+    """Copy of a JSON-like structure with every number replaced by its price bucket."""
+    if isinstance(obj, bool) or obj is None: return obj
+    if isinstance(obj, (int, float)): return price_bucket(obj)
+    if isinstance(obj, dict): return {k: bucket_numbers(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)): return [bucket_numbers(v) for v in obj]
+    return obj
+
+def make_key(model, fingerprint):
+    day = datetime.date.today().isoformat()
+    raw = f"{model}\n{day}\n{fingerprint}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _path(key):
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+# --- READ / WRITE ---
+def get(key):
+    """Cached response text, or None (missing, expired or unreadable)."""
+    if not ENABLED: return None
+    path = _path(key)
+    try:
+        with open(path) as f:
+            entry = json.load(f)
+        if time.time() - entry["stored_at"] > TTL_HOURS * 3600:
+            os.remove(path)
+            raise FileNotFoundError
+        os.utime(path)  # Recently used = evicted last
+        with _lock: stats["hits"] += 1
+        return entry["text"]
+    except (OSError, ValueError, KeyError):
+        with _lock: stats["misses"] += 1
+        return None
+
+def put(key, text, model=None, agent=None):
+    if not ENABLED or not text: return
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = _path(key) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"stored_at": time.time(), "model": model, "agent": agent, "text": text}, f)
+    os.replace(tmp_path, _path(key))
+    with _lock: stats["stores"] += 1
+    _evict()
+
+def _evict():
+    """Drops expired entries, then least-recently-used ones until under MAX_BYTES."""
+    with _lock:
+        try:
+            entries = []
+            for name in os.listdir(CACHE_DIR):
+                if not name.endswith(".json"): continue
+                path = os.path.join(CACHE_DIR, name)
+                st = os.stat(path)
+                entries.append((st.st_mtime, st.st_size, path))
+        except OSError:
+            return
+
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in sorted(entries):
+            expired = now - mtime > TTL_HOURS * 3600
+            if not expired and total <= MAX_BYTES: break
+            try:
+                os.remove(path)
+                total -= size
+                stats["evictions"] += 1
+            except OSError:
+                pass
+
+def reset_stats():
+    with _lock: stats.update({"hits": 0, "misses": 0, "stores": 0, "evictions": 0})
+
+def clear():
+    with _lock:
+        if os.path.isdir(CACHE_DIR):
+            for name in os.listdir(CACHE_DIR):
+                try: os.remove(os.path.join(CACHE_DIR, name))
+                except OSError: pass
+    reset_stats()
@@ -0,0 +1,253 @@
+import os
+import re
+import json
+import time
+import datetime
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from zoneinfo import ZoneInfo
+import config
+import lib.gvqm_rate_limiter as rate_limiter
+import lib.gvqm_llm_cache as llm_cache
+
+# ==========================================================
+#  🧠 SHARED GEMINI CLIENT
+# ==========================================================
+# One place for every generateContent call (Junior + Senior):
+#   - pooled HTTP session (keep-alive, no TLS handshake per call)
+#   - token buckets enforcing GEMINI_RPM_LIMIT and GEMINI_TPM_LIMIT
+#   - a persisted daily ledger enforcing GEMINI_DAILY_LIMIT
+#     (Gemini quotas reset at midnight Pacific)
+#   - models listed in GEMINI_MODEL_LIMITS (e.g. the Flash triage model)
+#     get their own buckets + ledger entry, since Google meters them separately
+#   - 429/503 backoff that honours Retry-After / RetryInfo when given
+#   - per-call latency + token metrics
+
+API_KEY = config.GEMINI_API_KEY
+BASE_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+MAX_RETRIES = 3
+REQUEST_TIMEOUT = getattr(config, 'GEMINI_TIMEOUT_SECONDS', 300)
+POOL_SIZE = getattr(config, 'GEMINI_POOL_SIZE', 8)
+LEDGER_PATH = getattr(config, 'GEMINI_QUOTA_LEDGER_PATH', "data/gemini_quota.json")
+DAILY_LIMIT = getattr(config, 'GEMINI_DAILY_LIMIT', 50)
+MODEL_LIMITS = getattr(config, 'GEMINI_MODEL_LIMITS', {})  # {model: {"rpm", "tpm", "daily"}}
+CHARS_PER_TOKEN = 4  # Rough estimate, corrected with usageMetadata after each call
+QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+
+SAFETY_SETTINGS = [
+    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"}
+]
+
+class DailyQuotaExceeded(Exception):
+    pass
+
+def log_llm(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [LLM_CLIENT] {message}")
+
+# --- SHARED STATE ---
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE))
+
+request_bucket = rate_limiter.TokenBucket(getattr(config, 'GEMINI_RPM_LIMIT', 15), 60)
+token_bucket = rate_limiter.TokenBucket(getattr(config, 'GEMINI_TPM_LIMIT', 1_000_000), 60)
+_buckets = {"default": (request_bucket, token_bucket)}
+for _model, _limits in MODEL_LIMITS.items():
+    _buckets[_model] = (rate_limiter.TokenBucket(_limits.get("rpm", 15), 60),
+                        rate_limiter.TokenBucket(_limits.get("tpm", 1_000_000), 60))
+
+_ledger_lock = threading.Lock()
+_metrics_lock = threading.Lock()
+metrics = []  # One dict per HTTP call
+
+def estimate_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+def _group(model):
+    """Quota group of a model: its own entry in MODEL_LIMITS, else the shared default."""
+    model = (model or "").replace("models/", "")
+    return model if model in MODEL_LIMITS else "default"
+
+def _daily_limit(group):
+    if group == "default": return DAILY_LIMIT
+    return MODEL_LIMITS[group].get("daily", DAILY_LIMIT)
+
+# --- DAILY QUOTA LEDGER ---
+def _today():
+    return datetime.datetime.now(QUOTA_TZ).date().isoformat()
+
+def _load_ledger():
+    try:
+        with open(LEDGER_PATH) as f:
+            ledger = json.load(f)
+        if ledger.get("date") == _today(): return ledger
+    except (OSError, ValueError):
+        pass
+    return {"date": _today(), "requests": 0, "tokens": 0}
+
+def _save_ledger(ledger):
+    os.makedirs(os.path.dirname(LEDGER_PATH) or ".", exist_ok=True)
+    tmp_path = LEDGER_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(ledger, f)
+    os.replace(tmp_path, LEDGER_PATH)
+
+def _counters(ledger, group):
+    """The default group lives at the top level (original ledger layout), others under "models"."""
+    if group == "default": return ledger
+    return ledger.setdefault("models", {}).setdefault(group, {"requests": 0, "tokens": 0})
+
+def quota_remaining(model=None):
+    """Requests left today for `model`'s quota group (default: the shared Pro budget)."""
+    group = _group(model)
+    with _ledger_lock:
+        return max(0, _daily_limit(group) - _counters(_load_ledger(), group)["requests"])
+
+def _reserve_request(group="default"):
+    """Books one request against today's quota (raises when exhausted)."""
+    limit = _daily_limit(group)
+    with _ledger_lock:
+        ledger = _load_ledger()
+        counters = _counters(ledger, group)
+        if counters["requests"] >= limit:
+            name = "Gemini" if group == "default" else group
+            raise DailyQuotaExceeded(f"Daily {name} quota used up ({counters['requests']}/{limit}).")
+        counters["requests"] += 1
+        _save_ledger(ledger)
+
+def _record_tokens(tokens, group="default"):
+    with _ledger_lock:
+        ledger = _load_ledger()
+        _counters(ledger, group)["tokens"] += tokens
+        _save_ledger(ledger)
+
+# --- BACKOFF ---
+def _retry_after(response, attempt):
+    """Seconds to wait on 429/503: Retry-After header, then RetryInfo in the body, then linear backoff."""
+    header = response.headers.get("Retry-After")
+    if header:
+        try: return float(header)
+        except ValueError: pass
+    try:
+        for detail in response.json().get("error", {}).get("details", []):
+            delay = detail.get("retryDelay")
+            if delay:
+                match = re.match(r"([\d.]+)s", delay)
+                if match: return float(match.group(1))
+    except Exception:
+        pass
+    return (attempt + 1) * 10
+
+# --- METRICS ---
+def _record(entry):
+    with _metrics_lock: metrics.append(entry)
+
+def reset_metrics():
+    """Call at the start of each pipeline run (metrics and cache counters are per run)."""
+    with _metrics_lock: metrics.clear()
+    llm_cache.reset_stats()
+
+def summary():
+    with _metrics_lock:
+        calls = list(metrics)
+    ok = [m for m in calls if m["status"] == 200]
+    return {
+        "calls": len(calls),
+        "ok": len(ok),
+        "prompt_tokens": sum(m["prompt_tokens"] for m in ok),
+        "output_tokens": sum(m["output_tokens"] for m in ok),
+        "latency_seconds": round(sum(m["latency"] for m in calls), 2),
+        "throttled_seconds": round(sum(m["throttled"] for m in calls), 2),
+        "quota_remaining": quota_remaining(),
+    }
+
+def log_summary():
+    s = summary()
+    log_llm(f"📊 {s['calls']} calls ({s['ok']} ok) | tokens in/out {s['prompt_tokens']}/{s['output_tokens']} | "
+            f"{s['latency_seconds']}s in API, {s['throttled_seconds']}s throttled | {s['quota_remaining']} requests left today")
+    with _metrics_lock:
+        models = [m["model"] for m in metrics]
+    for group in MODEL_LIMITS:
+        calls = models.count(group)
+        if calls: log_llm(f"📊 {group}: {calls} calls | {quota_remaining(group)} requests left today")
+    c = llm_cache.stats
+    log_llm(f"💾 Response cache: {c['hits']} hits, {c['misses']} misses, {c['stores']} stored, {c['evictions']} evicted.")
+
+# --- MAIN ENTRY POINT ---
+def generate(model, prompt, agent="LLM", search=True, fingerprint=None, accept=None):
+    """
+    Sends one prompt to `model` and returns the response text (None on failure).
+    Blocks as needed to stay within RPM/TPM; raises DailyQuotaExceeded when
+    today's request budget is spent.
+    Responses are served from / stored in the on-disk cache under
+    `fingerprint` (default: the prompt itself); accept(text) decides whether
+    a fresh response is good enough to cache.
+    """
+    model = model.replace("models/", "")
+    cache_key = llm_cache.make_key(model, fingerprint or prompt)
+    cached = llm_cache.get(cache_key)
+    if cached is not None:
+        log_llm(f"💾 [{agent}] Cache hit ({cache_key[:10]}). No quota used.")
+        return cached
+
+    payload = {"contents": [{"parts": [{"text": prompt}]}], "safetySettings": SAFETY_SETTINGS}
+    if search: payload["tools"] = [{"googleSearch": {}}]
+    body = json.dumps(payload)
+    estimated = estimate_tokens(prompt)
+    group = _group(model)
+    requests_bucket, tokens_bucket = _buckets[group]
+
+    _reserve_request(group)  # Once per logical call: 429 / connection retries aren't charged again
+    for attempt in range(MAX_RETRIES):
+        throttled = requests_bucket.acquire() + tokens_bucket.acquire(estimated)
+
+        start = time.time()
+        try:
+            response = _session.post(BASE_URL.format(model=model), params={"key": API_KEY},
+                                     headers={'Content-Type': 'application/json'}, data=body, timeout=REQUEST_TIMEOUT)
+        except Exception as e:
+            _record({"agent": agent, "model": model, "status": None, "latency": time.time() - start,
+                     "throttled": throttled, "prompt_tokens": 0, "output_tokens": 0})
+            log_llm(f"❌ [{agent}] Connection Error (attempt {attempt+1}/{MAX_RETRIES}): {e}")
+            continue
+        latency = time.time() - start
+
+        entry = {"agent": agent, "model": model, "status": response.status_code, "latency": latency,
+                 "throttled": throttled, "prompt_tokens": 0, "output_tokens": 0}
+
+        if response.status_code == 200:
+            result = response.json()
+            usage = result.get("usageMetadata", {})
+            entry["prompt_tokens"] = usage.get("promptTokenCount", estimated)
+            entry["output_tokens"] = usage.get("candidatesTokenCount", 0)
+            _record(entry)
+
+            # Charge what the call really cost beyond the estimate we reserved
+            actual = usage.get("totalTokenCount", entry["prompt_tokens"] + entry["output_tokens"])
+            if actual > estimated: tokens_bucket.consume(actual - estimated)
+            _record_tokens(actual, group)
+            log_llm(f"[{agent}] {model} answered in {latency:.1f}s ({entry['prompt_tokens']} in / {entry['output_tokens']} out tokens, waited {throttled:.1f}s).")
+
+            candidates = result.get("candidates", [])
+            if not candidates: return None
+            parts = candidates[0].get("content", {}).get("parts", [])
+            text = "".join(p.get("text", "") for p in parts)
+            if text and (accept is None or accept(text)):
+                llm_cache.put(cache_key, text, model=model, agent=agent)
+            return text or None
+
+        _record(entry)
+        if response.status_code in [429, 503]:
+            wait = _retry_after(response, attempt)
+            log_llm(f"⚠️ [{agent}] API Busy ({response.status_code}). Retrying in {wait:.1f}s...")
+            time.sleep(wait)
+            continue
+
+        log_llm(f"❌ [{agent}] API Error {response.status_code}: {response.text[:300]}")
+        return None
+
+    return None
@@ -0,0 +1,128 @@
+import time
+import datetime
+import threading
+import config
+import pandas as pd
+from alpaca.data.requests import StockLatestTradeRequest, StockBarsRequest
+from alpaca.data.timeframe import TimeFrame
+import lib.gvqm_price_store as price_store
+import lib.gvqm_indicators as indicators
+import lib.gvqm_universe as universe
+
+# ==========================================================
+#  💹 RUN-SCOPED MARKET DATA CACHE
+# ==========================================================
+# One multi-symbol latest-trade request (chunked) replaces hundreds of
+# single-symbol calls. Later lookups within QUOTE_TTL_SECONDS are served
+# from memory. Symbols are expected in Alpaca format (BRK.B).
+
+QUOTE_TTL_SECONDS = getattr(config, 'QUOTE_TTL_SECONDS', 60)
+QUOTE_CHUNK_SIZE = 200
+BARS_CHUNK_SIZE = 100
+STORE_MAX_AGE_DAYS = 4  # Older than this (weekend + holiday) = the store is stale for that ticker
+
+def log_market_data(message):
+    if getattr(config, 'DEBUG_MODE', False):
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] [MARKET_DATA] {message}")
+
+class QuoteCache:
+    def __init__(self, data_client, ttl=QUOTE_TTL_SECONDS):
+        self.data_client = data_client
+        self.ttl = ttl
+        self._prices = {}  # symbol -> (price, fetched_at)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "hits": 0, "misses": 0}
+
+    def _is_fresh(self, symbol, now, max_age=None):
+        entry = self._prices.get(symbol)
+        return entry is not None and now - entry[1] < (self.ttl if max_age is None else max_age)
+
+    def prefetch(self, symbols):
+        """Fetches every stale/unknown symbol with chunked multi-symbol requests."""
+        now = time.time()
+        with self._lock:
+            wanted = sorted({s for s in symbols if s and not self._is_fresh(s, now)})
+        for i in range(0, len(wanted), QUOTE_CHUNK_SIZE):
+            chunk = wanted[i:i + QUOTE_CHUNK_SIZE]
+            try:
+                self.stats["requests"] += 1
+                trades = self.data_client.get_stock_latest_trade(StockLatestTradeRequest(symbol_or_symbols=chunk))
+            except Exception as e:
+                log_market_data(f"⚠️ Latest-trade batch of {len(chunk)} failed: {e}")
+                continue
+            fetched_at = time.time()
+            with self._lock:
+                for symbol, trade in trades.items():
+                    self._prices[symbol] = (float(trade.price), fetched_at)
+        log_market_data(f"Prefetched {len(wanted)} quotes in {-(-len(wanted) // QUOTE_CHUNK_SIZE)} requests.")
+
+    def get(self, symbol, max_age=None):
+        """
+        Latest trade price, or None when the broker has no quote for the symbol.
+        max_age overrides the TTL for callers that tolerate older quotes.
+        """
+        with self._lock:
+            if self._is_fresh(symbol, time.time(), max_age):
+                self.stats["hits"] += 1
+                return self._prices[symbol][0]
+        self.stats["misses"] += 1
+        self.prefetch([symbol])
+        entry = self._prices.get(symbol)
+        return entry[0] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._prices.clear()
+            self.stats = {"requests": 0, "hits": 0, "misses": 0}
+
+# ==========================================================
+#  📏 SHARED SMA SERVICE
+# ==========================================================
+def _sma_from_store(symbols, window):
+    """SMAs from the scanner's local price store, for symbols with a recent last bar."""
+    yahoo = {universe.to_yahoo(s): s for s in symbols}
+    close = price_store.get_field("Close", list(yahoo))
+    if close.empty: return {}
+    cutoff = pd.Timestamp(datetime.date.today() - datetime.timedelta(days=STORE_MAX_AGE_DAYS))
+    last_dates = close.apply(lambda col: col.last_valid_index())
+    fresh_cols = [t for t in close.columns if last_dates[t] is not None and last_dates[t] >= cutoff]
+    smas = indicators.sma_last(close[fresh_cols], window)
+    return {yahoo[t]: float(v) for t, v in smas.items() if pd.notna(v)}
+
+def _sma_from_bars(data_client, symbols, window):
+    """SMAs from chunked multi-symbol daily bars requests."""
+    result = {}
+    start_dt = datetime.datetime.now() - datetime.timedelta(days=window * 2)
+    for i in range(0, len(symbols), BARS_CHUNK_SIZE):
+        chunk = symbols[i:i + BARS_CHUNK_SIZE]
+        try:
+            req = StockBarsRequest(symbol_or_symbols=chunk, timeframe=TimeFrame.Day, start=start_dt)
+            bars = data_client.get_stock_bars(req).data
+        except Exception as e:
+            log_market_data(f"⚠️ Bars batch of {len(chunk)} failed: {e}")
+            continue
+        for symbol in chunk:
+            closes = [b.close for b in bars.get(symbol, [])]
+            if len(closes) >= window:
+                result[symbol] = float(sum(closes[-window:]) / window)
+    return result
+
+def get_sma_many(data_client, symbols, window=250):
+    """
+    Returns {symbol: SMA or None} (Alpaca-format symbols).
+    Served from the local price store when it is current; only the leftovers
+    cost a (batched) broker bars request.
+    """
+    symbols = sorted({s for s in symbols if s})
+    smas = {}
+    try:
+        smas.update(_sma_from_store(symbols, window))
+    except Exception as e:
+        log_market_data(f"⚠️ Price store unavailable for SMA: {e}")
+
+    leftovers = [s for s in symbols if s not in smas]
+    if leftovers:
+        smas.update(_sma_from_bars(data_client, leftovers, window))
+    log_market_data(f"SMA({window}) for {len(symbols)} symbols: {len(symbols) - len(leftovers)} from store, {len(leftovers)} via bars.")
+    return {s: smas.get(s) for s in symbols}
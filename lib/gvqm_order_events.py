@@ -0,0 +1,144 @@
+import time
+import datetime
+import threading
+import config
+
+# ==========================================================
+#  📡 ORDER CONFIRMATION (trade-updates stream + adaptive polling)
+# ==========================================================
+# Replaces fixed sleeps after broker writes. Callers describe WHAT they are
+# waiting for with a check function; wait_until() re-runs it whenever a
+# trade update arrives for the symbol, and otherwise on an adaptive backoff
+# (fast first probe, slower later) until a hard deadline. Without a stream
+# it degrades to plain backoff polling, so it is always safe to call.
+#
+# Event sources are pluggable: AlpacaTradeStream for production,
+# FakeTradeUpdates to drive confirmations locally in tests/simulations.
+
+INITIAL_POLL_SECONDS = 0.25
+MAX_POLL_SECONDS = 2.0
+POLL_BACKOFF = 1.6
+CONFIRM_TIMEOUT = getattr(config, 'ORDER_CONFIRM_TIMEOUT', 5)
+TERMINAL_STATUSES = ['canceled', 'expired', 'rejected', 'filled', 'replaced', 'done_for_day']
+CANCELLED_STATUSES = ['canceled', 'expired', 'rejected']  # Gone without trading: safe to resubmit
+
+def log_events(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [ORDER_EVENTS] {message}")
+
+def status_of(order):
+    status = getattr(order, 'status', None)
+    return status.value if hasattr(status, 'value') else str(status)
+
+class OrderEventHub:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._symbol_seq = {}     # symbol -> seq of its latest event
+        self._order_status = {}   # order_id -> latest status seen on the stream
+        self.source = None
+
+    def publish(self, symbol, order_id, event, status):
+        with self._cond:
+            self._seq += 1
+            self._symbol_seq[symbol] = self._seq
+            if order_id: self._order_status[str(order_id)] = status
+            self._cond.notify_all()
+
+    def last_status(self, order_id):
+        with self._cond: return self._order_status.get(str(order_id))
+
+    def wait_until(self, symbol, check, timeout=CONFIRM_TIMEOUT, label=None):
+        """
+        Returns True as soon as check() is truthy, False at the deadline.
+        check() is re-evaluated on every trade update for `symbol` and on
+        an adaptive polling schedule in between.
+        """
+        start = time.time()
+        deadline = start + timeout
+        interval = INITIAL_POLL_SECONDS
+        probes = 0
+        while True:
+            with self._cond: seen = self._symbol_seq.get(symbol, 0)
+            probes += 1
+            try: ok = check()
+            except Exception: ok = False
+            if ok:
+                if label: log_events(f"✅ {symbol}: {label} confirmed in {time.time() - start:.2f}s ({probes} probes).")
+                return True
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                if label: log_events(f"⏰ {symbol}: {label} NOT confirmed after {timeout}s ({probes} probes).")
+                return False
+            with self._cond:
+                self._cond.wait_for(lambda: self._symbol_seq.get(symbol, 0) != seen, timeout=min(interval, remaining))
+            interval = min(interval * POLL_BACKOFF, MAX_POLL_SECONDS)
+
+# --- EVENT SOURCES ---
+class AlpacaTradeStream:
+    """Feeds Alpaca's trade_updates websocket into the hub (daemon thread)."""
+    def __init__(self, api_key, secret_key, paper=True):
+        self.api_key, self.secret_key, self.paper = api_key, secret_key, paper
+
+    def start(self, hub):
+        from alpaca.trading.stream import TradingStream
+        stream = TradingStream(self.api_key, self.secret_key, paper=self.paper)
+
+        async def on_update(data):
+            order = data.order
+            event = data.event.value if hasattr(data.event, 'value') else str(data.event)
+            hub.publish(order.symbol, order.id, event, status_of(order))
+
+        stream.subscribe_trade_updates(on_update)
+        threading.Thread(target=stream.run, name="alpaca-trade-updates", daemon=True).start()
+
+class FakeTradeUpdates:
+    """Local stand-in for the stream: call emit() to deliver an update."""
+    def start(self, hub):
+        self.hub = hub
+
+    def emit(self, symbol, order_id, event, status):
+        self.hub.publish(symbol, order_id, event, status)
+
+# --- PROCESS-WIDE HUB ---
+hub = OrderEventHub()
+_start_lock = threading.Lock()
+
+def use_source(source):
+    """Attaches an event source (once). Failures fall back to polling-only."""
+    with _start_lock:
+        if hub.source is not None: return hub.source
+        try:
+            source.start(hub)
+            hub.source = source
+            log_events(f"Listening for trade updates via {type(source).__name__}.")
+        except Exception as e:
+            log_events(f"⚠️ Trade-update stream unavailable ({e}). Using polling only.")
+        return hub.source
+
+def ensure_stream():
+    """Starts the Alpaca trade-updates stream on first use (if enabled in config)."""
+    if hub.source is None and getattr(config, 'ORDER_EVENTS_STREAM', True):
+        use_source(AlpacaTradeStream(config.ALPACA_KEY_ID, config.ALPACA_SECRET_KEY, paper=True))
+
+def wait_until(symbol, check, timeout=CONFIRM_TIMEOUT, label=None):
+    return hub.wait_until(symbol, check, timeout=timeout, label=label)
+
+def wait_for_order_terminal(client, symbol, order_id, timeout=CONFIRM_TIMEOUT):
+    """Waits until an order is no longer live. Returns its final status (or None on timeout)."""
+    final = {}
+    def check():
+        status = hub.last_status(order_id)
+        if status not in TERMINAL_STATUSES:
+            status = status_of(client.get_order_by_id(order_id))
+        final["status"] = status
+        return status in TERMINAL_STATUSES
+    return final.get("status") if wait_until(symbol, check, timeout, label=f"order {str(order_id)[:8]} closed") else None
+
+def final_status(client, order_id):
+    """Latest known status of an order (stream first, then the broker; None if unreadable)."""
+    status = hub.last_status(order_id)
+    if status in TERMINAL_STATUSES: return status
+    try: return status_of(client.get_order_by_id(order_id))
+    except Exception: return status
@@ -0,0 +1,121 @@
+import datetime
+import config
+from alpaca.trading.requests import ReplaceOrderRequest
+from alpaca.trading.enums import OrderSide, OrderType
+
+# ==========================================================
+#  🧮 MINIMAL-DIFF BRACKET RECONCILIATION
+# ==========================================================
+# Compares the bracket we WANT (limit / TP / SL) with what the broker HAS and
+# picks the cheapest way to get there:
+#   NOOP            -> nothing differs (0 calls)
+#   REPLACE_LEGS    -> only TP and/or SL moved (1 call per leg)
+#   REPLACE_PARENT  -> the buy limit moved (+ any legs that moved)
+#   REBUILD         -> a leg we need is missing, or patching costs more than
+#                      cancelling and resubmitting the whole bracket
+# A REPLACE plan that the broker rejects still falls back to the managers'
+# existing rebuild path. With dry_run the plan is only logged.
+
+PRICE_TOLERANCE = 0.01
+DRY_RUN = getattr(config, 'ORDER_PLANNER_DRY_RUN', False)
+
+# Broker round trips of a full rebuild (excluding confirmation polling):
+# pending = cancel + submit, filled = list + cancel(s) + position check + submit.
+PENDING_REBUILD_CALLS = 2
+FILLED_REBUILD_CALLS = 4
+
+def log_planner(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [ORDER_PLANNER] {message}")
+
+# --- BROKER STATE HELPERS ---
+def find_legs(orders):
+    """Returns (tp_order, sl_order) among the symbol's live orders."""
+    tp = next((o for o in orders if o.side == OrderSide.SELL and o.type == OrderType.LIMIT), None)
+    sl = next((o for o in orders if o.side == OrderSide.SELL and o.type in [OrderType.STOP, OrderType.STOP_LIMIT]), None)
+    return tp, sl
+
+def leg_price(order):
+    if order is None: return 0.0
+    return float(order.stop_price) if order.stop_price else float(order.limit_price)
+
+def _differs(current, target):
+    return target > 0 and abs(current - float(target)) >= PRICE_TOLERANCE
+
+# --- PLANNING ---
+def _step(op, order, field, current, target):
+    return {"op": op, "order": order, "field": field, "from": current, "to": float(target)}
+
+def _plan(steps, rebuild_calls, reason=None):
+    if reason:
+        return {"kind": "REBUILD", "steps": [], "calls": rebuild_calls, "reason": reason}
+    if not steps:
+        return {"kind": "NOOP", "steps": [], "calls": 0, "reason": "Bracket is aligned"}
+    if len(steps) > rebuild_calls:
+        return {"kind": "REBUILD", "steps": [], "calls": rebuild_calls, "reason": f"{len(steps)} replaces cost more than a rebuild"}
+    kind = "REPLACE_PARENT" if any(s["op"] == "PARENT" for s in steps) else "REPLACE_LEGS"
+    return {"kind": kind, "steps": steps, "calls": len(steps), "reason": ", ".join(s["op"] for s in steps) + " moved"}
+
+def plan_pending(parent_buy, orders, buy_limit, take_profit, stop_loss):
+    """Plan for an unfilled bracket (parent BUY + held legs)."""
+    tp_order, sl_order = find_legs(orders)
+    steps = []
+
+    current_limit = float(parent_buy.limit_price)
+    if _differs(current_limit, buy_limit):
+        steps.append(_step("PARENT", parent_buy, "limit_price", current_limit, buy_limit))
+
+    for label, order, target, field in [("TP", tp_order, take_profit, "limit_price"), ("SL", sl_order, stop_loss, "stop_price")]:
+        if not _differs(leg_price(order), target): continue
+        if order is None:
+            return _plan(steps, PENDING_REBUILD_CALLS, reason=f"{label} leg missing")
+        steps.append(_step(label, order, field, leg_price(order), target))
+
+    return _plan(steps, PENDING_REBUILD_CALLS)
+
+def plan_filled(orders, take_profit, stop_loss):
+    """Plan for the exit legs (TP/SL) of an open position."""
+    tp_order, sl_order = find_legs(orders)
+    if not tp_order and not sl_order:
+        return _plan([], FILLED_REBUILD_CALLS + len(orders), reason="No active brackets")
+
+    steps = []
+    for label, order, target, field in [("TP", tp_order, take_profit, "limit_price"), ("SL", sl_order, stop_loss, "stop_price")]:
+        if target <= 0: continue
+        if order is None:
+            return _plan([], FILLED_REBUILD_CALLS + len(orders), reason=f"{label} leg missing")
+        if _differs(leg_price(order), target):
+            steps.append(_step(label, order, field, leg_price(order), target))
+
+    return _plan(steps, FILLED_REBUILD_CALLS + len(orders))
+
+def describe(plan):
+    lines = [f"{plan['kind']} ({plan['calls']} broker calls): {plan['reason']}"]
+    for s in plan["steps"]:
+        lines.append(f"   • {s['op']}: {s['field']} {s['from']} -> {s['to']}")
+    return "\n".join(lines)
+
+# --- EXECUTION ---
+def apply(client, ticker, plan):
+    """
+    Runs a REPLACE plan. Returns False on the first broker rejection (caller rebuilds).
+    Every successful step is marked done: a replace gives the order a NEW id,
+    so after a partial apply the original order objects may be dead.
+    """
+    for s in plan["steps"]:
+        try:
+            log_planner(f"👉 {ticker} {s['op']}: {s['from']} -> {s['to']}")
+            client.replace_order_by_id(s["order"].id, ReplaceOrderRequest(**{s["field"]: s["to"]}))
+            s["done"] = True
+        except Exception as e:
+            log_planner(f"❌ {ticker} {s['op']} replace failed ({e}).")
+            return False
+    return True
+
+def parent_replaced(plan):
+    """True when apply() already swapped the parent order for a new one."""
+    return any(s["op"] == "PARENT" and s.get("done") for s in plan["steps"])
+
+def dry_run_result(ticker, plan):
+    log_planner(f"🧪 DRY RUN {ticker}: {describe(plan)}")
+    return [{"event": "DRY_RUN", "info": f"{plan['kind']} ({plan['calls']} calls)"}]
@@ -1,63 +1,56 @@
-import time
 import datetime
-from alpaca.trading.requests import LimitOrderRequest, TakeProfitRequest, StopLossRequest, ReplaceOrderRequest
-from alpaca.trading.enums import OrderSide, TimeInForce, OrderClass, OrderType
+from alpaca.trading.requests import LimitOrderRequest, TakeProfitRequest, StopLossRequest, GetOrdersRequest
+from alpaca.trading.enums import OrderSide, TimeInForce, OrderClass, OrderType, QueryOrderStatus
+import lib.gvqm_order_events as order_events
+import lib.gvqm_order_planner as planner
 
 def log(message):
     timestamp = datetime.datetime.now().strftime("%H:%M:%S")
     print(f"[{timestamp}] [PENDING_MGR] {message}")
 
-def manage_pending_order(client, ticker, parent_buy, buy_limit, take_profit, stop_loss, orders):
+def manage_pending_order(client, ticker, parent_buy, buy_limit, take_profit, stop_loss, orders, dry_run=None):
     """
     Main Entry Point for Pending Orders.
-    Logic: If ANY parameter (Limit, TP, SL) changes, we must RESUBMIT the whole bracket
-    to keep the prices aligned. Polite updates are too risky for brackets.
+    Logic: Patch only what moved (parent limit and/or single legs). If a leg is
+    missing or the broker rejects a replace, RESUBMIT the whole bracket.
     """
-    current_limit = float(parent_buy.limit_price)
-    
-    # 1. Check if Buy Limit Changed
-    limit_changed = buy_limit > 0 and abs(current_limit - float(buy_limit)) >= 0.01
+    plan = planner.plan_pending(parent_buy, orders, buy_limit, take_profit, stop_loss)
+    dry_run = planner.DRY_RUN if dry_run is None else dry_run
+    if dry_run:
+        return planner.dry_run_result(ticker, plan)
 
-    # 2. Check if Legs Changed (Need to scrape old leg prices first)
-    # Note: 'orders' contains 'held' legs if we passed status='all' to get_orders
-    old_tp_order = next((o for o in orders if o.side == OrderSide.SELL and o.type == OrderType.LIMIT), None)
-    old_sl_order = next((o for o in orders if o.side == OrderSide.SELL and o.type in [OrderType.STOP, OrderType.STOP_LIMIT]), None)
+    if plan["kind"] == "NOOP":
+        return [{"event": "HOLD_PENDING", "info": "Bracket is aligned"}]
 
-    old_tp = float(old_tp_order.limit_price) if old_tp_order else 0.0
-    old_sl = float(old_sl_order.stop_price) if old_sl_order and old_sl_order.stop_price else (float(old_sl_order.limit_price) if old_sl_order else 0.0)
+    if plan["kind"] != "REBUILD":
+        log(f"👉 Bracket Mismatch: {planner.describe(plan)}")
+        if planner.apply(client, ticker, plan):
+            return [{"event": "UPDATE_PENDING", "info": f"{plan['kind']} ({plan['calls']} calls)"}]
+        log("⚠️ Replace rejected. Escalating to NUCLEAR RESUBMIT.")
+        if planner.parent_replaced(plan):
+            # The old parent id is dead (status 'replaced'); rebuild from the live replacement
+            parent_buy, orders = _live_bracket(client, ticker)
+            if parent_buy is None:
+                return [{"event": "ERROR", "info": "Resubmit Aborted: replaced parent not found among open orders"}]
+    else:
+        log(f"⚠️ {plan['reason']}. Executing NUCLEAR RESUBMIT.")
 
-    tp_changed = take_profit > 0 and abs(old_tp - float(take_profit)) >= 0.01
-    sl_changed = stop_loss > 0 and abs(old_sl - float(stop_loss)) >= 0.01
-
-    # 3. Decision Logic
-    if limit_changed or tp_changed or sl_changed:
-        log(f"⚠️ Bracket Mismatch Detected (Limit: {limit_changed}, TP: {tp_changed}, SL: {sl_changed}). Executing NUCLEAR RESUBMIT.")
-        # We skip 'Polite Update' entirely because syncing 3 separate orders is brittle.
-        # Nuke it and build a fresh, perfect bracket.
-        return _nuclear_resubmit(client, ticker, parent_buy, buy_limit, take_profit, stop_loss, orders)
-
-    return [{"event": "HOLD_PENDING", "info": "Bracket is aligned"}]
-    """
-    Main Entry Point for Pending Orders (Unfilled).
-    Tries Polite Update -> Falls back to Nuclear Resubmit.
-    """
-    current_limit = float(parent_buy.limit_price)
-    needs_limit_update = buy_limit > 0 and abs(current_limit - float(buy_limit)) >= 0.01
+    return _nuclear_resubmit(client, ticker, parent_buy, buy_limit, take_profit, stop_loss, orders)
 
+def _live_bracket(client, ticker):
+    """Re-reads the symbol's open orders: (live parent BUY or None, flattened orders)."""
     try:
-        # PLAN A: POLITE UPDATE
-        if needs_limit_update:
-            log(f"👉 Updating Buy Limit for {ticker}: {current_limit} -> {buy_limit}")
-            client.replace_order_by_id(parent_buy.id, ReplaceOrderRequest(limit_price=float(buy_limit)))
-            time.sleep(1) # Allow settlement
-            return [{"event": "UPDATE_PENDING", "info": "Limit Updated"}]
-        
-        # Note: We skip complex leg updates on pending orders to avoid broker brittleness.
-        return [{"event": "HOLD_PENDING", "info": "No Limit Change Needed"}]
-
+        parents = client.get_orders(filter=GetOrdersRequest(status=QueryOrderStatus.OPEN, symbols=[ticker], nested=True))
     except Exception as e:
-        log(f"⚠️ Update Failed ({e}). Escalating to NUCLEAR RESUBMIT.")
-        return _nuclear_resubmit(client, ticker, parent_buy, buy_limit, take_profit, stop_loss, orders)
+        log(f"❌ Could not re-read open orders for {ticker}: {e}")
+        return None, []
+    orders = []
+    for o in parents:
+        if o.symbol != ticker: continue
+        orders.append(o)
+        orders.extend(getattr(o, 'legs', None) or [])
+    parent_buy = next((o for o in orders if o.side == OrderSide.BUY), None)
+    return parent_buy, orders
 
 def _nuclear_resubmit(client, ticker, parent_buy, buy_limit, take_profit, stop_loss, orders):
     """
@@ -76,10 +69,16 @@ def _nuclear_resubmit(client, ticker, parent_buy, buy_limit, take_profit, stop_l
         final_tp = take_profit if take_profit > 0 else (float(old_tp) if old_tp else 0)
         final_sl = stop_loss if stop_loss > 0 else (float(old_sl) if old_sl else 0)
 
-        # 3. Kill the Old Order
+        # 3. Kill the Old Order (and wait for the broker to confirm it is gone)
         log(f"☢️ Canceling pending order for {ticker}...")
         client.cancel_order_by_id(parent_buy.id)
-        time.sleep(2) 
+        final_status = order_events.wait_for_order_terminal(client, ticker, parent_buy.id)
+        if final_status == 'filled':
+            return [{"event": "ERROR", "info": "Resubmit Aborted: Order filled during cancel"}]
+        if final_status not in order_events.CANCELLED_STATUSES:
+            # Unconfirmed (timeout) or replaced: a second bracket could double the position
+            log(f"❌ ABORT: Cancel of {ticker} not confirmed (status: {final_status or 'unknown'}).")
+            return [{"event": "ERROR", "info": f"Resubmit Aborted: Cancel not confirmed ({final_status or 'timeout'})"}]
 
         # 4. Validate Safety
         if final_tp <= 0 or final_sl <= 0:
@@ -0,0 +1,141 @@
+import datetime
+import threading
+import config
+from alpaca.trading.requests import GetOrdersRequest
+from alpaca.trading.enums import OrderSide, QueryOrderStatus, OrderType
+
+# ==========================================================
+#  📸 ACCOUNT-WIDE BROKER SNAPSHOT
+# ==========================================================
+# Two bulk calls (all positions + all open orders, legs nested) replace the
+# per-symbol get_open_position + get_orders(ALL, limit=500) pair that used to
+# run for every candidate, before AND after every trade.
+# After our own writes only the affected symbol is marked stale and re-read
+# on its next access; everything else keeps being served from memory.
+# Broker reads happen outside the lock (threads working on other symbols
+# are never blocked behind them) and are published under it.
+
+LIVE_STATUSES = ['new', 'partially_filled', 'accepted', 'pending_new', 'pending_replace', 'held']
+
+def log_snapshot(message):
+    if getattr(config, 'DEBUG_MODE', False):
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] [PORTFOLIO] {message}")
+
+def _status(order):
+    return order.status.value if hasattr(order.status, 'value') else str(order.status)
+
+def _flatten(orders):
+    """Parent orders + their nested legs (bracket/OCO children), live ones only."""
+    flat = []
+    for o in orders:
+        flat.append(o)
+        flat.extend(getattr(o, 'legs', None) or [])
+    return [o for o in flat if _status(o) in LIVE_STATUSES]
+
+def _empty_entry():
+    return {"position": None, "orders": []}
+
+class PortfolioSnapshot:
+    def __init__(self, client):
+        self.client = client
+        self._entries = {}     # symbol -> {"position", "orders"}
+        self._stale = set()
+        self._writes = {}      # symbol -> invalidate() count (detects writes during a fetch)
+        self._loaded = False
+        self._lock = threading.RLock()  # Guards the maps only; broker calls run outside it
+        self.stats = {"bulk_loads": 0, "symbol_loads": 0}
+
+    # --- LOADING ---
+    def refresh(self):
+        """Full reload: 2 broker calls for the whole account."""
+        with self._lock: writes = dict(self._writes)
+        positions = self.client.get_all_positions()
+        # nested=True rolls bracket/OCO legs (incl. 'held' ones) under their parent
+        orders = self.client.get_orders(filter=GetOrdersRequest(status=QueryOrderStatus.OPEN, nested=True, limit=500))
+        entries = {}
+        for p in positions:
+            entries.setdefault(p.symbol, _empty_entry())["position"] = p
+        for o in _flatten(orders):
+            entries.setdefault(o.symbol, _empty_entry())["orders"].append(o)
+
+        with self._lock:
+            self._entries = entries
+            # Symbols written to while we were reading may be missing that write
+            self._stale = {s for s, n in self._writes.items() if writes.get(s, 0) != n}
+            self._loaded = True
+            self.stats["bulk_loads"] += 1
+        log_snapshot(f"Loaded {len(positions)} positions and {len(orders)} open orders.")
+
+    def _fetch_symbol(self, symbol):
+        entry = _empty_entry()
+        try: entry["position"] = self.client.get_open_position(symbol)
+        except Exception: entry["position"] = None  # 404 = no position
+        orders = self.client.get_orders(filter=GetOrdersRequest(status=QueryOrderStatus.OPEN, symbols=[symbol], nested=True))
+        entry["orders"] = [o for o in _flatten(orders) if o.symbol == symbol]
+        return entry
+
+    def _entry(self, symbol):
+        with self._lock: loaded = self._loaded
+        if not loaded: self.refresh()
+
+        with self._lock:
+            if symbol not in self._stale: return self._entries.get(symbol, _empty_entry())
+            writes = self._writes.get(symbol, 0)
+
+        # Re-read outside the lock, so other symbols keep being served meanwhile
+        entry = self._fetch_symbol(symbol)
+        with self._lock:
+            self.stats["symbol_loads"] += 1
+            if self._writes.get(symbol, 0) == writes:  # Else a newer write arrived: stay stale
+                self._entries[symbol] = entry
+                self._stale.discard(symbol)
+        return entry
+
+    def invalidate(self, symbol):
+        """Call after we write to the broker for `symbol`."""
+        with self._lock:
+            self._stale.add(symbol)
+            self._writes[symbol] = self._writes.get(symbol, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries, self._loaded = {}, False
+            self._stale.clear()
+            self.stats = {"bulk_loads": 0, "symbol_loads": 0}
+
+    # --- QUERIES ---
+    def symbols(self):
+        """Every symbol with a position or a live order."""
+        with self._lock: loaded = self._loaded
+        if not loaded: self.refresh()
+        with self._lock:
+            return {s for s, e in self._entries.items() if e["position"] is not None or e["orders"]}
+
+    def live_orders(self, symbol):
+        return list(self._entry(symbol)["orders"])
+
+    def get_state(self, symbol):
+        """Same shape as the trader's old per-symbol snapshot."""
+        state = {"shares": 0.0, "avg_entry": 0.0, "pending_buy": None, "tp": 0.0, "sl": 0.0, "manual": False}
+        entry = self._entry(symbol)
+
+        pos = entry["position"]
+        if pos is not None:
+            state["shares"] = float(pos.qty)
+            state["avg_entry"] = float(pos.avg_entry_price)
+
+        orders = entry["orders"]
+        if any(o.side == OrderSide.BUY and o.type == OrderType.MARKET for o in orders):
+            state["manual"] = True
+            return state
+
+        buy = next((o for o in orders if o.side == OrderSide.BUY), None)
+        if buy: state["pending_buy"] = float(buy.limit_price)
+
+        tp = next((o for o in orders if o.side == OrderSide.SELL and o.type == OrderType.LIMIT), None)
+        if tp: state["tp"] = float(tp.limit_price)
+
+        sl = next((o for o in orders if o.side == OrderSide.SELL and o.type in [OrderType.STOP, OrderType.STOP_LIMIT]), None)
+        if sl: state["sl"] = float(sl.stop_price) if sl.stop_price else float(sl.limit_price)
+        return state
@@ -0,0 +1,215 @@
+import os
+import datetime
+import threading
+import pandas as pd
+import yfinance as yf
+import config
+import lib.gvqm_bulk_downloader as downloader
+import lib.gvqm_indicators as indicators
+
+# ==========================================================
+#  💾 LOCAL OHLCV STORE (one Parquet file per field)
+# ==========================================================
+# Layout: <PRICE_STORE_DIR>/<Field>.parquet, each a wide frame
+# (index = trading date, columns = Yahoo ticker). Only the bars missing
+# since the last stored date are downloaded on each run; a ticker's full
+# history is re-fetched only when its adjusted prices moved underneath us
+# (split or dividend adjustment). Files are trimmed to the newest KEEP_BARS
+# bars, enough for the longest screen (250-SMA, 52-week drawdown).
+
+STORE_DIR = getattr(config, 'PRICE_STORE_DIR', "data/price_store")
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+HISTORY_PERIOD = "2y"
+OVERLAP_DAYS = 7             # Calendar days re-fetched behind the last stored bar
+ADJUSTMENT_TOLERANCE = 0.002 # 0.2% drift on an overlapping close = adjustment event
+KEEP_BARS = max(getattr(config, 'PRICE_STORE_KEEP_BARS', 300), max(s["bars"] for s in indicators.SCREENS.values()))
+
+_lock = threading.RLock()
+_download_lock = threading.Lock()
+_frames = {}
+
+def log_store(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [PRICE_STORE] {message}")
+
+def _path(field):
+    return os.path.join(STORE_DIR, f"{field}.parquet")
+
+def _load_field(field):
+    if field in _frames: return _frames[field]
+    frame = pd.DataFrame()
+    if os.path.exists(_path(field)):
+        try:
+            frame = pd.read_parquet(_path(field))
+            frame.index = pd.to_datetime(frame.index)
+        except Exception as e:
+            log_store(f"⚠️ Could not read {field} store ({e}). Starting empty.")
+            frame = pd.DataFrame()
+    _frames[field] = frame
+    return frame
+
+def _save_field(field, frame):
+    os.makedirs(STORE_DIR, exist_ok=True)
+    frame = frame.sort_index().iloc[-KEEP_BARS:]  # Older bars feed no screen
+    tmp_path = _path(field) + ".tmp"
+    frame.to_parquet(tmp_path)
+    os.replace(tmp_path, _path(field))  # Atomic swap, never leaves a half-written file
+    _frames[field] = frame
+
+def _download(tickers, **kwargs):
+    """One yf.download for tickers sharing the same date range -> {field: wide frame}."""
+    with _download_lock:  # yf.download keeps its results in module-level globals
+        data = yf.download(tickers, interval="1d", group_by="column", progress=False,
+                           auto_adjust=True, threads=True, **kwargs)
+    if data is None or data.empty: return {}
+    data.index = pd.to_datetime(data.index).tz_localize(None).normalize()
+    frames = {}
+    for field in FIELDS:
+        if isinstance(data.columns, pd.MultiIndex):
+            if field not in data.columns.get_level_values(0): continue
+            frames[field] = data[field]
+        elif field in data.columns:
+            frames[field] = data[[field]].set_axis(tickers[:1], axis=1)  # Older yfinance, single ticker
+    return {field: frame.dropna(axis=1, how="all") for field, frame in frames.items()}  # Failed tickers come back all-NaN
+
+def _fetch_chunk(tickers, starts=None, **kwargs):
+    """
+    Fetches one chunk with one yf.download per distinct start date, so each
+    ticker only gets the bars it is missing (starts: ticker -> "YYYY-MM-DD";
+    None = the same kwargs for the whole chunk). Failures are logged; the
+    downloader retries the tickers that came back empty.
+    """
+    groups = {}
+    for t in tickers:
+        groups.setdefault(starts[t] if starts else None, []).append(t)
+
+    parts = {}
+    for start, group in groups.items():
+        args = dict(kwargs, start=start) if start else kwargs
+        try:
+            frames = _download(group, **args)
+        except Exception as e:
+            log_store(f"⚠️ Download failed for {len(group)} tickers{' since ' + start if start else ''}: {e}")
+            continue
+        close = frames.get("Close")
+        failed = [t for t in group if close is None or t not in close.columns or close[t].isna().all()]
+        if failed:
+            log_store(f"⚠️ No data for {len(failed)}/{len(group)} tickers{' since ' + start if start else ''}: {failed[:10]}")
+        for field, frame in frames.items():
+            parts.setdefault(field, []).append(frame)
+    return {field: pd.concat(frame_list, axis=1) for field, frame_list in parts.items()}
+
+def _clean(frames):
+    return {field: frame.dropna(how="all") for field, frame in frames.items()}
+
+def get_field(field, tickers=None):
+    """Returns the stored wide frame for a field, optionally restricted to tickers."""
+    with _lock:
+        frame = _load_field(field)
+        if tickers is None: return frame.copy()
+        return frame.reindex(columns=[t for t in tickers if t in frame.columns])
+
+def get_history(ticker):
+    """Returns one ticker's OHLCV history as a (date x field) frame."""
+    with _lock:
+        cols = {}
+        for field in FIELDS:
+            frame = _load_field(field)
+            if ticker in frame.columns: cols[field] = frame[ticker]
+        return pd.DataFrame(cols).dropna(how="all")
+
+def last_stored_dates(tickers):
+    """Maps ticker -> last stored Close date (None when the ticker is unknown)."""
+    close = _load_field("Close")
+    dates = {}
+    for t in tickers:
+        dates[t] = close[t].last_valid_index() if t in close.columns else None
+    return dates
+
+def _find_adjusted(stored_close, fresh_close, last_dates):
+    """
+    Compares overlapping bars. The newest stored bar is skipped because it may
+    have been an intraday (partial) bar when it was written.
+    """
+    adjusted = []
+    for t in fresh_close.columns:
+        if t not in stored_close.columns or last_dates.get(t) is None: continue
+        common = fresh_close.index.intersection(stored_close[t].dropna().index)
+        common = common[common < last_dates[t]]
+        if common.empty: continue
+        old = stored_close.loc[common, t]
+        new = fresh_close.loc[common, t]
+        drift = ((new - old).abs() / old.abs()).max()
+        if pd.notna(drift) and drift > ADJUSTMENT_TOLERANCE:
+            adjusted.append(t)
+    return adjusted
+
+def _apply(fresh, replace=False):
+    """Merges freshly downloaded frames into the in-memory store (caller holds _lock)."""
+    for field, frame in fresh.items():
+        stored = _load_field(field)
+        if stored.empty:
+            _frames[field] = frame.copy()
+            continue
+        if replace:
+            # Only replace tickers that actually came back; a failed re-fetch keeps the old bars.
+            stored = stored.drop(columns=[t for t in frame.columns if t in stored.columns])
+        _frames[field] = frame.combine_first(stored)
+    return set(fresh)
+
+def iter_refresh(tickers, summary=None):
+    """
+    Brings the store up to date for the given tickers, yielding the list of
+    tickers that are ready to screen after each download chunk is merged.
+    New tickers get HISTORY_PERIOD of bars; known tickers only get the bars
+    since their last stored date (plus a small overlap used to detect
+    split/dividend adjustments, which trigger a full re-fetch).
+    The store is written to disk once, when the generator finishes or is closed.
+    """
+    if summary is None: summary = {}
+    with _lock:
+        last_dates = last_stored_dates(tickers)
+    missing = [t for t, d in last_dates.items() if d is None]
+    known = [t for t, d in last_dates.items() if d is not None]
+    summary.update({"new": list(missing), "incremental": known, "adjusted": []})
+    dirty = set()
+
+    try:
+        if known:
+            # Each ticker is fetched from its own last stored bar (minus the overlap), grouped by date
+            starts = {t: (last_dates[t] - datetime.timedelta(days=OVERLAP_DAYS)).strftime("%Y-%m-%d") for t in known}
+            log_store(f"Incremental fetch for {len(known)} tickers ({len(set(starts.values()))} distinct start dates)...")
+            fetch = lambda chunk: _fetch_chunk(chunk, starts=starts)
+            for res in downloader.iter_chunks(known, fetch):
+                fresh = _clean(res["frames"])
+                with _lock:
+                    adjusted = _find_adjusted(_load_field("Close"), fresh["Close"], last_dates) if "Close" in fresh else []
+                    if adjusted:
+                        log_store(f"🔁 Adjustment detected for {len(adjusted)} tickers: {adjusted[:10]}. Re-fetching history.")
+                        summary["adjusted"].extend(adjusted)
+                        missing.extend(adjusted)
+                        fresh = {f: fr.drop(columns=[t for t in adjusted if t in fr.columns]) for f, fr in fresh.items()}
+                    dirty |= _apply(fresh)
+                yield [t for t in res["tickers"] if t not in adjusted]
+
+        if missing:
+            log_store(f"Full history fetch ({HISTORY_PERIOD}) for {len(missing)} tickers...")
+            fetch = lambda chunk: _fetch_chunk(chunk, period=HISTORY_PERIOD)
+            for res in downloader.iter_chunks(missing, fetch):
+                with _lock:
+                    dirty |= _apply(_clean(res["frames"]), replace=True)
+                yield res["tickers"]
+    finally:
+        with _lock:
+            for field in dirty:
+                _save_field(field, _frames[field])
+        log_store(f"✅ Store refreshed: {len(summary['new'])} new, {len(known)} incremental, {len(summary['adjusted'])} re-adjusted.")
+
+def refresh(tickers):
+    """
+    Blocking variant of iter_refresh.
+    Returns a summary dict of what was fetched.
+    """
+    summary = {}
+    for _ in iter_refresh(tickers, summary): pass
+    return summary
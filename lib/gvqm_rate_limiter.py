@@ -0,0 +1,64 @@
+import time
+import threading
+
+# ==========================================================
+#  🪣 TOKEN BUCKET RATE LIMITER (thread-safe)
+# ==========================================================
+# Refills `rate` tokens every `per_seconds`, holding at most `capacity`.
+# acquire() blocks until enough tokens are available, so every thread that
+# shares a bucket shares the same budget.
+
+class TokenBucket:
+    def __init__(self, rate, per_seconds=60.0, capacity=None):
+        self.rate = float(rate)
+        self.per_seconds = float(per_seconds)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate / self.per_seconds)
+        self._updated = now
+
+    def wait_time(self, tokens=1):
+        """Seconds until `tokens` would be available (0 if available now)."""
+        with self._lock:
+            self._refill()
+            missing = min(tokens, self.capacity) - self._tokens
+            return max(0.0, missing * self.per_seconds / self.rate)
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` are available and consumes them. Returns seconds waited."""
+        tokens = min(tokens, self.capacity)  # A request larger than the bucket still gets through once full
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) * self.per_seconds / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def consume(self, tokens):
+        """Charges tokens without waiting (the balance may go negative, delaying later acquires)."""
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+
+class RateLimitedClient:
+    """Proxy that takes one token from `bucket` before every method call on `client`."""
+    def __init__(self, client, bucket):
+        self._client = client
+        self._bucket = bucket
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr): return attr
+        def limited(*args, **kwargs):
+            self._bucket.acquire()
+            return attr(*args, **kwargs)
+        return limited
@@ -0,0 +1,158 @@
+import os
+import json
+import math
+import heapq
+import datetime
+import config
+import lib.gvqm_change_detection as change_detection
+
+# ==========================================================
+#  🎯 JUNIOR SCAN PRIORITY QUEUE
+# ==========================================================
+# Orders scanner candidates by how much an LLM call on them is worth today,
+# instead of scanner (Wikipedia/alphabetical) order:
+#   depth      -> how far below the 250 SMA
+#   staleness  -> days since we last analyzed it (never = max)
+#   move       -> price change since the last report's snapshot
+#   portfolio  -> we hold it / have an order on it
+#   waiting    -> runs it has already been passed over (anti-starvation)
+# The waiting counter is persisted in QUEUE_PATH, so it survives across runs.
+
+QUEUE_PATH = getattr(config, 'JUNIOR_QUEUE_PATH', "data/junior_queue.json")
+# Rank within a sliding window of about two Junior batches, so Junior work starts
+# while the scan is still downloading (0 = rank the whole scan first)
+LOOKAHEAD = getattr(config, 'JUNIOR_QUEUE_LOOKAHEAD', 2 * getattr(config, 'JUNIOR_BATCH_MAX_TICKERS', 8))
+
+WEIGHT_DEPTH = 1.0        # per % below the SMA
+WEIGHT_STALENESS = 0.5    # per day since last analysis
+WEIGHT_MOVE = 1.5         # per % moved since the last report
+WEIGHT_PORTFOLIO = 25.0   # flat bonus for holdings / open orders
+WEIGHT_WAITING = 3.0      # per run spent waiting in the queue
+MAX_STALENESS_DAYS = 30
+
+def log_queue(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [SCAN_QUEUE] {message}")
+
+def _load():
+    try:
+        with open(QUEUE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save(state):
+    os.makedirs(os.path.dirname(QUEUE_PATH) or ".", exist_ok=True)
+    tmp_path = QUEUE_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, QUEUE_PATH)
+
+def _num(value, default=0.0):
+    try:
+        value = float(value)
+        return default if math.isnan(value) else value
+    except (TypeError, ValueError):
+        return default
+
+def score(candidate, waiting_runs=0, held=False, now=None):
+    """Priority of one scanner candidate (higher = analyze sooner)."""
+    now = now or datetime.datetime.now()
+    snap = change_detection.load().get(candidate.get('ticker'))
+
+    depth = max(0.0, -_num(candidate.get('distance_pct')))
+    staleness, move = MAX_STALENESS_DAYS, 0.0
+    if snap:
+        try:
+            last = datetime.datetime.strptime(snap["date"], "%Y-%m-%d %H:%M")
+            staleness = min(MAX_STALENESS_DAYS, (now - last).days)
+        except (KeyError, ValueError):
+            pass
+        old_close = _num(snap.get("features", {}).get("close", snap.get("price")))
+        new_close = _num(candidate.get('close'))
+        if old_close and new_close: move = abs(new_close / old_close - 1) * 100
+
+    return (WEIGHT_DEPTH * depth + WEIGHT_STALENESS * staleness + WEIGHT_MOVE * move
+            + (WEIGHT_PORTFOLIO if held else 0.0) + WEIGHT_WAITING * waiting_runs)
+
+class RankedStream:
+    """
+    Iterator returned by prioritize(). close() persists the queue state;
+    with a `done` set it must be called once the consumer has finished
+    reporting (a fully drained stream is not the end of the analyses).
+    """
+    def __init__(self, candidate_stream, held, lookahead, waiting, done):
+        self.state = _load()
+        self.held = set(held)
+        self.lookahead = lookahead
+        self.waiting, self.done = waiting, done
+        self.now = datetime.datetime.now()
+        self.seen, self.emitted = set(), set()
+        self.finished = self.closed = False
+        self._ranked = self._rank(candidate_stream)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._ranked)
+        except StopIteration:
+            if self.done is None: self.close()  # Nothing more to hear from the consumer
+            raise
+
+    def _rank(self, candidate_stream):
+        heap = []
+
+        def pop():
+            _, _, candidate = heapq.heappop(heap)
+            self.emitted.add(candidate['ticker'])
+            return candidate
+
+        for seq, candidate in enumerate(candidate_stream):
+            ticker = candidate['ticker']
+            self.seen.add(ticker)
+            waiting_runs = self.state.get(ticker, {}).get("waiting_runs", 0)
+            priority = score(candidate, waiting_runs, ticker in self.held, self.now)
+            heapq.heappush(heap, (-priority, seq, candidate))
+            if self.lookahead and len(heap) > self.lookahead:
+                yield pop()
+
+        self.finished = True
+        carried = sum(1 for t in self.seen if self.state.get(t))
+        log_queue(f"Ranked {len(self.seen)} candidates ({len(self.held & self.seen)} in portfolio, {carried} carried over).")
+        while heap:
+            yield pop()
+
+    def close(self):
+        if self.closed: return
+        self.closed = True
+        self._ranked.close()
+
+        # Passed over today = one more run of waiting. Gone from the scan = no longer distressed.
+        handled = self.seen & (self.emitted if self.done is None else set(self.done))
+        new_state = {}
+        if self.waiting is not None: self.waiting.update(self.seen - handled)
+        for ticker in self.seen - handled:
+            new_state[ticker] = {"waiting_runs": self.state.get(ticker, {}).get("waiting_runs", 0) + 1,
+                                 "last_seen": self.now.strftime("%Y-%m-%d")}
+        if not self.finished:
+            for ticker, entry in self.state.items():
+                if ticker not in self.seen: new_state[ticker] = entry
+        try:
+            _save(new_state)
+        except OSError as e:
+            log_queue(f"⚠️ Could not save queue state: {e}")
+        log_queue(f"{len(self.emitted)} handed to the Junior, {len(handled)} analyzed, {len(new_state)} waiting for a later run.")
+
+def prioritize(candidate_stream, held=(), lookahead=LOOKAHEAD, waiting=None, done=None):
+    """
+    Re-emits scanner candidates highest-priority first.
+    lookahead=0 ranks the full scan before the first yield; N > 0 keeps
+    streaming, always emitting the best of the next N.
+    `done` is a set the consumer fills with the tickers it actually
+    analyzed (without it, every pulled candidate counts as handled).
+    Every other ranked candidate gets its waiting counter bumped (persisted
+    by close()) and, if given, is added to the `waiting` set.
+    """
+    return RankedStream(candidate_stream, held, lookahead, waiting, done)
@@ -1,16 +1,14 @@
-import requests
 import json
 import config
-import time
 import lib.gvqm_senior_prompts as prompts
+import lib.gvqm_llm_client as llm_client
+import lib.gvqm_llm_cache as llm_cache
 import re
 import datetime
 
 # 1. Setup Model
 raw_model = getattr(config, 'GEMINI_SENIOR_MODEL', "gemini-1.5-pro")
 MODEL_NAME = raw_model.replace("models/", "")
-API_KEY = config.GEMINI_API_KEY
-BASE_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{MODEL_NAME}:generateContent"
 
 def log_debug(message):
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -27,6 +25,13 @@ def clean_json_text(text):
         return text
     except: return text
 
+def _is_json(text):
+    try:
+        json.loads(clean_json_text(text))
+        return True
+    except Exception:
+        return False
+
 # --- VISUALIZATION ENGINE (UPDATED FOR A1/B1 RANKING) ---                                                                            
 def visualize_decision(candidates, decision):
     """
@@ -168,53 +173,28 @@ def rank_portfolio(candidates_list, top_n=5, lookback_days=10, prev_context=None
         log_debug(f"CRITICAL: Failed to construct prompt. Error: {e}")
         return None
 
-    safety_settings = [
-        {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-        {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-        {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-        {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"}
-    ]
-    
-    payload = {
-        "contents": [{"parts": [{"text": prompt}]}], 
-        "tools": [{"googleSearch": {}}],
-        "safetySettings": safety_settings
-    }
-    
-    # --- RETRY LOOP ---
-    for attempt in range(3):
-        try:
-            log_debug(f"Attempt {attempt+1}/3: Sending request to Google AI...")
-            start_time = time.time()
-            
-            response = requests.post(f"{BASE_URL}?key={API_KEY}", headers={'Content-Type': 'application/json'}, data=json.dumps(payload))
-            
-            elapsed = round(time.time() - start_time, 2)
-            log_debug(f"Response received in {elapsed}s. Status Code: {response.status_code}")
-            
-            if response.status_code == 200:
-                try:
-                    text = response.json()['candidates'][0]['content']['parts'][0]['text']
-                    cleaned_json = clean_json_text(text)
-                    decision_data = json.loads(cleaned_json)
-
-                    visualize_decision(candidates_list, decision_data)
-
-														 
-																				   
-
-                    return decision_data
-                except Exception as e:
-                    log_debug(f"❌ Senior Parsing Error: {e}")
-                    print(f"RAW TEXT: {text[:200]}...") 
-                    return None
-            elif response.status_code in [429, 503]:
-                time.sleep((attempt + 1) * 10)
-                continue
-            else:
-                log_debug(f"❌ Senior API Error ({response.status_code}): {response.text}")
-                return None
-        except Exception as e:
-            log_debug(f"❌ Senior Connection Error: {e}")
-            return None
-    return None
\ No newline at end of file
+    # --- SHARED CLIENT (rate limits, quota, retries) ---
+    try:
+        log_debug("Sending request to Google AI...")
+        # Same candidates (prices bucketed ~1%) + same settings + same previous brief date = cached decision
+        fingerprint = prompts.SENIOR_MANAGER_PROMPT + json.dumps({
+            "candidates": llm_cache.bucket_numbers(candidates_list), "top_n": top_n, "risk_factor": risk_factor,
+            "lookback": lookback_days, "prev_date": prev_context.get('date')}, sort_keys=True, default=str)
+        text = llm_client.generate(MODEL_NAME, prompt, agent="SENIOR", fingerprint=fingerprint, accept=_is_json)
+    except llm_client.DailyQuotaExceeded as e:
+        log_debug(f"⛔ {e}")
+        return None
+    if not text:
+        log_debug("❌ Senior API returned no content.")
+        return None
+
+    try:
+        cleaned_json = clean_json_text(text)
+        decision_data = json.loads(cleaned_json)
+
+        visualize_decision(candidates_list, decision_data)
+        return decision_data
+    except Exception as e:
+        log_debug(f"❌ Senior Parsing Error: {e}")
+        print(f"RAW TEXT: {text[:200]}...") 
+        return None
@@ -1,30 +1,18 @@
 import gspread
-from google.oauth2.service_account import Credentials
 import config
 import datetime
-import json
-import os
-import time
+import lib.gvqm_sheet_mirror as sheet_mirror
+import lib.gvqm_sheet_writer as sheet_writer
+import lib.gvqm_sheets_session as sheets_session
+import lib.gvqm_sheet_query as sheet_query
 
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
 SHEET_NAME = getattr(config, 'GOOGLE_SHEET_NAME', "TradingBot_History")
 STRATEGY_TAB_NAME = getattr(config, 'GOOGLE_SHEET_STRATEGY_TAB', "Strategy_Brief")
 SENIOR_DECISIONS_TAB = getattr(config, 'GOOGLE_SHEET_SENIOR_DECISIONS_TAB', "Senior_Decisions")
 
 def get_client():
-    creds_json = os.getenv("GOOGLE_SHEETS_CREDENTIALS")
-    if not creds_json:
-        if os.path.exists("google_credentials.json"):
-            try: creds_json = open("google_credentials.json").read()
-            except: return None
-        else: return None
-    try:
-        creds_dict = json.loads(creds_json)
-        creds = Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
-        return gspread.authorize(creds)
-    except Exception as e:
-        print(f"⚠️ [SENIOR HISTORY] Auth Error: {e}")
-        return None
+    """The shared, process-wide Sheets client (kept for existing callers)."""
+    return sheets_session.get_client()
 
 def clean_score(value):
     try: return int(float(str(value).replace('%', '').strip())) if value else 0
@@ -34,18 +22,7 @@ def safe_read_sheet(worksheet):
     try:
         raw_data = worksheet.get_all_values()
         if not raw_data: return []
-        headers = raw_data[0]
-        clean_headers = []
-        counts = {}
-        for h in headers:
-            h_str = str(h).strip()
-            if not h_str: h_str = "Unknown"
-            if h_str in counts:
-                counts[h_str] += 1
-                clean_headers.append(f"{h_str}_{counts[h_str]}")
-            else:
-                counts[h_str] = 0
-                clean_headers.append(h_str)
+        clean_headers = sheet_mirror.clean_headers(raw_data[0])
         records = []
         for row in raw_data[1:]:
             if len(row) < len(clean_headers): row += [''] * (len(clean_headers) - len(row))
@@ -56,32 +33,20 @@ def safe_read_sheet(worksheet):
         return []
 
 def robust_parse_date(date_str):
-    date_str = str(date_str).strip()
-    if not date_str: return datetime.datetime(1900, 1, 1)
-    formats = ["%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%m/%d/%Y %H:%M", "%m/%d/%Y"]
-    for fmt in formats:
-        try: return datetime.datetime.strptime(date_str, fmt)
-        except ValueError: continue
-    return datetime.datetime(1900, 1, 1)
+    return sheet_mirror.parse_date(date_str)
 
 # =======================================================
 #  NEW SEPARATED FETCH LOGIC
 # =======================================================
 
-def _fetch_all_raw_reports():
-    """Internal Helper: Fetches and sorts all raw rows from the sheet."""
-    for attempt in range(3):
-        try:
-            client = get_client()
-            if not client: return []
-            sheet = client.open(SHEET_NAME).sheet1
-            raw_records = safe_read_sheet(sheet)
-            # Return sorted by Date (Newest First)
-            return sorted(raw_records, key=lambda x: robust_parse_date(x.get('Date', '')), reverse=True)
-        except Exception as e:
-            print(f"   ⚠️ Sheet Fetch Error (Attempt {attempt+1}/3): {e}")
-            time.sleep(2)
-    return []
+def _fetch_all_raw_reports(since=None, tickers=None):
+    """Internal Helper: Report rows from the local mirror, newest first (optionally only since a date / for some tickers)."""
+    if not sheet_mirror.refresh(sheet_mirror.REPORTS): return []
+    try:
+        return sheet_mirror.records(sheet_mirror.REPORTS, since=since, tickers=tickers)
+    except Exception as e:
+        print(f"   ⚠️ Sheet Fetch Error: {e}")
+        return []
 
 def _parse_report(row):
     """Internal Helper: Formats a raw row into a clean report object."""
@@ -106,162 +71,132 @@ def _parse_report(row):
         }
     }
 
-def fetch_portfolio_reports(priority_tickers):
+class ReportRepository:
+    """
+    Every Junior report, read and parsed ONCE per run.
+    Keeps a date-sorted view (newest first) plus a per-ticker index, and
+    answers both the portfolio and the market query from memory.
+    """
+    def __init__(self, raw_records):
+        self.reports = []      # (date, score, report), newest first
+        self.by_ticker = {}    # ticker -> [(date, score, report), ...] newest first
+        for row in raw_records:
+            report = _parse_report(row)
+            if not report["ticker"]: continue
+            entry = (robust_parse_date(row.get('Date', '')), report["conviction_score"], report)
+            self.reports.append(entry)
+            self.by_ticker.setdefault(report["ticker"], []).append(entry)
+        self.reports.sort(key=lambda e: e[0], reverse=True)  # Already sorted by the mirror; stable re-sort is cheap
+
+    @classmethod
+    def load(cls):
+        return cls(_fetch_all_raw_reports())
+
+    def latest(self, ticker):
+        entries = self.by_ticker.get(ticker)
+        return entries[0][2] if entries else None
+
+    def portfolio_reports(self, priority_tickers):
+        """Newest report per ticker in `priority_tickers`, ignoring age and score."""
+        entries = [self.by_ticker[t][0] for t in set(priority_tickers) if t in self.by_ticker]
+        return [report for _, _, report in sorted(entries, key=lambda e: e[0], reverse=True)]
+
+    def market_reports(self, lookback_days=10, still_valid=None):
+        """Newest scored report per ticker from the last `lookback_days` (any age for `still_valid` tickers)."""
+        limit_date = datetime.datetime.now() - datetime.timedelta(days=lookback_days)
+        picked = {}
+        for date_obj, score, report in self.reports:
+            if date_obj < limit_date: break
+            if score and report["ticker"] not in picked: picked[report["ticker"]] = (date_obj, score, report)
+        for ticker in still_valid or ():
+            if ticker in picked: continue
+            entry = next((e for e in self.by_ticker.get(ticker, []) if e[1]), None)
+            if entry: picked[ticker] = entry
+        return [report for _, _, report in sorted(picked.values(), key=lambda e: e[0], reverse=True)]
+
+def fetch_portfolio_reports(priority_tickers, repo=None):
     """
     Fetches reports ONLY for the specific tickers provided (Your Portfolio).
     RULE: IGNORES Date Expiration and Score Thresholds.
+    Pass the run's ReportRepository as `repo` to reuse its single read.
     """
     if not priority_tickers: return []
-    priority_tickers = set(priority_tickers) if isinstance(priority_tickers, list) else priority_tickers
-    
-    raw_records = _fetch_all_raw_reports()
-    clean_reports = []
-    seen = set()
-
-    for row in raw_records:
-        ticker = row.get('Ticker', '').upper().strip()
-        
-        # FILTER: Must be in our priority list
-        if ticker not in priority_tickers: continue
-        
-        # Deduplicate (Taking newest due to sort)
-        if ticker in seen: continue
-
-        clean_reports.append(_parse_report(row))
-        seen.add(ticker)
-    
+    repo = repo or ReportRepository(_fetch_all_raw_reports(tickers=priority_tickers))
+    clean_reports = repo.portfolio_reports(priority_tickers)
     print(f"   ✅ [HISTORY] Retrieved {len(clean_reports)} reports for Active Portfolio.")
     return clean_reports
 
-def fetch_market_reports(lookback_days=10):
+def fetch_market_reports(lookback_days=10, still_valid=None, repo=None):
     """
     Fetches reports for the General Market.
     RULE: APPLIES Strict Date Expiration and Score Filters.
+    Tickers in `still_valid` (change detection found nothing new) keep their
+    last report even when it is older than the lookback.
+    Pass the run's ReportRepository as `repo` to reuse its single read.
     """
-    raw_records = _fetch_all_raw_reports()
-    clean_reports = []
-    seen = set()
-    limit_date = datetime.datetime.now() - datetime.timedelta(days=lookback_days)
-
-    for row in raw_records:
-        ticker = row.get('Ticker', '').upper().strip()
-        if not ticker: continue
-        if ticker in seen: continue
-
-        date_obj = robust_parse_date(row.get('Date', ''))
-        score = clean_score(row.get('Score', 0))
-
-        # FILTER: Must be recent AND have a score
-        if date_obj < limit_date: continue
-        if score == 0: continue
-
-        clean_reports.append(_parse_report(row))
-        seen.add(ticker)
-
+    repo = repo or ReportRepository.load()
+    clean_reports = repo.market_reports(lookback_days, still_valid)
     print(f"   ✅ [HISTORY] Retrieved {len(clean_reports)} valid market reports (Last {lookback_days} days).")
     return clean_reports
 
 # =======================================================
 
+STRATEGY_HEADERS = ["Date", "Total", "Top_Count", "Report"]
+DECISION_HEADERS = ["Date", "Ticker", "Rank", "Action", "Reason", "Buy_Limit", "Take_Profit", "Stop_Loss", "Shares_Held", "Justification_Safe", "Justification_Bargain", "Justification_Rebound"]
+TRADE_LOG_HEADERS = ["Timestamp", "Ticker", "Event", "Qty", "Price", "Stop_Loss", "Take_Profit", "Details"]
+
+# Rows below are queued in the batched writer (one append_rows per tab on flush)
 def log_strategy(decision):
-    for attempt in range(3):
-        try:
-            client = get_client()
-            if not client: return
-            sh = client.open(SHEET_NAME)
-            try: sheet = sh.worksheet(STRATEGY_TAB_NAME)
-            except: 
-                sheet = sh.add_worksheet(title=STRATEGY_TAB_NAME, rows=1000, cols=10)
-                sheet.append_row(["Date", "Total", "Top_Count", "Report"])
-            
-            trades = decision.get('final_execution_orders', [])
-            trades_summary = ", ".join([f"{t.get('action')} {t.get('ticker')}" for t in trades])
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
-            sheet.append_row([timestamp, len(trades), trades_summary, decision.get('ceo_report', 'N/A')])
-            print(f"   ✅ [SENIOR] Strategy Brief Logged to '{STRATEGY_TAB_NAME}'.")
-            return
-        except Exception as e:
-            print(f"   ⚠️ Strategy Log Error (Attempt {attempt+1}/3): {e}")
-            time.sleep(2)
+    trades = decision.get('final_execution_orders', [])
+    trades_summary = ", ".join([f"{t.get('action')} {t.get('ticker')}" for t in trades])
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    sheet_writer.append(STRATEGY_TAB_NAME, [timestamp, len(trades), trades_summary, decision.get('ceo_report', 'N/A')],
+                        headers=STRATEGY_HEADERS, size=(1000, 10))
+    print(f"   ✅ [SENIOR] Strategy Brief Logged to '{STRATEGY_TAB_NAME}'.")
 
 def log_detailed_decisions(decision_data, holdings_map=None):
     if holdings_map is None: holdings_map = {}
-    for attempt in range(3):
-        try:
-            client = get_client()
-            if not client: return
-            sh = client.open(SHEET_NAME)
-            headers = ["Date", "Ticker", "Rank", "Action", "Reason", "Buy_Limit", "Take_Profit", "Stop_Loss", "Shares_Held", "Justification_Safe", "Justification_Bargain", "Justification_Rebound"]
-            try: sheet = sh.worksheet(SENIOR_DECISIONS_TAB)
-            except: 
-                sheet = sh.add_worksheet(title=SENIOR_DECISIONS_TAB, rows=2000, cols=15)
-                sheet.append_row(headers)
-            orders = decision_data.get('final_execution_orders', [])
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
-            for order in orders:
-                ticker = order.get('ticker')
-                p = order.get('confirmed_params', {})
-                row = [
-                    timestamp, ticker, order.get('rank', 0), order.get('action', 'HOLD'), order.get('reason', 'N/A'),
-                    p.get('buy_limit', 0), p.get('take_profit', 0), p.get('stop_loss', 0),
-                    holdings_map.get(ticker, 0),
-                    order.get('justification_safe', '-'), order.get('justification_bargain', '-'), order.get('justification_rebound', '-')
-                ]
-                sheet.append_row(row)
-            print(f"   ✅ [SENIOR] Detailed Ledger Updated ({len(orders)} rows).")
-            return
-        except Exception as e:
-            print(f"   ⚠️ Ledger Log Error (Attempt {attempt+1}/3): {e}")
-            time.sleep(2)
+    orders = decision_data.get('final_execution_orders', [])
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    for order in orders:
+        ticker = order.get('ticker')
+        p = order.get('confirmed_params', {})
+        row = [
+            timestamp, ticker, order.get('rank', 0), order.get('action', 'HOLD'), order.get('reason', 'N/A'),
+            p.get('buy_limit', 0), p.get('take_profit', 0), p.get('stop_loss', 0),
+            holdings_map.get(ticker, 0),
+            order.get('justification_safe', '-'), order.get('justification_bargain', '-'), order.get('justification_rebound', '-')
+        ]
+        sheet_writer.append(SENIOR_DECISIONS_TAB, row, headers=DECISION_HEADERS, size=(2000, 15))
+    print(f"   ✅ [SENIOR] Detailed Ledger Updated ({len(orders)} rows).")
 
 def log_trade_event(ticker, event_type, details):
-    for attempt in range(3):
-        try:
-            client = get_client()
-            if not client: return
-            sh = client.open(SHEET_NAME)
-            try: sheet = sh.worksheet("Trade_Log")
-            except:
-                sheet = sh.add_worksheet(title="Trade_Log", rows=1000, cols=10)
-                sheet.append_row(["Timestamp", "Ticker", "Event", "Qty", "Price", "Stop_Loss", "Take_Profit", "Details"])
-            now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
-            price = details.get('price') or details.get('buy_limit') or details.get('limit_price') or '-'
-            row = [now, ticker, event_type, details.get('qty', '-'), price, details.get('stop_loss', '-'), details.get('take_profit', '-'), details.get('info', '')]
-            sheet.append_row(row)
-            print(f"   ✅ [HISTORY] Trade Event Logged: {event_type} for {ticker}")
-            return
-        except Exception as e:
-            print(f"   ⚠️ Trade Log Error (Attempt {attempt+1}/3): {e}")
-            time.sleep(2)
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    price = details.get('price') or details.get('buy_limit') or details.get('limit_price') or '-'
+    row = [now, ticker, event_type, details.get('qty', '-'), price, details.get('stop_loss', '-'), details.get('take_profit', '-'), details.get('info', '')]
+    sheet_writer.append(sheet_mirror.TRADE_LOG, row, headers=TRADE_LOG_HEADERS, size=(1000, 10))
+    print(f"   ✅ [HISTORY] Trade Event Logged: {event_type} for {ticker}")
 
 def get_last_strategy():
-    for attempt in range(3):
-        try:
-            client = get_client()
-            if not client: return None
-            try: sheet = client.open(SHEET_NAME).worksheet(STRATEGY_TAB_NAME)
-            except: return None 
-            records = safe_read_sheet(sheet)
-            if not records: return None
-            sorted_records = sorted(records, key=lambda x: robust_parse_date(x.get('Date', '')), reverse=True)
-            for record in sorted_records:
-                report_val = record.get('Report')
-                if not report_val:
-                    for key, val in record.items():
-                        if "ceo" in str(key).lower() or "report" in str(key).lower():
-                            report_val = val
-                            break
-                if report_val and len(str(report_val).strip()) > 10 and "N/A" not in str(report_val):
-                    print(f"   ✅ [MEMORY] Found valid strategy from {record.get('Date', 'Unknown')}")
-                    return {
-                        "date": record.get("Date", "Unknown"),
-                        "top_tickers": record.get("Top_Count", "None"),
-                        "ceo_report": report_val
-                    }
-            return None
-        except Exception as e:
-            if attempt == 2: print(f"   ⚠️ Memory Recall Error: {e}")
-            time.sleep(2)
+    if not sheet_mirror.refresh(sheet_mirror.STRATEGY): return None
+    try:
+        for record in sheet_mirror.records(sheet_mirror.STRATEGY):
+            report_val = record.get('Report')
+            if not report_val:
+                for key, val in record.items():
+                    if "ceo" in str(key).lower() or "report" in str(key).lower():
+                        report_val = val
+                        break
+            if report_val and len(str(report_val).strip()) > 10 and "N/A" not in str(report_val):
+                print(f"   ✅ [MEMORY] Found valid strategy from {record.get('Date', 'Unknown')}")
+                return {
+                    "date": record.get("Date", "Unknown"),
+                    "top_tickers": record.get("Top_Count", "None"),
+                    "ceo_report": report_val
+                }
+        return None
+    except Exception as e:
+        print(f"   ⚠️ Memory Recall Error: {e}")
     return None
 
 
@@ -271,43 +206,31 @@ def fetch_latest_ranks():
     Ignores older runs to ensure 'dropped' stocks reset to Unranked.
     Supports Alphanumeric ranks (A1, B10).
     """
-    for attempt in range(3):
-        try:
-            client = get_client()
-            if not client: return {}
-            try: sheet = client.open(SHEET_NAME).worksheet(SENIOR_DECISIONS_TAB)
-            except: return {} 
-            
-            records = safe_read_sheet(sheet)
-            if not records: return {}
-            
-            # 1. Sort by Date Descending (Newest first)
-            sorted_records = sorted(records, key=lambda x: robust_parse_date(x.get('Date', '')), reverse=True)
-            
-            if not sorted_records: return {}
-
-            # 2. Identify the Timestamp of the "Previous Run"
-            # We assume the first record represents the latest batch.
-            latest_run_date = sorted_records[0].get('Date')
+    try:
+        # Only the rows of the newest run: a stock dropped yesterday must not keep a rank from 2 days ago.
+        if sheet_mirror.refresh(sheet_mirror.SENIOR_DECISIONS):
+            latest_run = sheet_mirror.latest_batch(sheet_mirror.SENIOR_DECISIONS)
+        else:
+            # No local mirror: read Date/Ticker/Rank from the bottom of the sheet up to the previous run
+            try:
+                latest_run = sheet_query.tail_batch(SENIOR_DECISIONS_TAB, "Date", ["Ticker", "Rank"])
+            except gspread.WorksheetNotFound:
+                return {}
+        if not latest_run: return {}
+        latest_run_date = latest_run[0].get('Date')
+
+        rank_map = {}
+        for r in latest_run:
+            ticker = r.get('Ticker')
+            rank = r.get('Rank') # Keep as String (e.g., "A1", "B10")
             
-            rank_map = {}
-            for r in sorted_records:
-                # 3. STRICT BARRIER: Stop if we hit an older batch
-                # This ensures we don't accidentally pull a rank from 2 days ago for a stock that was dropped yesterday.
-                if r.get('Date') != latest_run_date:
-                    break 
-
-                ticker = r.get('Ticker')
-                rank = r.get('Rank') # Keep as String (e.g., "A1", "B10")
-                
-                if ticker and ticker not in rank_map:
-                    # Do NOT cast to int. We need "A1".
-                    rank_map[ticker] = rank
+            if ticker and ticker not in rank_map:
+                # Do NOT cast to int. We need "A1".
+                rank_map[ticker] = rank
 
-            print(f"   ✅ [MEMORY] Loaded Context from {latest_run_date}: {len(rank_map)} ranked tickers.")
-            return rank_map
+        print(f"   ✅ [MEMORY] Loaded Context from {latest_run_date}: {len(rank_map)} ranked tickers.")
+        return rank_map
 
-        except Exception as e:
-            print(f"   ⚠️ Memory Fetch Error: {e}")
-            time.sleep(1)
-    return {}
\ No newline at end of file
+    except Exception as e:
+        print(f"   ⚠️ Memory Fetch Error: {e}")
+    return {}
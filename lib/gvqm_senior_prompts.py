@@ -38,6 +38,7 @@ Perform a **Portfolio Review** (valid for Intraday or End-of-Day):
 * **`shares_held` == 0 AND `pending_buy_limit` is None**: This is a NEW IDEA. (Status: New).
 * **`current_price`**: The Real-Time Market Price. **TRUST THIS OVER REPORT TEXT.**
 * **`previous_rank`**: The rank this stock held in the **MOST RECENT STRATEGY RUN**.
+* **`technicals`**: Precomputed indicators from our own price data (`distance_pct` vs 250 SMA, `rsi`, `drawdown_52w_pct`, `atr_pct`, `volume_spike`). Use these instead of searching for them.
    
 
 
@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import sqlite3
+import datetime
+import threading
+import gspread
+import config
+import lib.gvqm_sheets_session as sheets_session
+
+# ==========================================================
+#  🗄️ LOCAL SQLITE MIRROR OF THE GOOGLE SHEETS HISTORY
+# ==========================================================
+# Google Sheets stays the durable, human-facing copy. Every history read
+# goes to a local SQLite replica instead of pulling whole worksheets:
+#   - each tab has a watermark (last sheet row already mirrored); a sync
+#     only fetches rows below it (one ranged read per tab)
+#   - writers call mark_dirty(tab) so the next read picks up their rows;
+#     otherwise a tab is re-synced at most every MIN_SYNC_SECONDS
+#   - the sheets are treated as append-only; a full rebuild every
+#     FULL_RESYNC_HOURS picks up manual edits / deleted rows
+# Rows are indexed by date and ticker, so reads are local queries.
+# Sheet reads (and retry sleeps) run outside the mirror lock: a per-tab
+# lock serializes syncs of one tab, while queries and other tabs proceed.
+
+DB_PATH = getattr(config, 'SHEETS_MIRROR_PATH', "data/sheets_mirror.db")
+MIN_SYNC_SECONDS = getattr(config, 'SHEETS_MIRROR_MIN_SYNC_SECONDS', 300)
+FULL_RESYNC_HOURS = getattr(config, 'SHEETS_MIRROR_FULL_RESYNC_HOURS', 24)
+LAST_COLUMN = "ZZ"
+
+# Tab names. REPORTS is the Junior's first worksheet (opened as sheet1).
+REPORTS = sheets_session.FIRST_SHEET
+STRATEGY = getattr(config, 'GOOGLE_SHEET_STRATEGY_TAB', "Strategy_Brief")
+SENIOR_DECISIONS = getattr(config, 'GOOGLE_SHEET_SENIOR_DECISIONS_TAB', "Senior_Decisions")
+TRADE_LOG = "Trade_Log"
+MIRRORED_TABS = [REPORTS, STRATEGY, SENIOR_DECISIONS, TRADE_LOG]
+
+DATE_FORMATS = ["%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%m/%d/%Y %H:%M", "%m/%d/%Y"]
+DATE_COLUMNS = ["Date", "Timestamp"]
+
+_lock = threading.RLock()      # SQLite connection + _dirty
+_tab_locks = {}                # tab -> Lock held while that tab syncs
+_conn = None
+_dirty = set()
+
+def log_mirror(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [SHEET_MIRROR] {message}")
+
+# --- HELPERS ---
+def parse_date(date_str):
+    date_str = str(date_str).strip()
+    if not date_str: return datetime.datetime(1900, 1, 1)
+    for fmt in DATE_FORMATS:
+        try: return datetime.datetime.strptime(date_str, fmt)
+        except ValueError: continue
+    return datetime.datetime(1900, 1, 1)
+
+def clean_headers(headers):
+    """Blank headers become "Unknown", duplicates get a _1, _2... suffix."""
+    cleaned, counts = [], {}
+    for h in headers:
+        h_str = str(h).strip() or "Unknown"
+        if h_str in counts:
+            counts[h_str] += 1
+            cleaned.append(f"{h_str}_{counts[h_str]}")
+        else:
+            counts[h_str] = 0
+            cleaned.append(h_str)
+    return cleaned
+
+def _column(headers, names):
+    for name in names:
+        if name in headers: return headers.index(name)
+    return None
+
+# --- DATABASE ---
+def _db():
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
+        _conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        _conn.executescript("""
+            CREATE TABLE IF NOT EXISTS rows (
+                tab TEXT NOT NULL, row_num INTEGER NOT NULL,
+                date_key TEXT, ticker TEXT, cells TEXT NOT NULL,
+                PRIMARY KEY (tab, row_num));
+            CREATE INDEX IF NOT EXISTS rows_by_date ON rows (tab, date_key);
+            CREATE INDEX IF NOT EXISTS rows_by_ticker ON rows (tab, ticker, row_num);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                tab TEXT PRIMARY KEY, headers TEXT, watermark INTEGER,
+                synced_at REAL, full_synced_at REAL);
+        """)
+    return _conn
+
+def _state(tab):
+    row = _db().execute("SELECT headers, watermark, synced_at, full_synced_at FROM sync_state WHERE tab = ?", (tab,)).fetchone()
+    if not row: return None
+    return {"headers": json.loads(row[0]), "watermark": row[1], "synced_at": row[2], "full_synced_at": row[3]}
+
+# --- SYNC ---
+def mark_dirty(tab):
+    """Call after appending to a tab, so the next read re-syncs it."""
+    with _lock: _dirty.add(tab)
+
+def _tab_lock(tab):
+    with _lock: return _tab_locks.setdefault(tab, threading.Lock())
+
+def _fetch(tab, state):
+    """Reads the rows appended since the watermark (everything when a full rebuild is due). No DB access."""
+    full = state is None or time.time() - (state["full_synced_at"] or 0) > FULL_RESYNC_HOURS * 3600
+    start = 1 if full else state["watermark"] + 1
+    sheet, _ = sheets_session.worksheet(tab, create=False)
+    return full, start, sheet.get(f"A{start}:{LAST_COLUMN}")
+
+def _apply(tab, state, full, start, values):
+    """Upserts fetched rows and moves the watermark (caller holds _lock)."""
+    now = time.time()
+    db = _db()
+    with db:
+        if full:
+            raw_headers = [str(h) for h in values[0]] if values else []
+            rows, first_row = values[1:], 2
+            db.execute("DELETE FROM rows WHERE tab = ?", (tab,))
+        else:
+            raw_headers = state["headers"]
+            rows, first_row = values, start
+
+        headers = clean_headers(raw_headers)
+        date_col, ticker_col = _column(headers, DATE_COLUMNS), _column(headers, ["Ticker"])
+        batch = []
+        for offset, row in enumerate(rows):
+            if not any(str(c).strip() for c in row): continue
+            date_key = parse_date(row[date_col]).strftime("%Y-%m-%d %H:%M:%S") if date_col is not None and date_col < len(row) else None
+            ticker = str(row[ticker_col]).upper().strip() if ticker_col is not None and ticker_col < len(row) else None
+            batch.append((tab, first_row + offset, date_key, ticker, json.dumps(row)))
+        db.executemany("INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?)", batch)
+
+        watermark = (first_row + len(rows) - 1) if rows else (start - 1 if not full else (1 if values else 0))
+        db.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?)",
+                   (tab, json.dumps(raw_headers), watermark, now, now if full else state["full_synced_at"]))
+    log_mirror(f"{'Rebuilt' if full else 'Synced'} '{tab}': {len(batch)} new rows (watermark row {watermark}).")
+
+def refresh(tab, force=False):
+    """
+    Brings the local copy of `tab` up to date when needed.
+    Returns True when the mirror can serve the tab (fresh, or stale but
+    present because Sheets is unreachable), False when it has never synced.
+    """
+    with _tab_lock(tab):
+        with _lock:
+            try:
+                state = _state(tab)
+            except (sqlite3.Error, OSError) as e:
+                log_mirror(f"⚠️ Mirror database error: {e}")
+                return False
+            fresh = state and tab not in _dirty and time.time() - (state["synced_at"] or 0) < MIN_SYNC_SECONDS
+            if fresh and not force: return True
+            # Cleared before the read, so rows appended while it runs re-dirty the tab
+            was_dirty = tab in _dirty
+            _dirty.discard(tab)
+
+        for attempt in range(3):
+            try:
+                if not sheets_session.get_client(): break
+                fetched = _fetch(tab, state)
+                with _lock: _apply(tab, state, *fetched)
+                return True
+            except gspread.WorksheetNotFound:
+                break
+            except Exception as e:
+                log_mirror(f"⚠️ Sync Error for '{tab}' (Attempt {attempt+1}/3): {e}")
+                sheets_session.reset(tab if attempt == 0 else None)
+                time.sleep(2)
+
+        if was_dirty: mark_dirty(tab)
+        if state: log_mirror(f"⚠️ Serving '{tab}' from the local mirror (last sync failed).")
+        return state is not None
+
+def sync_all():
+    """Syncs every mirrored tab (e.g. at the end of a pipeline run)."""
+    for tab in MIRRORED_TABS:
+        refresh(tab)
+
+# --- QUERIES ---
+def _to_records(tab, rows):
+    state = _state(tab)
+    headers = clean_headers(state["headers"]) if state else []
+    records = []
+    for (cells,) in rows:
+        row = json.loads(cells)
+        if len(row) < len(headers): row += [''] * (len(headers) - len(row))
+        records.append(dict(zip(headers, row)))
+    return records
+
+def records(tab, since=None, tickers=None):
+    """
+    Rows of `tab` as header-keyed dicts, newest first (same-date rows keep
+    sheet order). `since` is a datetime lower bound; `tickers` limits to those tickers.
+    """
+    query, params = "SELECT cells FROM rows WHERE tab = ?", [tab]
+    if since is not None:
+        query += " AND date_key >= ?"
+        params.append(since.strftime("%Y-%m-%d %H:%M:%S"))
+    if tickers is not None:
+        tickers = [str(t).upper().strip() for t in tickers]
+        query += f" AND ticker IN ({','.join('?' * len(tickers))})"
+        params.extend(tickers)
+    query += " ORDER BY date_key DESC, row_num ASC"
+    with _lock:
+        return _to_records(tab, _db().execute(query, params).fetchall())
+
+def latest_by_ticker(tab):
+    """{ticker: newest row (by sheet position)} for every ticker in `tab`."""
+    query = ("SELECT r.ticker, r.cells FROM rows r JOIN "
+             "(SELECT ticker, MAX(row_num) AS row_num FROM rows WHERE tab = ? AND ticker != '' GROUP BY ticker) last "
+             "ON r.ticker = last.ticker AND r.row_num = last.row_num WHERE r.tab = ?")
+    with _lock:
+        rows = _db().execute(query, (tab, tab)).fetchall()
+        return dict(zip([t for t, _ in rows], _to_records(tab, [(c,) for _, c in rows])))
+
+def latest_batch(tab):
+    """All rows sharing the newest date in `tab` (one Senior run), in sheet order."""
+    query = ("SELECT cells FROM rows WHERE tab = ? AND date_key = "
+             "(SELECT MAX(date_key) FROM rows WHERE tab = ?) ORDER BY row_num")
+    with _lock:
+        return _to_records(tab, _db().execute(query, (tab, tab)).fetchall())
@@ -0,0 +1,98 @@
+import datetime
+import threading
+import config
+import lib.gvqm_sheets_session as sheets_session
+import lib.gvqm_sheet_mirror as sheet_mirror
+
+# ==========================================================
+#  🎯 COLUMN-PROJECTED SHEETS QUERIES
+# ==========================================================
+# Reads only the columns (and rows) a lookup needs, with one batch_get per
+# request, instead of get_all_values() on the whole worksheet:
+#   read_columns() -> e.g. just Date + Ticker for the cooldown map
+#   tail_batch()   -> finds the last filled row from one column, then walks
+#                     up in TAIL_CHUNK_ROWS steps and stops at the first row
+#                     of an older batch (fallback for rank lookups when the
+#                     local mirror is unavailable)
+# Header rows are read once per tab and cached.
+
+TAIL_CHUNK_ROWS = getattr(config, 'SHEETS_TAIL_CHUNK_ROWS', 200)
+
+_lock = threading.Lock()
+_columns = {}  # tab -> {clean header: column letter}
+
+def log_query(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [SHEET_QUERY] {message}")
+
+def _letter(index):
+    """0 -> A, 25 -> Z, 26 -> AA"""
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+def column_letters(tab):
+    with _lock:
+        if tab not in _columns:
+            sheet, _ = sheets_session.worksheet(tab, create=False)
+            headers = sheet_mirror.clean_headers(sheet.row_values(1))
+            _columns[tab] = {name: _letter(i) for i, name in enumerate(headers)}
+        return _columns[tab]
+
+def reset(tab=None):
+    with _lock:
+        if tab: _columns.pop(tab, None)
+        else: _columns.clear()
+
+def read_columns(tab, names, start_row=2, end_row=None):
+    """
+    [(row_number, {name: value})] for rows start_row..end_row (None = to the
+    end of the sheet), fetching only the `names` columns in one batch_get.
+    """
+    letters = column_letters(tab)
+    missing = [n for n in names if n not in letters]
+    if missing: raise KeyError(f"'{tab}' has no column(s): {', '.join(missing)}")
+
+    sheet, _ = sheets_session.worksheet(tab, create=False)
+    end = end_row or ""
+    results = sheet.batch_get([f"{letters[n]}{start_row}:{letters[n]}{end}" for n in names])
+
+    length = max((len(r) for r in results), default=0)
+    rows = []
+    for i in range(length):
+        row = {name: (res[i][0] if i < len(res) and res[i] else '') for name, res in zip(names, results)}
+        rows.append((start_row + i, row))
+    return rows
+
+def tail_batch(tab, key, names, chunk=TAIL_CHUNK_ROWS):
+    """
+    The rows at the bottom of `tab` that share the last row's `key` value
+    (e.g. every decision of the newest Senior run), in sheet order.
+    """
+    names = list(dict.fromkeys([key] + list(names)))
+    sheet, _ = sheets_session.worksheet(tab, create=False)
+    # Start at the last non-empty row, not the grid size (tabs are pre-sized with blank rows)
+    key_index = list(column_letters(tab)).index(key) + 1
+    last_row = len(sheet.col_values(key_index))
+    if last_row < 2: return []
+    lo, hi = max(2, last_row - chunk + 1), last_row
+    batch, boundary, reads = [], None, 1
+
+    while True:
+        rows = read_columns(tab, names, lo, hi)
+        reads += 1
+        for _, row in reversed(rows):
+            if not any(str(v).strip() for v in row.values()): continue
+            if boundary is None: boundary = row[key]
+            if row[key] != boundary:
+                log_query(f"'{tab}' tail: {len(batch)} rows of the latest batch in {reads} reads.")
+                return batch[::-1]
+            batch.append(row)
+        if lo <= 2: break
+        hi, lo = lo - 1, max(2, lo - chunk)
+
+    log_query(f"'{tab}' tail: {len(batch)} rows (whole sheet) in {reads} reads.")
+    return batch[::-1]
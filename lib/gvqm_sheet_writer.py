@@ -0,0 +1,94 @@
+import time
+import atexit
+import datetime
+import threading
+import config
+import lib.gvqm_sheet_mirror as sheet_mirror
+import lib.gvqm_sheets_session as sheets_session
+
+# ==========================================================
+#  📤 BUFFERED GOOGLE SHEETS WRITER
+# ==========================================================
+# Log rows are buffered per worksheet and written with one append_rows call
+# per tab, instead of one append_row (plus a spreadsheet open and header
+# check) per row. A tab flushes when FLUSH_ROWS are waiting or its oldest
+# row is FLUSH_SECONDS old. The pipeline flushes everything at the end of
+# each phase. Failed flushes back off and retry; rows that still could not
+# be written stay buffered for the next flush (and the exit hook).
+
+FLUSH_ROWS = getattr(config, 'SHEETS_WRITER_FLUSH_ROWS', 50)
+FLUSH_SECONDS = getattr(config, 'SHEETS_WRITER_FLUSH_SECONDS', 120)
+MAX_ATTEMPTS = 4
+BACKOFF_SECONDS = 2  # 2s, 4s, 8s between attempts
+
+_lock = threading.RLock()
+_buffers = {}          # tab -> {"rows", "headers", "size", "since"}
+_checked_headers = set()
+stats = {"rows": 0, "flushes": 0, "failed_flushes": 0}
+
+def log_writer(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [SHEET_WRITER] {message}")
+
+def append(tab, row, headers=None, size=(1000, 20)):
+    """
+    Queues one row for `tab` (sheet_mirror.REPORTS = the first worksheet).
+    `headers` is written first when the tab is missing or empty; `size` is
+    the (rows, cols) grid used when the tab has to be created.
+    """
+    with _lock:
+        buffer = _buffers.setdefault(tab, {"rows": [], "headers": headers, "size": size, "since": time.time()})
+        if not buffer["rows"]: buffer["since"] = time.time()
+        buffer["rows"].append(list(row))
+        due = len(buffer["rows"]) >= FLUSH_ROWS or time.time() - buffer["since"] >= FLUSH_SECONDS
+    if due: flush(tab)
+
+def pending(tab=None):
+    with _lock:
+        if tab: return len(_buffers.get(tab, {}).get("rows", []))
+        return sum(len(b["rows"]) for b in _buffers.values())
+
+def _write(tab, buffer, rows):
+    # New tabs get their headers from the session; existing ones are checked once per process
+    sheet, created = sheets_session.worksheet(tab, headers=buffer["headers"], size=buffer["size"])
+    if buffer["headers"] and not created and tab not in _checked_headers:
+        if not sheet.row_values(1): rows = [buffer["headers"]] + rows
+    sheet.append_rows(rows)
+    _checked_headers.add(tab)
+
+def flush(tab=None):
+    """Writes the buffered rows of `tab` (or of every tab). Returns True when nothing is left pending."""
+    tabs = [tab] if tab else list(_buffers)
+    ok = True
+    for name in tabs:
+        with _lock:
+            buffer = _buffers.get(name)
+            if not buffer or not buffer["rows"]: continue
+            rows, buffer["rows"] = buffer["rows"], []
+
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                _write(name, buffer, rows)
+                sheet_mirror.mark_dirty(name)
+                with _lock:
+                    stats["rows"] += len(rows)
+                    stats["flushes"] += 1
+                log_writer(f"Wrote {len(rows)} rows to '{name}' in one request.")
+                break
+            except Exception as e:
+                if attempt == MAX_ATTEMPTS - 1:
+                    with _lock:
+                        buffer["rows"][:0] = rows  # Keep them (in order) for the next flush
+                        stats["failed_flushes"] += 1
+                    log_writer(f"❌ Could not write {len(rows)} rows to '{name}': {e}. Keeping them buffered.")
+                    ok = False
+                    break
+                wait = BACKOFF_SECONDS * 2 ** attempt
+                log_writer(f"⚠️ Flush Error for '{name}' (Attempt {attempt+1}/{MAX_ATTEMPTS}): {e}. Retrying in {wait}s...")
+                sheets_session.reset(name if attempt == 0 else None)
+                time.sleep(wait)
+    return ok
+
+@atexit.register
+def _flush_on_exit():
+    if pending(): flush()
@@ -0,0 +1,102 @@
+import os
+import json
+import datetime
+import threading
+import gspread
+from google.oauth2.service_account import Credentials
+import config
+
+# ==========================================================
+#  🔑 SHARED GOOGLE SHEETS SESSION
+# ==========================================================
+# One authorized gspread client per process (instead of re-parsing the
+# service-account JSON and calling gspread.authorize on every log/read),
+# plus cached spreadsheet and worksheet handles, so the Drive lookup behind
+# client.open() and the worksheet metadata fetch happen once.
+# The access token is refreshed by google-auth whenever it expires; after
+# an error callers use reset() so the next call re-opens (or re-authorizes).
+
+SHEET_NAME = getattr(config, 'GOOGLE_SHEET_NAME', "TradingBot_History")
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets',
+    'https://www.googleapis.com/auth/drive'
+]
+FIRST_SHEET = "sheet1"  # Tab key for the first worksheet (Junior reports)
+
+_lock = threading.RLock()
+_client = None
+_spreadsheet = None
+_worksheets = {}
+
+def log_session(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [SHEETS] {message}")
+
+def _credentials_json():
+    creds_json = os.getenv("GOOGLE_SHEETS_CREDENTIALS")
+    if creds_json: return creds_json
+    if os.path.exists("google_credentials.json"):
+        try:
+            with open("google_credentials.json") as f: return f.read()
+        except OSError: return None
+    return None
+
+def get_client():
+    """The process-wide authorized client (None when credentials are missing or invalid)."""
+    global _client
+    with _lock:
+        if _client is None:
+            creds_json = _credentials_json()
+            if not creds_json: return None
+            try:
+                creds = Credentials.from_service_account_info(json.loads(creds_json), scopes=SCOPES)
+                _client = gspread.authorize(creds)
+            except Exception as e:
+                log_session(f"⚠️ Auth Error: {e}")
+                return None
+        return _client
+
+def spreadsheet():
+    """Cached handle of SHEET_NAME (raises when Sheets is unreachable)."""
+    global _spreadsheet
+    with _lock:
+        if _spreadsheet is None:
+            client = get_client()
+            if not client: raise RuntimeError("No Google Sheets client (missing credentials?)")
+            _spreadsheet = client.open(SHEET_NAME)
+        return _spreadsheet
+
+def worksheet(tab, headers=None, size=(1000, 20), create=True):
+    """
+    Cached worksheet handle. Returns (worksheet, created).
+    Missing tabs are created with `size` (rows, cols) and `headers` as row 1
+    unless create=False, in which case gspread.WorksheetNotFound is raised.
+    """
+    with _lock:
+        if tab in _worksheets: return _worksheets[tab], False
+        sh = spreadsheet()
+        created = False
+        if tab == FIRST_SHEET:
+            ws = sh.sheet1
+        else:
+            try:
+                ws = sh.worksheet(tab)
+            except gspread.WorksheetNotFound:
+                if not create: raise
+                rows, cols = size
+                ws = sh.add_worksheet(title=tab, rows=rows, cols=cols)
+                if headers: ws.append_row(headers)
+                created = True
+                log_session(f"Created worksheet '{tab}'.")
+        _worksheets[tab] = ws
+        return ws, created
+
+def reset(tab=None):
+    """Drops cached handles (one tab, or everything incl. the client) after an error."""
+    global _client, _spreadsheet
+    with _lock:
+        if tab:
+            _worksheets.pop(tab, None)
+            return
+        _client, _spreadsheet = None, None
+        _worksheets.clear()
@@ -0,0 +1,306 @@
+import time
+import uuid
+import random
+import datetime
+import threading
+from types import SimpleNamespace
+from alpaca.trading.enums import OrderSide, OrderType, OrderClass, OrderStatus, QueryOrderStatus
+
+# ==========================================================
+#  🧪 IN-MEMORY SIMULATED ALPACA BACKEND
+# ==========================================================
+# Drop-in stand-in for TradingClient / StockHistoricalDataClient covering the
+# calls this bot makes. It models:
+#   - bracket orders (parent BUY + TP/SL legs 'held' until the parent fills)
+#   - OCO exits (TP limit parent + SL stop leg, one cancels the other)
+#   - fills against a supplied price path (advance with step())
+#   - replaces (new order id, old one 'replaced'), cancels that settle after
+#     `settle_seconds`, shares locked by open exit orders (qty_available)
+#   - per-call latency and random / scripted error injection
+# Trade updates are pushed to `on_update(symbol, order_id, event, status)`.
+
+OPEN_STATUSES = [OrderStatus.NEW, OrderStatus.ACCEPTED, OrderStatus.HELD, OrderStatus.PARTIALLY_FILLED, OrderStatus.PENDING_CANCEL]
+
+class SimulatedBrokerError(Exception):
+    pass
+
+def log_sim(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [SIM_BROKER] {message}")
+
+class SimBroker:
+    def __init__(self, cash=100000.0, latency=0.0, jitter=0.0, error_rate=0.0, settle_seconds=0.0, seed=None):
+        self.cash = float(cash)
+        self.latency, self.jitter = latency, jitter
+        self.error_rate = error_rate
+        self.settle_seconds = settle_seconds
+        self.on_update = None
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self._orders = {}       # id -> order (top-level AND legs)
+        self._positions = {}    # symbol -> {"qty", "avg_entry"}
+        self._paths = {}        # symbol -> [prices]
+        self._step = 0
+        self._cancel_due = {}   # id -> time the cancel settles
+        self._fail_next = {}    # method -> remaining scripted failures
+        self.price_fallback = None  # fn(symbol) -> price, for symbols without a path
+        self.calls = {}         # method -> count
+
+    # --- SCENARIO CONTROL ---
+    def set_prices(self, paths):
+        """paths: {symbol: [p0, p1, ...]}. step() walks forward along them."""
+        with self._lock:
+            self._paths.update({s: [float(p) for p in ps] for s, ps in paths.items()})
+            self._match()
+
+    def step(self, n=1):
+        with self._lock:
+            for _ in range(n):
+                self._step += 1
+                self._match()
+
+    def fail_next(self, method, times=1):
+        """The next `times` calls of `method` raise SimulatedBrokerError."""
+        with self._lock: self._fail_next[method] = self._fail_next.get(method, 0) + times
+
+    def seed_position(self, symbol, qty, avg_entry):
+        with self._lock: self._positions[symbol] = {"qty": float(qty), "avg_entry": float(avg_entry)}
+
+    def price(self, symbol):
+        path = self._paths.get(symbol)
+        if path: return path[min(self._step, len(path) - 1)]
+        if self.price_fallback:
+            try: return self.price_fallback(symbol)
+            except Exception: return None
+        return None
+
+    def history(self, symbol):
+        path = self._paths.get(symbol)
+        return path[:self._step + 1] if path else []
+
+    # --- INTERNALS ---
+    def _call(self, method):
+        """Latency + error injection, then settles/matches so every read is current."""
+        delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0: time.sleep(delay)
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            if self._fail_next.get(method, 0) > 0:
+                self._fail_next[method] -= 1
+                raise SimulatedBrokerError(f"scripted {method} failure")
+            if self.error_rate and self._rng.random() < self.error_rate:
+                raise SimulatedBrokerError(f"random {method} failure")
+            self._settle()
+            self._match()
+
+    def _emit(self, order, event):
+        if self.on_update:
+            try: self.on_update(order.symbol, order.id, event, order.status.value)
+            except Exception as e: log_sim(f"⚠️ on_update failed: {e}")
+
+    def _new_order(self, symbol, qty, side, type, limit_price=None, stop_price=None, order_class=OrderClass.SIMPLE, status=OrderStatus.NEW, parent_id=None):
+        order = SimpleNamespace(
+            id=uuid.uuid4(), symbol=symbol, qty=float(qty), side=side, type=type, order_class=order_class,
+            limit_price=float(limit_price) if limit_price else None, stop_price=float(stop_price) if stop_price else None,
+            status=status, legs=[], parent_id=parent_id, filled_qty=0.0, filled_avg_price=None,
+            submitted_at=datetime.datetime.now(datetime.timezone.utc))
+        self._orders[order.id] = order
+        return order
+
+    def _get(self, order_id):
+        order = self._orders.get(order_id) or next((o for o in self._orders.values() if str(o.id) == str(order_id)), None)
+        if order is None: raise SimulatedBrokerError(f"order not found: {order_id}")
+        return order
+
+    def _group(self, order):
+        """The order's bracket/OCO family (root + legs)."""
+        root = self._orders[order.parent_id] if order.parent_id else order
+        return [root] + root.legs
+
+    def _is_open(self, order):
+        return order.status in OPEN_STATUSES
+
+    def _settle(self):
+        now = time.monotonic()
+        for order_id, due in list(self._cancel_due.items()):
+            if due <= now:
+                order = self._orders[order_id]
+                del self._cancel_due[order_id]
+                if order.status == OrderStatus.PENDING_CANCEL:
+                    order.status = OrderStatus.CANCELED
+                    self._emit(order, "canceled")
+
+    def _fill(self, order, price):
+        order.status = OrderStatus.FILLED
+        order.filled_qty, order.filled_avg_price = order.qty, price
+        pos = self._positions.setdefault(order.symbol, {"qty": 0.0, "avg_entry": 0.0})
+        if order.side == OrderSide.BUY:
+            total = pos["qty"] + order.qty
+            pos["avg_entry"] = (pos["qty"] * pos["avg_entry"] + order.qty * price) / total
+            pos["qty"] = total
+            self.cash -= order.qty * price
+            for leg in order.legs:
+                if leg.status == OrderStatus.HELD: leg.status = OrderStatus.NEW
+        else:
+            pos["qty"] -= order.qty
+            self.cash += order.qty * price
+            if pos["qty"] <= 1e-9: del self._positions[order.symbol]
+            for sibling in self._group(order):
+                if sibling is not order and self._is_open(sibling):
+                    sibling.status = OrderStatus.CANCELED
+                    self._emit(sibling, "canceled")
+        self._emit(order, "fill")
+
+    def _match(self):
+        for order in list(self._orders.values()):
+            if order.status not in [OrderStatus.NEW, OrderStatus.ACCEPTED]: continue
+            price = self.price(order.symbol)
+            if price is None: continue
+            if order.side == OrderSide.BUY:
+                if order.type == OrderType.MARKET or price <= order.limit_price:
+                    self._fill(order, price if order.type == OrderType.MARKET else min(price, order.limit_price))
+            elif order.type == OrderType.LIMIT and price >= order.limit_price:
+                self._fill(order, max(price, order.limit_price))
+            elif order.type in [OrderType.STOP, OrderType.STOP_LIMIT] and price <= order.stop_price:
+                self._fill(order, price)
+
+    def _qty_locked(self, symbol):
+        """Shares reserved by open exit orders (one OCO family counts once)."""
+        families = {}
+        for o in self._orders.values():
+            if o.symbol == symbol and o.side == OrderSide.SELL and o.status in [OrderStatus.NEW, OrderStatus.ACCEPTED, OrderStatus.PENDING_CANCEL]:
+                key = o.parent_id or o.id
+                families[key] = max(families.get(key, 0.0), o.qty)
+        return sum(families.values())
+
+    def _position_view(self, symbol):
+        pos = self._positions[symbol]
+        price = self.price(symbol) or pos["avg_entry"]
+        return SimpleNamespace(
+            symbol=symbol, qty=str(pos["qty"]), qty_available=str(pos["qty"] - self._qty_locked(symbol)),
+            avg_entry_price=str(pos["avg_entry"]), current_price=str(price),
+            market_value=str(pos["qty"] * price), unrealized_pl=str((price - pos["avg_entry"]) * pos["qty"]))
+
+    # --- TRADING CLIENT API ---
+    def get_account(self):
+        self._call("get_account")
+        with self._lock:
+            equity = self.cash + sum(p["qty"] * (self.price(s) or p["avg_entry"]) for s, p in self._positions.items())
+            return SimpleNamespace(cash=str(self.cash), equity=str(equity), buying_power=str(self.cash))
+
+    def get_all_positions(self):
+        self._call("get_all_positions")
+        with self._lock: return [self._position_view(s) for s in self._positions]
+
+    def get_open_position(self, symbol):
+        self._call("get_open_position")
+        with self._lock:
+            if symbol not in self._positions: raise SimulatedBrokerError("position does not exist")
+            return self._position_view(symbol)
+
+    def get_orders(self, filter=None):
+        self._call("get_orders")
+        status = getattr(filter, 'status', None) or QueryOrderStatus.OPEN
+        symbols = getattr(filter, 'symbols', None)
+        nested = getattr(filter, 'nested', False)
+        limit = getattr(filter, 'limit', None) or 50
+        with self._lock:
+            orders = [o for o in self._orders.values() if not symbols or o.symbol in symbols]
+            if nested: orders = [o for o in orders if not o.parent_id]
+            if status == QueryOrderStatus.OPEN: orders = [o for o in orders if self._is_open(o) or (nested and any(self._is_open(l) for l in o.legs))]
+            elif status == QueryOrderStatus.CLOSED: orders = [o for o in orders if not self._is_open(o)]
+            orders.sort(key=lambda o: o.submitted_at, reverse=True)
+            return orders[:limit]
+
+    def get_order_by_id(self, order_id):
+        self._call("get_order_by_id")
+        with self._lock: return self._get(order_id)
+
+    def submit_order(self, order_data):
+        self._call("submit_order")
+        with self._lock:
+            symbol, qty, side = order_data.symbol, float(order_data.qty), order_data.side
+            order_class = getattr(order_data, 'order_class', None) or OrderClass.SIMPLE
+            limit_price = getattr(order_data, 'limit_price', None)
+            order_type = getattr(order_data, 'type', None) or (OrderType.LIMIT if limit_price else OrderType.MARKET)
+
+            if side == OrderSide.SELL:
+                held = self._positions.get(symbol, {}).get("qty", 0.0)
+                if qty > held - self._qty_locked(symbol) + 1e-9:
+                    raise SimulatedBrokerError(f"insufficient qty available for order (requested: {qty}, available: {held - self._qty_locked(symbol)})")
+
+            tp = getattr(order_data, 'take_profit', None)
+            sl = getattr(order_data, 'stop_loss', None)
+            parent = self._new_order(symbol, qty, side, order_type, limit_price=limit_price, order_class=order_class)
+
+            if order_class == OrderClass.BRACKET:
+                leg_status = OrderStatus.HELD
+                parent.legs.append(self._new_order(symbol, qty, OrderSide.SELL, OrderType.LIMIT, limit_price=tp.limit_price, order_class=order_class, status=leg_status, parent_id=parent.id))
+                parent.legs.append(self._new_order(symbol, qty, OrderSide.SELL, OrderType.STOP, stop_price=sl.stop_price, order_class=order_class, status=leg_status, parent_id=parent.id))
+            elif order_class == OrderClass.OCO:
+                # Alpaca: the parent IS the take-profit limit, the stop rides as its leg
+                parent.legs.append(self._new_order(symbol, qty, OrderSide.SELL, OrderType.STOP, stop_price=sl.stop_price, order_class=order_class, parent_id=parent.id))
+
+            self._emit(parent, "new")
+            self._match()
+            return parent
+
+    def cancel_order_by_id(self, order_id):
+        self._call("cancel_order_by_id")
+        with self._lock:
+            order = self._get(order_id)
+            if not self._is_open(order): raise SimulatedBrokerError(f"order is already in \"{order.status.value}\" state")
+            # Cancelling any member of a bracket/OCO family cancels the family
+            targets = [o for o in self._group(order) if self._is_open(o)] if (order.parent_id or order.legs) else [order]
+            for o in targets:
+                if o.status == OrderStatus.PENDING_CANCEL: continue  # Already dying
+                if self.settle_seconds > 0:
+                    o.status = OrderStatus.PENDING_CANCEL
+                    self._cancel_due[o.id] = time.monotonic() + self.settle_seconds
+                    self._emit(o, "pending_cancel")
+                else:
+                    o.status = OrderStatus.CANCELED
+                    self._emit(o, "canceled")
+
+    def replace_order_by_id(self, order_id, order_data):
+        self._call("replace_order_by_id")
+        with self._lock:
+            old = self._get(order_id)
+            if old.status not in [OrderStatus.NEW, OrderStatus.ACCEPTED, OrderStatus.HELD]:
+                raise SimulatedBrokerError(f"order is not replaceable in \"{old.status.value}\" state")
+            new = self._new_order(
+                old.symbol, getattr(order_data, 'qty', None) or old.qty, old.side, old.type,
+                limit_price=getattr(order_data, 'limit_price', None) or old.limit_price,
+                stop_price=getattr(order_data, 'stop_price', None) or old.stop_price,
+                order_class=old.order_class, status=old.status, parent_id=old.parent_id)
+            new.legs = old.legs
+            for leg in new.legs: leg.parent_id = new.id
+            if old.parent_id:
+                parent = self._orders[old.parent_id]
+                parent.legs = [new if l is old else l for l in parent.legs]
+            old.status, old.legs = OrderStatus.REPLACED, []
+            self._emit(old, "replaced")
+            self._emit(new, "new")
+            self._match()
+            return new
+
+class SimDataClient:
+    """StockHistoricalDataClient stand-in that reads prices from a SimBroker."""
+    def __init__(self, broker):
+        self.broker = broker
+
+    def get_stock_latest_trade(self, request):
+        self.broker._call("get_stock_latest_trade")
+        symbols = request.symbol_or_symbols
+        if isinstance(symbols, str): symbols = [symbols]
+        with self.broker._lock:
+            prices = {s: self.broker.price(s) for s in symbols}
+        return {s: SimpleNamespace(symbol=s, price=p) for s, p in prices.items() if p is not None}
+
+    def get_stock_bars(self, request):
+        self.broker._call("get_stock_bars")
+        symbols = request.symbol_or_symbols
+        if isinstance(symbols, str): symbols = [symbols]
+        with self.broker._lock:
+            data = {s: [SimpleNamespace(symbol=s, close=p) for p in self.broker.history(s)] for s in symbols}
+        return SimpleNamespace(data={s: bars for s, bars in data.items() if bars})
@@ -0,0 +1,140 @@
+import os
+import io
+import json
+import datetime
+import threading
+import requests
+import pandas as pd
+import config
+
+# ==========================================================
+#  🌐 UNIVERSE RESOLVER (S&P 500 constituents)
+# ==========================================================
+# The constituent list is scraped from Wikipedia at most once per TTL and
+# persisted as a JSON snapshot. When the scrape fails we serve the last good
+# snapshot (even if expired) instead of shrinking the scan to a stub list,
+# and don't try Wikipedia again for RETRY_MINUTES.
+# Each row carries the Yahoo (BRK-B) and Alpaca (BRK.B) spelling so the
+# conversion is never recomputed downstream.
+
+WIKI_URL = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
+SNAPSHOT_PATH = getattr(config, 'UNIVERSE_SNAPSHOT_PATH', "data/sp500_universe.json")
+TTL_HOURS = getattr(config, 'UNIVERSE_TTL_HOURS', 24)
+RETRY_MINUTES = getattr(config, 'UNIVERSE_RETRY_MINUTES', 60)  # Backoff after a failed scrape
+FALLBACK = ['PGR', 'AMZN', 'META', 'CRM', 'LMT']  # Last resort only (no snapshot on disk)
+
+_lock = threading.Lock()
+_cache = {"fetched_at": None, "rows": [], "retry_after": None}
+_symbol_map = {}  # Any known spelling -> row
+
+def log_universe(message):
+    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] [UNIVERSE] {message}")
+
+def _make_row(symbol, name="", sector=""):
+    symbol = str(symbol).strip().upper()
+    return {
+        "symbol": symbol,
+        "yahoo": symbol.replace('.', '-'),
+        "alpaca": symbol.replace('-', '.'),
+        "name": name,
+        "sector": sector,
+    }
+
+def _scrape_wikipedia():
+    # Use requests with a browser header to avoid 403 Forbidden errors
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    }
+    response = requests.get(WIKI_URL, headers=headers, timeout=30)
+    response.raise_for_status()
+
+    table = pd.read_html(io.StringIO(response.text))[0]
+    rows = []
+    for _, r in table.iterrows():
+        rows.append(_make_row(r['Symbol'], r.get('Security', ''), r.get('GICS Sector', '')))
+    if len(rows) < 400:
+        raise ValueError(f"Parsed only {len(rows)} constituents, refusing to trust the scrape")
+    return rows
+
+def _read_snapshot():
+    if not os.path.exists(SNAPSHOT_PATH): return None
+    try:
+        with open(SNAPSHOT_PATH) as f:
+            data = json.load(f)
+        data["fetched_at"] = datetime.datetime.fromisoformat(data["fetched_at"])
+        return data
+    except Exception as e:
+        log_universe(f"⚠️ Snapshot unreadable ({e}).")
+        return None
+
+def _write_snapshot(rows, fetched_at):
+    os.makedirs(os.path.dirname(SNAPSHOT_PATH) or ".", exist_ok=True)
+    tmp_path = SNAPSHOT_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"fetched_at": fetched_at.isoformat(), "rows": rows}, f)
+    os.replace(tmp_path, SNAPSHOT_PATH)
+
+def _set_cache(fetched_at, rows, retry_after=None):
+    _cache.update({"fetched_at": fetched_at, "rows": rows, "retry_after": retry_after})
+    _symbol_map.clear()
+    for r in rows:
+        for key in (r["symbol"], r["yahoo"], r["alpaca"]):
+            _symbol_map[key] = r
+
+def _is_fresh(fetched_at):
+    if not fetched_at: return False
+    return datetime.datetime.now() - fetched_at < datetime.timedelta(hours=TTL_HOURS)
+
+def get_universe(force_refresh=False):
+    """
+    Returns the constituent table (list of row dicts).
+    Order: in-memory cache -> fresh disk snapshot -> Wikipedia -> stale snapshot -> fallback.
+    After a failed scrape the stale/fallback rows are served from memory until the retry backoff passes.
+    """
+    with _lock:
+        if not force_refresh and _is_fresh(_cache["fetched_at"]):
+            return _cache["rows"]
+        retry_after = _cache["retry_after"]
+        if not force_refresh and retry_after and datetime.datetime.now() < retry_after:
+            return _cache["rows"]
+
+        snapshot = _read_snapshot()
+        if not force_refresh and snapshot and _is_fresh(snapshot["fetched_at"]):
+            _set_cache(snapshot["fetched_at"], snapshot["rows"])
+            return _cache["rows"]
+
+        try:
+            rows = _scrape_wikipedia()
+            fetched_at = datetime.datetime.now()
+            _write_snapshot(rows, fetched_at)
+            _set_cache(fetched_at, rows)
+            log_universe(f"✅ Refreshed S&P 500 list from Wikipedia ({len(rows)} tickers).")
+            return rows
+        except Exception as e:
+            retry_after = datetime.datetime.now() + datetime.timedelta(minutes=RETRY_MINUTES)
+            if snapshot and snapshot["rows"]:
+                log_universe(f"⚠️ Scrape failed ({e}). Serving snapshot from {snapshot['fetched_at']:%Y-%m-%d %H:%M} ({len(snapshot['rows'])} tickers) until {retry_after:%H:%M}.")
+                _set_cache(snapshot["fetched_at"], snapshot["rows"], retry_after)
+                return _cache["rows"]
+            log_universe(f"❌ Scrape failed ({e}) and no snapshot exists. Using {len(FALLBACK)}-ticker fallback until {retry_after:%H:%M}.")
+            _set_cache(None, [_make_row(s) for s in FALLBACK], retry_after)
+            return _cache["rows"]
+
+def get_yahoo_tickers():
+    return [r["yahoo"] for r in get_universe()]
+
+def get_alpaca_tickers():
+    return [r["alpaca"] for r in get_universe()]
+
+def to_alpaca(symbol):
+    """Yahoo/Wikipedia spelling -> Alpaca spelling (BRK-B -> BRK.B)."""
+    if not symbol: return symbol
+    row = _symbol_map.get(symbol)
+    return row["alpaca"] if row else symbol.replace('-', '.')
+
+def to_yahoo(symbol):
+    """Alpaca/Wikipedia spelling -> Yahoo spelling (BRK.B -> BRK-B)."""
+    if not symbol: return symbol
+    row = _symbol_map.get(symbol)
+    return row["yahoo"] if row else symbol.replace('.', '-')
@@ -18,9 +18,17 @@ import lib.good_value_quick_money_market_scanner as scanner
 import lib.gvqm_alpaca_trader as trader
 import lib.gvqm_junior_agent as junior_agent
 import lib.gvqm_junior_history as junior_history
+import lib.gvqm_junior_runner as junior_runner
+import lib.gvqm_scan_queue as scan_queue
 import lib.gvqm_senior_agent as senior_agent
+import lib.gvqm_llm_client as llm_client
 import lib.gvqm_senior_history as senior_history
+import lib.gvqm_sheet_mirror as sheet_mirror
+import lib.gvqm_sheet_writer as sheet_writer
 import lib.gvqm_email_notifier as notifier
+import lib.gvqm_indicators as indicators
+import lib.gvqm_universe as universe
+import lib.gvqm_execution_engine as execution_engine
 
 main_routes = Blueprint('main_routes', __name__)
 
@@ -57,11 +65,37 @@ def parse_rank_score(rank_str):
     except:
         return 99999
 
+def execute_order(order):
+    """Executes one Senior Manager command. Returns the trader's event-dict list."""
+    ticker = order.get('ticker')
+    action = order.get('action', 'HOLD').upper() 
+    p = order.get('confirmed_params', {})
+    
+    log_pipeline(f"   👉 Processing Command: {action} {ticker}")
+    
+    trade_events = []
+    try:
+        if action == "OPEN_NEW":
+            trade_events = trader.execute_entry(ticker, config.INVEST_PER_TRADE, p.get('buy_limit', 0), p.get('take_profit', 0), p.get('stop_loss', 0))
+        
+        elif action == "UPDATE_EXISTING":
+            trade_events = trader.execute_update(ticker, p.get('take_profit', 0), p.get('stop_loss', 0), buy_limit=p.get('buy_limit', 0))
+        
+        elif action == "HOLD":
+            log_pipeline(f"      ✋ Holding {ticker}.")
+    except Exception as e:
+        log_pipeline(f"      ❌ Execution Exception for {ticker}: {e}")
+    
+    return trade_events
+
 def run_pipeline():
     print("\n" + "="*60)
     log_pipeline("🚀 STARTING DAILY TRADING PIPELINE (PRODUCTION)")
     print("="*60)
     
+    trader.reset_run_caches()
+    llm_client.reset_metrics()
+
     # 1. MARKET CHECK
     # if not trader.is_market_open():
     #    log_pipeline("💤 Market Closed. Aborting.")
@@ -72,29 +106,99 @@ def run_pipeline():
 	
     # --- JUNIOR PHASE ---
     log_pipeline("🕵️ PHASE 1: JUNIOR ANALYST RESEARCH")
+    unchanged_tickers = set()  # Last report still valid (nothing material moved)
     
     try:
-        candidates = scanner.find_distressed_stocks()
-        log_pipeline(f"Scanner found {len(candidates)} raw candidates.")
-        
+        batch_mode = getattr(config, 'JUNIOR_BATCH_MODE', True)
         limit = getattr(config, 'DAILY_SCAN_LIMIT', 20)
         score_threshold = getattr(config, 'JUNIOR_SCORE_THRESHOLD', 88)
-        fresh_candidates = junior_history.filter_candidates(candidates, limit=limit)
-        log_pipeline(f"Filtered to {len(fresh_candidates)} fresh candidates (Limit: {limit}).")
+        senior_reserve = getattr(config, 'GEMINI_SENIOR_RESERVE', 1)
+        
+        # Holdings get a priority bonus in the scan queue
+        try: held = {universe.to_yahoo(t) for t in trader.get_live_tickers()}
+        except Exception as e:
+            log_pipeline(f"⚠️ Could not load holdings for prioritization: {e}")
+            held = set()
+
+        # Scanner -> priority queue (best candidates first) -> change detection / limit -> Junior
+        # Each screened chunk's quotes come in one multi-symbol request instead of one per candidate
+        scan_stream = scanner.stream_distressed_stocks(on_chunk=trader.prefetch_prices)
+        quote_max_age = getattr(config, 'JUNIOR_QUOTE_MAX_AGE_SECONDS', 900)
+        queued_tickers = set()  # Ranked but not analyzed today (filled when the queue closes)
+        analyzed_tickers = set()  # Reported back to the queue: only these lose their waiting credit
+        ranked_stream = scan_queue.prioritize(scan_stream, held=held, waiting=queued_tickers, done=analyzed_tickers)
+        fresh_stream = junior_history.stream_fresh_candidates(ranked_stream, limit=limit, reused=unchanged_tickers)
+        log_pipeline(f"Streaming scanner candidates into the Junior Analyst (Limit: {limit}, Batch Mode: {batch_mode})...")
         
-        processed_count = 0
-        for ticker in fresh_candidates:
-            price = trader.get_current_price(ticker)
+        def prepare(candidate):
+            ticker = candidate['ticker']
+            price = trader.get_current_price(ticker, max_age=quote_max_age)  # Prefetched with its chunk
             if not price: 
                 log_pipeline(f"⚠️ Skipping {ticker}: No price data available.")
-                continue
+                return None
                 
-            report = junior_agent.analyze_stock(ticker, price)
-            if report:
-                junior_history.log_report(ticker, report)
-                processed_count += 1
-            time.sleep(1)
-        log_pipeline(f"Junior Analyst filed {processed_count} new reports.")
+            log_pipeline(f"{ticker} is {candidate['distance_pct']:.1f}% vs its 250 SMA.")
+            return {"ticker": ticker, "price": price, "features": indicators.to_snapshot(candidate)}
+
+        processed = []
+        def file_report(item, report):
+            # Runs on this thread as soon as each analysis lands
+            junior_history.log_report(item['ticker'], report)
+            junior_history.record_snapshot(item['ticker'], item['price'], item['features'])
+            processed.append(item['ticker'])
+            analyzed_tickers.add(item['ticker'])
+
+        def quota_reached(in_flight):
+            # Requests still queued behind the rate limiter haven't been booked yet
+            if llm_client.quota_remaining() - in_flight > senior_reserve: return False
+            log_pipeline(f"⛔ Daily Gemini quota reached (keeping {senior_reserve} for the Senior Manager). Stopping Junior phase.")
+            return True
+
+        # Scanner candidates -> priced items -> (optional) cheap triage -> Pro analysis
+        items = filter(None, map(prepare, fresh_stream))
+        triage = getattr(config, 'JUNIOR_TRIAGE_ENABLED', False)
+        if triage:
+            # Rejects are not snapshotted: an unchanged snapshot would pass their old report to the Senior as still valid
+            junior_agent.reset_triage_stats()
+            items = junior_agent.triage_stream(items)
+
+        if batch_mode:
+            requeue = []
+            def on_batch(batch, result, error):
+                reports, missing = result if result else ({}, [i['ticker'] for i in batch])
+                for item in batch:
+                    if item['ticker'] in reports: file_report(item, reports[item['ticker']])
+                requeue.extend(i for i in batch if i['ticker'] in missing)
+
+            submitted, failed = junior_runner.run(junior_agent.pack_batches(items), junior_agent.analyze_batch, on_batch, should_stop=quota_reached)
+
+            # One more round, only for tickers whose report was missing or malformed
+            if requeue:
+                retry_items, requeue = requeue, []
+                log_pipeline(f"🔁 Re-queuing {len(retry_items)} tickers without a usable report...")
+                s2, f2 = junior_runner.run(junior_agent.pack_batches(retry_items), junior_agent.analyze_batch, on_batch, should_stop=quota_reached)
+                submitted, failed = submitted + s2, failed + f2
+                if requeue: log_pipeline(f"⚠️ Still no report for: {', '.join(i['ticker'] for i in requeue)}")
+        else:
+            def analyze(item):
+                report = junior_agent.analyze_stock(item['ticker'], item['price'], features=item['features'])
+                return (item, report) if report else None
+
+            def on_report(item, result, error):
+                if result: file_report(*result)
+
+            submitted, failed = junior_runner.run(items, analyze, on_report, should_stop=quota_reached)
+        processed_count = len(processed)
+        
+        ranked_stream.close()  # Persists the queue (who waited this run)
+
+        # Let the scan finish so the price store is fully refreshed for the Senior phase.
+        unscanned = sum(1 for _ in scan_stream)
+        log_pipeline(f"Scanner drained ({len(queued_tickers) + unscanned} candidates left for a later run: "
+                     f"{len(queued_tickers)} ranked but not analyzed, {unscanned} not reached).")
+        log_pipeline(f"Junior Analyst filed {processed_count} new reports ({submitted} requests, {failed} failed).")
+        if triage: junior_agent.log_triage_summary()
+        sheet_writer.flush()  # The Senior phase reads these reports back
             
     except Exception as e:
         log_pipeline(f"❌ CRITICAL ERROR in Junior Phase: {e}")
@@ -113,12 +217,7 @@ def run_pipeline():
 								 
         live_tickers = set()
         try:
-            positions = trader.trading_client.get_all_positions()
-            for p in positions: live_tickers.add(p.symbol)
-            
-            req_params = trader.GetOrdersRequest(status=trader.QueryOrderStatus.OPEN)
-            orders = trader.trading_client.get_orders(filter=req_params)
-            for o in orders: live_tickers.add(o.symbol)
+            live_tickers = trader.get_live_tickers()
 
             log_pipeline(f"   ℹ️ Portfolio Context: Tracking {len(live_tickers)} active tickers: {list(live_tickers)}")
         except Exception as e:
@@ -127,17 +226,27 @@ def run_pipeline():
         # --- STEP 2: FETCH REPORTS (DUAL METHOD) ---
         lookback = getattr(config, 'SENIOR_LOOKBACK_DAYS', 5)
         
+        # One read + parse of the report history, shared by both queries
+        report_repo = senior_history.ReportRepository.load()
+        
         # A. Fetch Portfolio Reports (NO Filters)
-        portfolio_reports = senior_history.fetch_portfolio_reports(live_tickers)
+        portfolio_reports = senior_history.fetch_portfolio_reports(live_tickers, repo=report_repo)
         
         # B. Fetch Market Reports (STRICT Filters)
-        market_reports = senior_history.fetch_market_reports(lookback)
+        market_reports = senior_history.fetch_market_reports(lookback, still_valid=unchanged_tickers, repo=report_repo)
         
         # C. Combine (Routes logic will handle dedup if a stock is in both)
         reports = portfolio_reports + market_reports
         
         log_pipeline(f"fetched {len(portfolio_reports)} portfolio reports + {len(market_reports)} market reports. Total: {len(reports)}")
         
+        # One batched quote request for every ticker the Senior phase may look at
+        trader.prefetch_prices({r.get('ticker') for r in reports} | live_tickers)
+        
+        # One batched SMA lookup for every report that could reach the 250 SMA check
+        sma_tickers = [r.get('ticker') for r in reports if r.get('ticker') not in live_tickers and get_safe_score(r) > score_threshold]
+        sma_map = trader.get_sma_many(sma_tickers, window=250)
+        
         # --- STEP 3: FILTER CANDIDATES ---
         final_candidates = []
         seen_tickers = set()
@@ -186,7 +295,7 @@ def run_pipeline():
             # CRITERIA 3: 250 SMA CHECK
 					
             current_price = trader.get_current_price(ticker)
-            sma_250 = trader.get_simple_moving_average(ticker, window=250)
+            sma_250 = sma_map.get(ticker)
             
             if current_price and sma_250:
                 if current_price < sma_250:
@@ -213,10 +322,23 @@ def run_pipeline():
 
         holdings_map = {} 
         
+        trader.prefetch_prices([c['ticker'] for c in final_candidates])  # No-op for quotes still inside the TTL
+        
+        # Scanner features from the local price store (one vectorized pass for all candidates)
+        try:
+            feature_frame = scanner.build_feature_frame([universe.to_yahoo(c['ticker']) for c in final_candidates])
+        except Exception as e:
+            log_pipeline(f"   ⚠️ Could not build scanner features: {e}")
+            feature_frame = None
+        
         for c in final_candidates:
             ticker = c['ticker']
             c['current_price'] = trader.get_current_price(ticker)
             
+            yahoo_ticker = universe.to_yahoo(ticker)
+            if feature_frame is not None and yahoo_ticker in feature_frame.index:
+                c['technicals'] = indicators.to_snapshot(feature_frame.loc[yahoo_ticker])
+            
             # Inject Previous Rank for Ladder Logic
 				   
             c['previous_rank'] = previous_ranks.get(ticker, "Unranked")
@@ -261,6 +383,9 @@ def run_pipeline():
         log_pipeline(f"   📊 Sorted List Prepared: {len(active_holdings)} Veterans + {len(new_candidates)} Recruits.")
         # ------------------------------------------------------------------
 
+        q = trader.quotes.stats
+        log_pipeline(f"   💹 Quote cache: {q['requests']} broker requests, {q['hits']} hits, {q['misses']} misses.")
+
         # 5. STRATEGY & DECISION
         log_pipeline("Calling Senior Agent AI for ranking...")
         context = senior_history.get_last_strategy()
@@ -285,42 +410,15 @@ def run_pipeline():
             orders = decision.get('final_execution_orders', [])
             log_pipeline(f"\n⚡ PHASE 3: EXECUTION ({len(orders)} Commands)")
             
-            for order in orders:
+            # Independent tickers run concurrently; the same ticker is never executed twice at once
+            for order, trade_events in execution_engine.run_orders(orders, execute_order):
                 ticker = order.get('ticker')
-                action = order.get('action', 'HOLD').upper() 
-                p = order.get('confirmed_params', {})
-                
-                log_pipeline(f"   👉 Processing Command: {action} {ticker}")
-                
-                trade_events = []
-                
-                try:
-                    if action == "OPEN_NEW":
-			   
-				
-                        trade_events = trader.execute_entry(ticker, config.INVEST_PER_TRADE, p.get('buy_limit', 0), p.get('take_profit', 0), p.get('stop_loss', 0))
-                    
-                    elif action == "UPDATE_EXISTING":
-				
-                        trade_events = trader.execute_update(ticker, p.get('take_profit', 0), p.get('stop_loss', 0), buy_limit=p.get('buy_limit', 0))
-                    
-                    elif action == "HOLD":
-                        log_pipeline(f"      ✋ Holding {ticker}.")
-                        continue
-                        
-						 
-                except Exception as e:
-                    log_pipeline(f"      ❌ Execution Exception for {ticker}: {e}")
-
-                if isinstance(trade_events, dict): trade_events = [trade_events]
                 for event in trade_events:
-                    if isinstance(event, dict) and event.get('event') != "ERROR":
-				
-				
+                    if isinstance(event, dict) and event.get('event') not in ["ERROR", "DRY_RUN"]:
                         senior_history.log_trade_event(ticker, event.get('event'), event)
-					  
-			 
-						
+
+            ps = trader.portfolio.stats
+            log_pipeline(f"   📸 Broker snapshot: {ps['bulk_loads']} bulk loads, {ps['symbol_loads']} per-symbol refreshes.")
 
             # 7. SEND EMAIL
             log_pipeline("\n📧 PHASE 4: NOTIFICATION")
@@ -340,6 +438,11 @@ def run_pipeline():
 
     except Exception as e:
         log_pipeline(f"❌ CRITICAL ERROR in Senior Phase: {e}")
+    finally:
+        # Also runs on the early "no candidates" return: queued Sheets rows must not wait for process exit
+        llm_client.log_summary()
+        sheet_writer.flush()
+        sheet_mirror.sync_all()  # Mirror this run's Sheets writes locally
 
     print("\n" + "="*80)
     log_pipeline("✅ PIPELINE COMPLETE. Check Sheets & Email.")
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Run from anywhere: the bot imports `config` and `lib.*` from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("INVEST_PER_TRADE", "1000")  # Required by config.py, irrelevant to these tests
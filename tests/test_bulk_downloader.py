@@ -0,0 +1,57 @@
+import threading
+import pandas as pd
+import pytest
+import lib.gvqm_bulk_downloader as downloader
+
+DATES = pd.bdate_range("2024-01-02", periods=3)
+
+class FlakyFeed:
+    """Returns data for every ticker except those still owed a failure; records each request."""
+    def __init__(self, failures):
+        self.failures, self.requests, self._lock = dict(failures), [], threading.Lock()
+
+    def fetch(self, tickers):
+        with self._lock:
+            self.requests.append(list(tickers))
+            served = []
+            for t in tickers:
+                if self.failures.get(t, 0) > 0: self.failures[t] -= 1
+                else: served.append(t)
+        return {"Close": pd.DataFrame({t: [1.0, 2.0, 3.0] for t in served}, index=DATES)}
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(downloader.time, "sleep", delays.append)
+    return delays
+
+def test_retries_request_only_the_missing_symbols_with_backoff(sleeps):
+    feed = FlakyFeed({"CCC": 2})
+
+    results = list(downloader.iter_chunks(["AAA", "BBB", "CCC"], feed.fetch, chunk_size=3, max_workers=1))
+
+    assert feed.requests == [["AAA", "BBB", "CCC"], ["CCC"], ["CCC"]]
+    assert sleeps == [downloader.BACKOFF_SECONDS, downloader.BACKOFF_SECONDS * 2]
+    assert len(results) == 1 and results[0]["attempt"] == 3
+    assert list(results[0]["frames"]["Close"].columns) == ["AAA", "BBB", "CCC"]
+    assert results[0]["missing"] == [] and results[0]["ok"]
+
+def test_symbols_still_missing_after_the_last_retry_are_reported(sleeps):
+    feed = FlakyFeed({"BBB": 99})
+
+    frames, report = downloader.fetch_in_chunks(["AAA", "BBB"], feed.fetch, chunk_size=1, max_workers=1, max_retries=2)
+
+    assert [r for r in feed.requests if r == ["BBB"]] == [["BBB"]] * 3
+    assert report["missing"] == ["BBB"] and report["failed_chunks"] == 1
+    assert list(frames["Close"].columns) == ["AAA"]
+
+def test_a_raising_fetch_is_retried_like_an_empty_one(sleeps):
+    calls = []
+    def fetch(tickers):
+        calls.append(list(tickers))
+        if len(calls) == 1: raise ConnectionError("reset by peer")
+        return {"Close": pd.DataFrame({t: [1.0, 2.0, 3.0] for t in tickers}, index=DATES)}
+
+    results = list(downloader.iter_chunks(["AAA"], fetch, max_workers=1))
+
+    assert calls == [["AAA"], ["AAA"]] and results[0]["ok"]
@@ -0,0 +1,43 @@
+import datetime
+import pytest
+import lib.gvqm_change_detection as change_detection
+
+NOW = datetime.datetime(2024, 6, 1, 9, 0)
+SNAPSHOT = {"date": "2024-05-30 09:00", "price": 100.0,
+            "features": {"close": 100.0, "distance_pct": -12.0, "rsi": 35.0, "volume_spike": 1.0}}
+
+@pytest.fixture(autouse=True)
+def snapshots(monkeypatch):
+    snapshots = {"AAA": SNAPSHOT}
+    monkeypatch.setattr(change_detection, "load", lambda: snapshots)
+    return snapshots
+
+def _assess(candidate, age_days=2, ticker="AAA"):
+    return change_detection.assess(ticker, candidate, NOW - datetime.timedelta(days=age_days), NOW)
+
+def test_small_moves_inside_the_window_keep_the_report():
+    analyze, reason = _assess({"close": 103.0, "distance_pct": -10.0, "rsi": 40.0})
+    assert not analyze and reason.startswith("unchanged")
+
+def test_price_move_past_the_threshold_overrides_the_cooldown():
+    threshold = change_detection.PRICE_MOVE_PCT
+    assert _assess({"close": 100.0 - threshold - 0.5}, age_days=1)[0]
+    assert not _assess({"close": 100.0 - threshold + 0.5}, age_days=1)[0]
+
+@pytest.mark.parametrize("name, old", [("distance_pct", -12.0), ("rsi", 35.0), ("volume_spike", 1.0)])
+def test_each_feature_threshold_triggers_on_its_own(name, old):
+    threshold = change_detection.FEATURE_THRESHOLDS[name]
+    analyze, reason = _assess({"close": 100.0, name: old + threshold})
+    assert analyze and reason.startswith(name)
+    assert not _assess({"close": 100.0, name: old + threshold * 0.9})[0]
+
+def test_missing_or_unreadable_features_are_ignored():
+    assert not _assess({"close": 100.0, "rsi": None, "distance_pct": "n/a", "atr_pct": 9.0})[0]
+
+def test_old_reports_are_refreshed_even_when_unchanged():
+    assert _assess({"close": 100.0}, age_days=change_detection.MAX_AGE_DAYS)[0]
+
+def test_tickers_without_a_snapshot_fall_back_to_the_cooldown():
+    assert not _assess({"close": 50.0}, age_days=change_detection.COOLDOWN_DAYS - 1, ticker="BBB")[0]
+    assert _assess({"close": 50.0}, age_days=change_detection.COOLDOWN_DAYS, ticker="BBB")[0]
+    assert change_detection.assess("CCC", {}, None, NOW) == (True, "no previous report")
@@ -0,0 +1,74 @@
+import json
+import lib.gvqm_junior_agent as junior_agent
+
+def _report(ticker, **overrides):
+    report = {"ticker": ticker, "status": "Distressed", "valuation": "Cheap", "rebound_potential": "High",
+              "conviction_score": 90, "action": "BUY", "execution": {"limit_price": 10.0}}
+    report.update(overrides)
+    return report
+
+# --- BATCH REPORTS ---
+def test_batch_response_maps_reports_back_to_requested_tickers():
+    text = "Here you go:\n```json\n" + json.dumps([_report("brk.b"), _report("AAPL")]) + "\n```"
+    reports, missing = junior_agent.parse_batch_response(text, ["AAPL", "BRK-B", "MSFT"])
+
+    assert set(reports) == {"AAPL", "BRK-B"}
+    assert reports["BRK-B"]["ticker"] == "BRK-B"  # Normalized to the ticker we asked for
+    assert missing == ["MSFT"]
+
+def test_batch_response_skips_invalid_unknown_and_duplicate_reports():
+    rows = [_report("AAPL", execution="n/a"), _report("TSLA"), _report("MSFT"), _report("MSFT", action="SELL")]
+    rows[2].pop("valuation")
+    rows.append(_report("MSFT", action="HOLD"))
+    reports, missing = junior_agent.parse_batch_response(json.dumps(rows), ["AAPL", "MSFT"])
+
+    assert list(reports) == ["MSFT"]
+    assert reports["MSFT"]["action"] == "SELL"  # First complete report wins
+    assert missing == ["AAPL"]
+
+def test_batch_response_accepts_a_single_object_or_a_reports_wrapper():
+    single = json.dumps(_report("AAPL"))
+    wrapped = json.dumps({"reports": [_report("AAPL")]})
+    assert list(junior_agent.parse_batch_response(single, ["AAPL"])[0]) == ["AAPL"]
+    assert list(junior_agent.parse_batch_response(wrapped, ["AAPL"])[0]) == ["AAPL"]
+
+def test_batch_response_garbage_marks_everything_missing():
+    assert junior_agent.parse_batch_response("[not json", ["AAPL"]) == ({}, ["AAPL"])
+    assert junior_agent.parse_batch_response("", ["AAPL", "MSFT"]) == ({}, ["AAPL", "MSFT"])
+
+# --- TRIAGE ---
+def test_triage_response_reads_verdicts_and_scores():
+    rows = [{"ticker": "aapl", "verdict": "escalate", "score": "72", "reason": "Oversold quality"},
+            {"ticker": "MSFT", "verdict": "REJECT", "score": None, "reason": "Falling knife"},
+            {"ticker": "MSFT", "verdict": "ESCALATE", "score": 99},
+            {"ticker": "TSLA", "verdict": "ESCALATE", "score": 99},
+            {"ticker": "NVDA", "verdict": "MAYBE", "score": 50}]
+    verdicts, missing = junior_agent.parse_triage_response("```json\n" + json.dumps(rows) + "\n```", ["AAPL", "MSFT", "NVDA"])
+
+    assert verdicts["AAPL"] == {"verdict": "ESCALATE", "score": 72.0, "reason": "Oversold quality"}
+    assert verdicts["MSFT"]["verdict"] == "REJECT"  # First verdict wins
+    assert verdicts["MSFT"]["score"] == 0.0
+    assert missing == ["NVDA"]
+
+def test_triage_response_garbage_leaves_everything_unscreened():
+    assert junior_agent.parse_triage_response("no json here", ["AAPL"]) == ({}, ["AAPL"])
+
+def test_triage_stream_escalates_passes_and_unscreened_tickers(monkeypatch):
+    verdicts = {"HIGH": {"verdict": "ESCALATE", "score": junior_agent.TRIAGE_MIN_SCORE, "reason": ""},
+                "LOW": {"verdict": "ESCALATE", "score": junior_agent.TRIAGE_MIN_SCORE - 1, "reason": ""},
+                "NO": {"verdict": "REJECT", "score": 95, "reason": ""}}
+    batches = []
+    def fake_triage_batch(items):
+        batches.append([i["ticker"] for i in items])
+        found = {i["ticker"]: verdicts[i["ticker"]] for i in items if i["ticker"] in verdicts}
+        return found, [i["ticker"] for i in items if i["ticker"] not in found]
+    monkeypatch.setattr(junior_agent, "triage_batch", fake_triage_batch)
+    junior_agent.reset_triage_stats()
+
+    items = [{"ticker": t, "price": 10.0, "features": {}} for t in ["HIGH", "LOW", "NO", "LOST"]]
+    passed = [i["ticker"] for i in junior_agent.triage_stream(items, batch_size=3)]
+
+    assert passed == ["HIGH", "LOST"]
+    assert batches == [["HIGH", "LOW", "NO"], ["LOST"]]
+    assert {k: junior_agent.triage_stats[k] for k in ("screened", "escalated", "rejected", "unscreened")} == \
+        {"screened": 3, "escalated": 2, "rejected": 2, "unscreened": 1}
@@ -0,0 +1,25 @@
+import lib.gvqm_llm_cache as llm_cache
+
+def test_nearby_prices_share_a_bucket():
+    assert llm_cache.price_bucket(100.0) == llm_cache.price_bucket(100.4)
+    assert llm_cache.price_bucket(100.0) != llm_cache.price_bucket(103.0)
+    assert llm_cache.price_bucket("100.0") == llm_cache.price_bucket(100)
+
+def test_negative_values_keep_their_sign_and_magnitude():
+    assert llm_cache.price_bucket(-5.0) == llm_cache.price_bucket(-5.02)
+    assert llm_cache.price_bucket(-5.0) != llm_cache.price_bucket(-12.0)  # Used to collapse into one bucket
+    assert llm_cache.price_bucket(-5.0) != llm_cache.price_bucket(5.0)
+
+def test_zero_is_its_own_bucket():
+    zero = llm_cache.price_bucket(0)
+    assert zero == llm_cache.price_bucket(0.0) == llm_cache.price_bucket(float("nan"))
+    assert zero not in {llm_cache.price_bucket(v) for v in (1e-9, -1e-9, 1.0, -1.0)}
+
+def test_bucket_numbers_walks_nested_structures():
+    snapshot = {"close": 100.0, "changes": [-5.0, 0], "flags": {"held": True, "note": "x", "missing": None}}
+    bucketed = llm_cache.bucket_numbers(snapshot)
+
+    assert bucketed["close"] == llm_cache.price_bucket(100.0)
+    assert bucketed["changes"] == [llm_cache.price_bucket(-5.0), llm_cache.price_bucket(0)]
+    assert bucketed["flags"] == {"held": True, "note": "x", "missing": None}  # Bools/strings/None untouched
+    assert llm_cache.bucket_numbers({"close": 100.3}) == llm_cache.bucket_numbers({"close": 100.0})
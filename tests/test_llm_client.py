@@ -0,0 +1,65 @@
+import datetime
+from types import SimpleNamespace
+import pytest
+import lib.gvqm_llm_client as llm_client
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, body=None):
+        self.status_code, self.headers, self._body = status_code, headers or {}, body or {}
+        self.text = str(self._body)
+
+    def json(self):
+        return self._body
+
+OK = {"candidates": [{"content": {"parts": [{"text": "ANSWER"}]}}],
+      "usageMetadata": {"promptTokenCount": 5, "candidatesTokenCount": 3, "totalTokenCount": 8}}
+
+class FreeBucket:
+    def acquire(self, amount=1): return 0.0
+    def consume(self, amount): pass
+
+def _clock(monkeypatch, utc):
+    """Freezes the ledger's clock at a UTC instant."""
+    instant = datetime.datetime.fromisoformat(utc).replace(tzinfo=datetime.timezone.utc)
+    class Frozen(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None): return instant.astimezone(tz) if tz else instant.replace(tzinfo=None)
+    monkeypatch.setattr(llm_client, "datetime", SimpleNamespace(datetime=Frozen))
+
+@pytest.fixture
+def ledger(monkeypatch, tmp_path):
+    monkeypatch.setattr(llm_client, "LEDGER_PATH", str(tmp_path / "quota.json"))
+    monkeypatch.setattr(llm_client, "DAILY_LIMIT", 2)
+    return tmp_path / "quota.json"
+
+def test_retry_after_header_wins_over_body_and_default():
+    body = {"error": {"details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "12s"}]}}
+    assert llm_client._retry_after(FakeResponse(429, {"Retry-After": "7"}, body), 0) == 7
+    assert llm_client._retry_after(FakeResponse(429, {"Retry-After": "soon"}, body), 0) == 12
+    assert llm_client._retry_after(FakeResponse(503, {}, {"error": {"details": []}}), 1) == 20
+
+def test_429_waits_as_told_and_charges_the_quota_once(monkeypatch, ledger):
+    responses = [FakeResponse(429, {"Retry-After": "3"}), FakeResponse(200, body=OK)]
+    sleeps = []
+    monkeypatch.setattr(llm_client._session, "post", lambda *args, **kwargs: responses.pop(0))
+    monkeypatch.setattr(llm_client.time, "sleep", sleeps.append)
+    monkeypatch.setattr(llm_client, "_buckets", {"default": (FreeBucket(), FreeBucket())})
+    monkeypatch.setattr(llm_client.llm_cache, "get", lambda key: None)
+    monkeypatch.setattr(llm_client.llm_cache, "put", lambda *args, **kwargs: None)
+
+    assert llm_client.generate("gemini-pro", "prompt", search=False) == "ANSWER"
+    assert sleeps == [3.0]
+    assert llm_client.quota_remaining() == 1
+
+def test_quota_resets_at_pacific_midnight_not_utc(monkeypatch, ledger):
+    _clock(monkeypatch, "2024-03-09 23:30")      # 15:30 in Los Angeles
+    llm_client._reserve_request()
+    llm_client._reserve_request()
+
+    _clock(monkeypatch, "2024-03-10 00:30")      # New UTC day, same Pacific day
+    with pytest.raises(llm_client.DailyQuotaExceeded):
+        llm_client._reserve_request()
+
+    _clock(monkeypatch, "2024-03-10 08:30")      # 00:30 PST: the quota is back
+    llm_client._reserve_request()
+    assert llm_client.quota_remaining() == 1
@@ -0,0 +1,57 @@
+import math
+from types import SimpleNamespace
+import pandas as pd
+import lib.gvqm_market_data as market_data
+import lib.gvqm_alpaca_trader as trader
+import lib.good_value_quick_money_market_scanner as scanner
+
+class FakeDataClient:
+    """Counts latest-trade requests; every symbol trades at 10.0."""
+    def __init__(self):
+        self.requests = []
+
+    def get_stock_latest_trade(self, request):
+        symbols = request.symbol_or_symbols
+        self.requests.append(list(symbols))
+        return {s: SimpleNamespace(price=10.0) for s in symbols}
+
+def test_prefetch_chunks_symbols_and_serves_hits_from_memory():
+    client = FakeDataClient()
+    cache = market_data.QuoteCache(client)
+    symbols = [f"S{i}" for i in range(market_data.QUOTE_CHUNK_SIZE + 1)]
+
+    cache.prefetch(symbols)
+    assert len(client.requests) == 2
+    assert cache.get("S0") == 10.0
+    cache.prefetch(symbols)  # Everything still inside the TTL
+    assert len(client.requests) == 2
+
+def test_expired_quote_is_refetched_unless_the_caller_accepts_older(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(market_data.time, "time", lambda: clock[0])
+    client = FakeDataClient()
+    cache = market_data.QuoteCache(client, ttl=60)
+    cache.prefetch(["AAPL"])
+
+    clock[0] += 120
+    assert cache.get("AAPL", max_age=900) == 10.0
+    assert len(client.requests) == 1
+    assert cache.get("AAPL") == 10.0
+    assert len(client.requests) == 2
+
+def test_junior_candidates_cost_one_request_per_quote_chunk(monkeypatch):
+    n = market_data.QUOTE_CHUNK_SIZE + 50
+    tickers = [f"T{i}" for i in range(n)]
+    features = pd.DataFrame({"close": 10.0, "distance_pct": -5.0}, index=pd.Index(tickers, name="ticker"))
+    monkeypatch.setattr(scanner, "get_sp500_tickers", lambda: tickers)
+    monkeypatch.setattr(scanner.price_store, "iter_refresh", lambda universe: iter([universe]))
+    monkeypatch.setattr(scanner, "build_feature_frame", lambda ready: features.loc[ready])
+    client = FakeDataClient()
+    monkeypatch.setattr(trader, "quotes", market_data.QuoteCache(client))
+
+    # Same wiring as the junior phase in routes.run_pipeline
+    prices = [trader.get_current_price(c["ticker"], max_age=900)
+              for c in scanner.stream_distressed_stocks(on_chunk=trader.prefetch_prices)]
+
+    assert prices == [10.0] * n
+    assert len(client.requests) == math.ceil(n / market_data.QUOTE_CHUNK_SIZE)
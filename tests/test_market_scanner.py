@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+import lib.good_value_quick_money_market_scanner as scanner
+
+WINDOW = scanner.SMA_WINDOW
+
+def _close(columns, bars=WINDOW):
+    index = pd.bdate_range("2024-01-01", periods=bars)
+    return pd.DataFrame(columns, index=index)
+
+def test_keeps_only_tickers_below_their_sma_deepest_first():
+    flat = np.full(WINDOW, 100.0)
+    close = _close({
+        "UP": np.append(flat[:-1], 120.0),
+        "DOWN": np.append(flat[:-1], 90.0),
+        "CRASH": np.append(flat[:-1], 50.0),
+    })
+    table = scanner.screen_below_sma(close)
+
+    assert list(table["ticker"]) == ["CRASH", "DOWN"]
+    assert list(table["rank"]) == [1, 2]
+    assert (table["distance_pct"] < 0).all()
+    sma = (WINDOW - 1) * 100.0 / WINDOW + 50.0 / WINDOW
+    assert table.loc[0, "sma"] == pytest.approx(sma)
+    assert table.loc[0, "distance_pct"] == pytest.approx((50.0 - sma) / sma * 100)
+
+def test_ignores_tickers_without_a_full_window():
+    close = _close({"OLD": np.append(np.full(WINDOW - 1, 100.0), 80.0)})
+    close["NEW"] = np.nan
+    close.iloc[-10:, 1] = 10.0  # Only 10 bars of history
+
+    assert list(scanner.screen_below_sma(close)["ticker"]) == ["OLD"]
+
+def test_uses_each_tickers_own_latest_bar():
+    # A ticker that stopped trading is measured on its last valid close, not dropped
+    prices = np.append(np.full(WINDOW, 100.0), 70.0)
+    close = _close({"LIVE": np.append(np.full(WINDOW, 100.0), 70.0)}, bars=WINDOW + 1)
+    close["HALTED"] = np.append(prices[1:], np.nan)
+
+    assert set(scanner.screen_below_sma(close)["ticker"]) == {"LIVE", "HALTED"}
+
+def test_empty_input_returns_the_screen_columns():
+    table = scanner.screen_below_sma(pd.DataFrame())
+    assert table.empty
+    assert list(table.columns) == scanner.SCREEN_COLUMNS
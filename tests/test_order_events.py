@@ -0,0 +1,105 @@
+import threading
+import time
+import pytest
+from alpaca.trading.requests import LimitOrderRequest, TakeProfitRequest, StopLossRequest, GetOrdersRequest
+from alpaca.trading.enums import OrderSide, OrderType, OrderClass, TimeInForce, QueryOrderStatus
+import lib.gvqm_broker as broker
+import lib.gvqm_order_events as order_events
+import lib.gvqm_sim_broker as sim_broker
+import lib.gvqm_pending_orders_manager as pending_mgr
+import lib.gvqm_alpaca_filled_orders_manager as filled_mgr
+
+class FakeOrder:
+    def __init__(self, status):
+        self.status = status
+
+class FakeClient:
+    """Broker that reports one fixed status for every order."""
+    def __init__(self, status):
+        self.status, self.reads = status, 0
+
+    def get_order_by_id(self, order_id):
+        self.reads += 1
+        return FakeOrder(self.status)
+
+@pytest.fixture
+def sim():
+    """A SimBroker installed as the backend; the previous backend is restored afterwards."""
+    saved = (broker.BACKEND, dict(broker._clients), order_events.hub.source)
+    sim = broker.use_backend(sim_broker.SimBroker(cash=100000))
+    yield sim
+    broker.BACKEND, order_events.hub.source = saved[0], saved[2]
+    broker._clients.clear()
+    broker._clients.update(saved[1])
+
+def _open(sim, symbol="AAA"):
+    parents = sim.get_orders(GetOrdersRequest(status=QueryOrderStatus.OPEN, symbols=[symbol], nested=True))
+    return [o for p in parents for o in [p] + p.legs if o.status in sim_broker.OPEN_STATUSES]
+
+def test_publish_wakes_the_waiter_before_the_next_poll(monkeypatch):
+    monkeypatch.setattr(order_events, "INITIAL_POLL_SECONDS", 30)  # Only an event can wake it in time
+    hub, done = order_events.OrderEventHub(), threading.Event()
+
+    def deliver():
+        time.sleep(0.05)
+        done.set()
+        hub.publish("AAA", "order-1", "canceled", "canceled")
+    threading.Thread(target=deliver, daemon=True).start()
+
+    start = time.time()
+    assert hub.wait_until("AAA", done.is_set, timeout=10)
+    assert time.time() - start < 2
+    assert hub.last_status("order-1") == "canceled"
+
+def test_events_for_other_symbols_do_not_satisfy_the_wait(monkeypatch):
+    monkeypatch.setattr(order_events, "INITIAL_POLL_SECONDS", 0.01)
+    hub = order_events.OrderEventHub()
+    hub.publish("BBB", "order-2", "fill", "filled")
+
+    start = time.time()
+    assert hub.wait_until("AAA", lambda: hub.last_status("order-1") == "canceled", timeout=0.1) is False
+    assert time.time() - start >= 0.1
+
+def test_terminal_wait_returns_the_streamed_status_without_polling():
+    client = FakeClient("pending_cancel")
+    updates = order_events.FakeTradeUpdates()
+    updates.start(order_events.hub)
+    updates.emit("AAA", "order-3", "canceled", "canceled")
+
+    assert order_events.wait_for_order_terminal(client, "AAA", "order-3", timeout=1) == "canceled"
+    assert client.reads == 0
+
+def test_terminal_wait_times_out_with_none(monkeypatch):
+    monkeypatch.setattr(order_events, "INITIAL_POLL_SECONDS", 0.01)
+    client = FakeClient("pending_cancel")
+
+    assert order_events.wait_for_order_terminal(client, "AAA", "order-4", timeout=0.1) is None
+    assert client.reads >= 2
+
+def test_unconfirmed_cancel_aborts_the_resubmit(sim, monkeypatch):
+    sim.set_prices({"AAA": [100.0]})
+    parent = sim.submit_order(LimitOrderRequest(
+        symbol="AAA", qty=10, side=OrderSide.BUY, time_in_force=TimeInForce.GTC, limit_price=90.0,
+        order_class=OrderClass.BRACKET, take_profit=TakeProfitRequest(limit_price=120.0), stop_loss=StopLossRequest(stop_price=80.0)))
+    sim.fail_next("replace_order_by_id")
+    monkeypatch.setattr(order_events, "wait_for_order_terminal", lambda *args, **kwargs: None)
+
+    events = pending_mgr.manage_pending_order(sim, "AAA", parent, 90.0, 125.0, 80.0, _open(sim), dry_run=False)
+
+    assert [e["event"] for e in events] == ["ERROR"]
+    assert sim.calls["submit_order"] == 1
+
+def test_exit_filled_during_cancel_aborts_the_regenerate(sim, monkeypatch):
+    sim.set_prices({"AAA": [100.0]})
+    sim.seed_position("AAA", 10, 100.0)
+    sim.submit_order(LimitOrderRequest(
+        symbol="AAA", qty=10, side=OrderSide.SELL, time_in_force=TimeInForce.GTC, limit_price=120.0,
+        order_class=OrderClass.OCO, take_profit=TakeProfitRequest(limit_price=120.0), stop_loss=StopLossRequest(stop_price=80.0)))
+    sim.fail_next("replace_order_by_id")
+    monkeypatch.setattr(order_events, "final_status", lambda client, order_id: "filled")
+
+    events = filled_mgr.manage_active_position(sim, "AAA", 10, 130.0, 80.0, _open(sim), dry_run=False)
+
+    assert [e["event"] for e in events] == ["ERROR"]
+    assert sim.calls["submit_order"] == 1
+    assert _open(sim) == []
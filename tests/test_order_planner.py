@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+from alpaca.trading.enums import OrderSide, OrderType
+import lib.gvqm_order_planner as planner
+
+def _order(order_id, side, order_type, limit_price=None, stop_price=None):
+    return SimpleNamespace(id=order_id, side=side, type=order_type, limit_price=limit_price, stop_price=stop_price)
+
+def _bracket(limit=100.0, tp=120.0, sl=90.0):
+    parent = _order("parent", OrderSide.BUY, OrderType.LIMIT, limit_price=limit)
+    legs = []
+    if tp is not None: legs.append(_order("tp", OrderSide.SELL, OrderType.LIMIT, limit_price=tp))
+    if sl is not None: legs.append(_order("sl", OrderSide.SELL, OrderType.STOP, stop_price=sl))
+    return parent, [parent] + legs
+
+def test_aligned_bracket_is_a_noop():
+    parent, orders = _bracket()
+    plan = planner.plan_pending(parent, orders, 100.004, 120.0, 90.0)  # Within PRICE_TOLERANCE
+    assert plan["kind"] == "NOOP"
+    assert plan["calls"] == 0
+
+def test_moved_leg_replaces_only_that_leg():
+    parent, orders = _bracket()
+    plan = planner.plan_pending(parent, orders, 100.0, 125.0, 90.0)
+    assert plan["kind"] == "REPLACE_LEGS"
+    assert [(s["op"], s["order"].id, s["field"], s["to"]) for s in plan["steps"]] == [("TP", "tp", "limit_price", 125.0)]
+
+def test_moved_limit_replaces_the_parent():
+    parent, orders = _bracket()
+    plan = planner.plan_pending(parent, orders, 98.0, 120.0, 90.0)
+    assert plan["kind"] == "REPLACE_PARENT"
+    assert [(s["op"], s["from"], s["to"]) for s in plan["steps"]] == [("PARENT", 100.0, 98.0)]
+
+def test_zero_targets_leave_a_leg_alone():
+    parent, orders = _bracket()
+    assert planner.plan_pending(parent, orders, 100.0, 0, 0)["kind"] == "NOOP"
+
+def test_missing_leg_forces_a_rebuild():
+    parent, orders = _bracket(sl=None)
+    plan = planner.plan_pending(parent, orders, 100.0, 120.0, 85.0)
+    assert plan["kind"] == "REBUILD"
+    assert plan["reason"] == "SL leg missing"
+    assert plan["steps"] == []
+
+def test_more_replaces_than_a_rebuild_costs_rebuilds():
+    parent, orders = _bracket()
+    plan = planner.plan_pending(parent, orders, 98.0, 125.0, 85.0)
+    assert plan["kind"] == "REBUILD"
+    assert plan["calls"] == planner.PENDING_REBUILD_CALLS
+
+def test_parent_replaced_only_after_the_parent_step_ran():
+    parent, orders = _bracket()
+    plan = planner.plan_pending(parent, orders, 98.0, 125.0, 90.0)
+    assert plan["kind"] == "REPLACE_PARENT"
+    assert not planner.parent_replaced(plan)
+
+    class Broker:
+        def replace_order_by_id(self, order_id, request):
+            if order_id == "tp": raise RuntimeError("rejected")
+
+    assert planner.apply(Broker(), "ABC", plan) is False
+    assert planner.parent_replaced(plan)
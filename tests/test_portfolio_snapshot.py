@@ -0,0 +1,107 @@
+import threading
+from types import SimpleNamespace
+from alpaca.trading.enums import OrderSide, OrderType
+import lib.gvqm_portfolio_snapshot as portfolio_snapshot
+
+def _position(symbol, qty):
+    return SimpleNamespace(symbol=symbol, qty=str(qty), avg_entry_price="100")
+
+def _order(symbol, limit_price):
+    return SimpleNamespace(symbol=symbol, status="new", side=OrderSide.BUY, type=OrderType.LIMIT,
+                           limit_price=limit_price, stop_price=None, legs=[])
+
+class FakeBroker:
+    """Positions and open orders held in dicts; on_read(symbol) runs inside a per-symbol read."""
+    def __init__(self):
+        self.positions = {"AAA": _position("AAA", 10), "BBB": _position("BBB", 5)}
+        self.orders = {"CCC": [_order("CCC", 50.0)]}
+        self.on_read = None
+        self.calls = {"bulk": 0, "symbol": 0}
+
+    def get_all_positions(self):
+        self.calls["bulk"] += 1
+        if self.on_read: self.on_read(None)
+        return list(self.positions.values())
+
+    def get_open_position(self, symbol):
+        self.calls["symbol"] += 1
+        if self.on_read: self.on_read(symbol)
+        if symbol not in self.positions: raise LookupError("position does not exist")
+        return self.positions[symbol]
+
+    def get_orders(self, filter=None):
+        symbols = filter.symbols or list(self.orders)
+        return [o for s in symbols for o in self.orders.get(s, [])]
+
+def test_reads_are_served_from_the_bulk_load():
+    broker = FakeBroker()
+    snapshot = portfolio_snapshot.PortfolioSnapshot(broker)
+
+    assert snapshot.get_state("AAA")["shares"] == 10
+    assert snapshot.get_state("CCC")["pending_buy"] == 50.0
+    assert snapshot.symbols() == {"AAA", "BBB", "CCC"}
+    assert broker.calls == {"bulk": 1, "symbol": 0}
+
+def test_invalidate_rereads_only_that_symbol_once():
+    broker = FakeBroker()
+    snapshot = portfolio_snapshot.PortfolioSnapshot(broker)
+    snapshot.refresh()
+
+    broker.positions["AAA"] = _position("AAA", 20)
+    snapshot.invalidate("AAA")
+    assert snapshot.get_state("AAA")["shares"] == 20
+    assert snapshot.get_state("AAA")["shares"] == 20
+    assert snapshot.get_state("BBB")["shares"] == 5
+    assert broker.calls == {"bulk": 1, "symbol": 1}
+
+def test_write_during_a_symbol_fetch_keeps_it_stale():
+    broker = FakeBroker()
+    snapshot = portfolio_snapshot.PortfolioSnapshot(broker)
+    snapshot.refresh()
+    snapshot.invalidate("AAA")
+
+    def write_once(symbol):
+        broker.on_read = None
+        broker.positions["AAA"] = _position("AAA", 30)
+        snapshot.invalidate("AAA")  # Our own order lands while the old state is being read
+    broker.on_read = write_once
+
+    snapshot.get_state("AAA")
+    assert snapshot.get_state("AAA")["shares"] == 30
+    assert broker.calls["symbol"] == 2
+
+def test_write_during_a_bulk_load_marks_that_symbol_stale():
+    broker = FakeBroker()
+    snapshot = portfolio_snapshot.PortfolioSnapshot(broker)
+    def write_once(symbol):
+        broker.on_read = None
+        snapshot.invalidate("BBB")
+    broker.on_read = write_once
+
+    snapshot.refresh()
+    assert snapshot.get_state("AAA")["shares"] == 10 and broker.calls["symbol"] == 0
+    snapshot.get_state("BBB")
+    assert broker.calls["symbol"] == 1
+
+def test_a_slow_symbol_read_does_not_block_other_symbols():
+    broker = FakeBroker()
+    snapshot = portfolio_snapshot.PortfolioSnapshot(broker)
+    snapshot.refresh()
+    snapshot.invalidate("AAA")
+    reading, release = threading.Event(), threading.Event()
+    def stall(symbol):
+        reading.set()
+        release.wait(5)
+    broker.on_read = stall
+
+    slow = threading.Thread(target=snapshot.get_state, args=("AAA",))
+    slow.start()
+    assert reading.wait(2)
+    other = []
+    fast = threading.Thread(target=lambda: other.append(snapshot.get_state("BBB")["shares"]))
+    fast.start()
+    fast.join(2)
+    release.set()
+    slow.join(2)
+
+    assert other == [5]
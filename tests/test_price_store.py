@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+import lib.gvqm_price_store as price_store
+
+class FakeYahoo:
+    """Serves wide frames from a fixed close history and records each download's arguments."""
+    def __init__(self, bars):
+        dates = pd.bdate_range("2023-01-02", periods=bars)
+        self.close = pd.DataFrame({"AAA": np.linspace(100, 140, bars), "BBB": np.linspace(50, 40, bars)}, index=dates)
+        self.calls = []
+
+    def extend(self, bars):
+        dates = pd.bdate_range(self.close.index[-1] + pd.Timedelta(days=1), periods=bars)
+        self.close = pd.concat([self.close, pd.DataFrame({t: self.close[t].iloc[-1] for t in self.close}, index=dates)])
+
+    def download(self, tickers, start=None, period=None):
+        self.calls.append((tuple(tickers), start or period))
+        close = self.close[list(tickers)]
+        if start: close = close[close.index >= pd.Timestamp(start)]
+        return {field: close * (1000 if field == "Volume" else 1) for field in price_store.FIELDS}
+
+@pytest.fixture
+def yahoo(monkeypatch, tmp_path):
+    yahoo = FakeYahoo(bars=60)
+    monkeypatch.setattr(price_store, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(price_store, "_frames", {})
+    monkeypatch.setattr(price_store, "_download", yahoo.download)
+    return yahoo
+
+def test_known_tickers_only_fetch_bars_since_their_last_stored_date(yahoo):
+    price_store.refresh(["AAA", "BBB"])
+    last = yahoo.close.index[-1]
+    yahoo.extend(3)
+    yahoo.calls.clear()
+
+    summary = price_store.refresh(["AAA", "BBB"])
+
+    start = (last - pd.Timedelta(days=price_store.OVERLAP_DAYS)).strftime("%Y-%m-%d")
+    assert yahoo.calls == [(("AAA", "BBB"), start)]
+    assert summary["incremental"] == ["AAA", "BBB"] and summary["adjusted"] == []
+    pd.testing.assert_frame_equal(price_store.get_field("Close"), yahoo.close, check_freq=False)
+
+def test_drift_beyond_tolerance_refetches_that_ticker_only(yahoo):
+    price_store.refresh(["AAA", "BBB"])
+    yahoo.close["AAA"] *= 0.5                     # 2:1 split, history re-adjusted
+    yahoo.close["BBB"] *= 1 + price_store.ADJUSTMENT_TOLERANCE / 2
+    yahoo.calls.clear()
+
+    summary = price_store.refresh(["AAA", "BBB"])
+
+    assert summary["adjusted"] == ["AAA"]
+    assert yahoo.calls[-1] == (("AAA",), price_store.HISTORY_PERIOD)
+    pd.testing.assert_series_equal(price_store.get_field("Close")["AAA"], yahoo.close["AAA"], check_freq=False)
+
+def test_store_round_trips_through_parquet_trimmed_to_the_window(yahoo, monkeypatch):
+    monkeypatch.setattr(price_store, "KEEP_BARS", 40)
+    price_store.refresh(["AAA", "BBB"])
+    price_store._frames.clear()  # Force a read from disk
+
+    history = price_store.get_history("AAA")
+    assert len(history) == 40 and history.index[-1] == yahoo.close.index[-1]
+    assert list(history.columns) == price_store.FIELDS
+    assert history["Close"].iloc[-1] == pytest.approx(yahoo.close["AAA"].iloc[-1])
+
+def test_keep_bars_never_drops_below_the_longest_screen():
+    assert price_store.KEEP_BARS >= max(s["bars"] for s in price_store.indicators.SCREENS.values())
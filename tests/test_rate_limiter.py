@@ -0,0 +1,62 @@
+import pytest
+import lib.gvqm_rate_limiter as rate_limiter
+
+class FakeClock:
+    """Stands in for time.monotonic/time.sleep so the bucket can be tested without waiting."""
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(rate_limiter.time, "sleep", fake.sleep)
+    return fake
+
+def test_starts_full_and_blocks_once_empty(clock):
+    bucket = rate_limiter.TokenBucket(3, per_seconds=60)
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    assert bucket.acquire() == pytest.approx(20.0)  # 3 per minute = one token every 20s
+    assert clock.now == pytest.approx(20.0)
+
+def test_refills_with_elapsed_time_up_to_capacity(clock):
+    bucket = rate_limiter.TokenBucket(60, per_seconds=60, capacity=10)
+    bucket.acquire(10)
+    clock.now += 5
+    assert bucket.wait_time(5) == 0.0
+    assert bucket.wait_time(6) == pytest.approx(1.0)
+
+    clock.now += 1000
+    assert bucket.wait_time(10) == 0.0
+    assert bucket.wait_time(11) == 0.0  # Capped: never waits for more than a full bucket
+
+def test_oversized_request_passes_once_the_bucket_is_full(clock):
+    bucket = rate_limiter.TokenBucket(100, per_seconds=60)
+    bucket.acquire(50)
+    assert bucket.acquire(500) == pytest.approx(30.0)
+
+def test_consume_goes_negative_and_delays_the_next_acquire(clock):
+    bucket = rate_limiter.TokenBucket(10, per_seconds=10)
+    bucket.acquire(10)
+    bucket.consume(5)  # e.g. a response that used more tokens than estimated
+    assert bucket.acquire(1) == pytest.approx(6.0)
+
+def test_rate_limited_client_takes_a_token_per_call(clock):
+    class Client:
+        name = "broker"
+        def ping(self, value): return value
+
+    bucket = rate_limiter.TokenBucket(2, per_seconds=60)
+    client = rate_limiter.RateLimitedClient(Client(), bucket)
+    assert client.name == "broker"  # Attributes pass through untouched
+    assert [client.ping(i) for i in range(3)] == [0, 1, 2]
+    assert clock.slept == [pytest.approx(30.0)]
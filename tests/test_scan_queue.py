@@ -0,0 +1,66 @@
+import pytest
+import lib.gvqm_scan_queue as scan_queue
+
+@pytest.fixture(autouse=True)
+def queue_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(scan_queue, "QUEUE_PATH", str(tmp_path / "queue.json"))
+    monkeypatch.setattr(scan_queue.change_detection, "load", lambda: {})  # Nothing reported yet
+
+def _candidates(*depths):
+    return [{"ticker": f"T{depth}", "distance_pct": -depth} for depth in depths]
+
+def _run(candidates, take, lookahead=0, held=(), done=None):
+    """One pipeline run: pulls `take` candidates, then closes the queue like routes does."""
+    waiting = set()
+    stream = scan_queue.prioritize(iter(candidates), held=held, lookahead=lookahead, waiting=waiting, done=done)
+    pulled = [c["ticker"] for _, c in zip(range(take), stream)]
+    stream.close()
+    return pulled, waiting
+
+def test_full_ranking_emits_deepest_discount_first():
+    pulled, waiting = _run(_candidates(5, 20, 10), take=3)
+    assert pulled == ["T20", "T10", "T5"]
+    assert waiting == set()
+
+def test_holdings_jump_the_queue():
+    pulled, _ = _run(_candidates(5, 20), take=1, held={"T5"})
+    assert pulled == ["T5"]
+
+def test_lookahead_streams_the_best_of_the_window():
+    seen = []
+    def scan():
+        for c in _candidates(1, 2, 30, 3, 4):
+            seen.append(c["ticker"])
+            yield c
+
+    stream = scan_queue.prioritize(scan(), lookahead=2)
+    assert next(stream)["ticker"] == "T30"
+    assert seen == ["T1", "T2", "T30"]  # Only lookahead + 1 scanned before the first yield
+    assert [c["ticker"] for c in stream] == ["T3", "T4", "T2", "T1"]
+
+def test_waiting_credit_persists_and_prevents_starvation():
+    scan = _candidates(10, 9, 8)  # Same picks every day without the waiting bonus
+    assert _run(scan, take=1) == (["T10"], {"T9", "T8"})
+    assert _run(scan, take=1) == (["T9"], {"T10", "T8"})
+    assert scan_queue._load()["T8"]["waiting_runs"] == 2
+
+    # Run 3: two runs of waiting (+2 * WEIGHT_WAITING) outweigh T10's deeper discount
+    assert _run(scan, take=1) == (["T8"], {"T10", "T9"})
+    assert "T8" not in scan_queue._load()
+
+def test_pulled_but_not_analyzed_keeps_its_credit():
+    done = set()
+    waiting = set()
+    stream = scan_queue.prioritize(iter(_candidates(10, 9)), waiting=waiting, done=done)
+    assert [c["ticker"] for c in stream] == ["T10", "T9"]
+    done.add("T9")  # T10 was skipped downstream (no price / unchanged), T9 got a report
+    stream.close()
+
+    assert waiting == {"T10"}
+    assert scan_queue._load()["T10"]["waiting_runs"] == 1
+
+def test_tickers_that_left_the_scan_are_forgotten():
+    _run(_candidates(10, 9), take=1)
+    assert set(scan_queue._load()) == {"T9"}
+    _run(_candidates(10), take=1)
+    assert scan_queue._load() == {}
@@ -0,0 +1,95 @@
+import threading
+import pytest
+import lib.gvqm_sheets_session as sheets_session
+import lib.gvqm_sheet_mirror as sheet_mirror
+
+HEADERS = ["Date", "Ticker", "Action"]
+
+class FakeSheet:
+    """Worksheet serving ranged reads ("A{start}:ZZ") from an in-memory grid."""
+    def __init__(self, rows):
+        self.rows, self.ranges, self.on_get = rows, [], None
+
+    def get(self, cell_range):
+        self.ranges.append(cell_range)
+        if self.on_get: self.on_get()
+        start = int(cell_range.split(":")[0][1:])
+        return [list(r) for r in self.rows[start - 1:]]
+
+@pytest.fixture
+def sheet(monkeypatch):
+    sheet = FakeSheet([HEADERS,
+                       ["2024-05-01 09:00", "AAA", "BUY"],
+                       ["2024-05-01 09:00", "BBB", "HOLD"]])
+    clock = [1_000_000.0]
+    monkeypatch.setattr(sheet_mirror, "DB_PATH", ":memory:")
+    monkeypatch.setattr(sheet_mirror, "_conn", None)
+    monkeypatch.setattr(sheet_mirror, "_dirty", set())
+    monkeypatch.setattr(sheet_mirror, "_tab_locks", {})
+    monkeypatch.setattr(sheet_mirror.time, "time", lambda: clock[0])
+    monkeypatch.setattr(sheet_mirror.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(sheets_session, "get_client", lambda: True)
+    monkeypatch.setattr(sheets_session, "reset", lambda tab=None: None)
+    monkeypatch.setattr(sheets_session, "worksheet", lambda tab, create=True: (sheet, False))
+    sheet.clock = clock
+    return sheet
+
+def test_incremental_sync_reads_only_rows_below_the_watermark(sheet):
+    assert sheet_mirror.refresh("Trade_Log")
+    sheet.rows.append(["2024-05-02 09:00", "AAA", "SELL"])
+    sheet_mirror.mark_dirty("Trade_Log")
+    assert sheet_mirror.refresh("Trade_Log")
+
+    assert sheet.ranges == ["A1:ZZ", "A4:ZZ"]
+    assert [r["Action"] for r in sheet_mirror.records("Trade_Log")] == ["SELL", "BUY", "HOLD"]
+    assert sheet_mirror.latest_by_ticker("Trade_Log")["AAA"]["Action"] == "SELL"
+
+def test_clean_tab_is_not_reread_until_stale(sheet):
+    sheet_mirror.refresh("Trade_Log")
+    sheet.clock[0] += sheet_mirror.MIN_SYNC_SECONDS - 1
+    sheet_mirror.refresh("Trade_Log")
+    assert sheet.ranges == ["A1:ZZ"]
+
+    sheet.clock[0] += 2
+    sheet_mirror.refresh("Trade_Log")
+    assert sheet.ranges == ["A1:ZZ", "A4:ZZ"]
+
+def test_full_resync_picks_up_edits_and_deletions(sheet):
+    sheet_mirror.refresh("Trade_Log")
+    sheet.rows[1][2] = "SELL"
+    del sheet.rows[2]
+    sheet.clock[0] += sheet_mirror.FULL_RESYNC_HOURS * 3600 + 1
+    sheet_mirror.refresh("Trade_Log")
+
+    assert sheet.ranges[-1] == "A1:ZZ"
+    assert [(r["Ticker"], r["Action"]) for r in sheet_mirror.records("Trade_Log")] == [("AAA", "SELL")]
+
+def test_latest_batch_returns_the_newest_run_in_sheet_order(sheet):
+    sheet.rows += [["2024-05-03 10:00", "CCC", "BUY"], ["2024-05-03 10:00", "AAA", "SELL"]]
+    sheet_mirror.refresh("Senior_Decisions")
+    assert [r["Ticker"] for r in sheet_mirror.latest_batch("Senior_Decisions")] == ["CCC", "AAA"]
+
+def test_sheet_read_runs_without_the_mirror_lock(sheet):
+    acquired = []
+    def probe():
+        got = sheet_mirror._lock.acquire(timeout=1)
+        if got: sheet_mirror._lock.release()
+        acquired.append(got)
+    def probe_from_another_thread():
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+    sheet.on_get = probe_from_another_thread
+
+    sheet_mirror.refresh("Trade_Log")
+    assert acquired == [True]
+
+def test_failed_sync_keeps_the_tab_dirty_and_serves_the_mirror(sheet):
+    sheet_mirror.refresh("Trade_Log")
+    sheet_mirror.mark_dirty("Trade_Log")
+    def broken(cell_range): raise ConnectionError("sheets down")
+    sheet.get = broken
+
+    assert sheet_mirror.refresh("Trade_Log")
+    assert "Trade_Log" in sheet_mirror._dirty
+    assert len(sheet_mirror.records("Trade_Log")) == 2
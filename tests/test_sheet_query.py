@@ -0,0 +1,60 @@
+import pytest
+import lib.gvqm_sheets_session as sheets_session
+import lib.gvqm_sheet_query as sheet_query
+
+HEADERS = ["Date", "Ticker", "Action"]
+
+class FakeSheet:
+    """A pre-sized grid (blank rows below the data) answering gspread-style reads."""
+    def __init__(self, rows, grid_rows=1000):
+        self.grid = [HEADERS] + rows + [["", "", ""]] * (grid_rows - len(rows) - 1)
+        self.ranges = []
+
+    def row_values(self, index):
+        return list(self.grid[index - 1])
+
+    def col_values(self, index):
+        values = [r[index - 1] for r in self.grid]
+        while values and not values[-1]: values.pop()  # gspread drops trailing blanks
+        return values
+
+    def batch_get(self, ranges):
+        self.ranges.append(ranges)
+        results = []
+        for cell_range in ranges:
+            first, last = cell_range.split(":")
+            column = ord(first[0]) - 65
+            end = int(last[1:]) if last[1:] else len(self.grid)
+            results.append([[r[column]] if r[column] else [] for r in self.grid[int(first[1:]) - 1:end]])
+        return results
+
+@pytest.fixture
+def sheet(monkeypatch):
+    older = [["2024-05-31", f"OLD{i}", "HOLD"] for i in range(5)]
+    newest = [["2024-06-01", f"NEW{i}", "BUY"] for i in range(4)]
+    sheet = FakeSheet(older + newest)
+    monkeypatch.setattr(sheets_session, "worksheet", lambda tab, create=True: (sheet, False))
+    sheet_query.reset()
+    yield sheet
+    sheet_query.reset()
+
+def test_walks_up_from_the_last_filled_row_until_the_batch_ends(sheet):
+    batch = sheet_query.tail_batch("Senior_Decisions", "Date", ["Ticker"], chunk=3)
+
+    assert [r["Ticker"] for r in batch] == ["NEW0", "NEW1", "NEW2", "NEW3"]
+    assert sheet.ranges == [["A8:A10", "B8:B10"], ["A5:A7", "B5:B7"]]  # Never the blank grid rows
+
+def test_a_single_batch_sheet_is_read_to_the_top(sheet):
+    sheet.grid[1:6] = [["2024-06-01", f"NEW{i}", "BUY"] for i in range(5, 10)]
+    batch = sheet_query.tail_batch("Senior_Decisions", "Date", ["Ticker", "Action"], chunk=4)
+
+    assert len(batch) == 9 and batch[0]["Ticker"] == "NEW5" and batch[-1]["Action"] == "BUY"
+    assert sheet.ranges[-1] == ["A2:A2", "B2:B2", "C2:C2"]
+
+def test_header_only_sheet_has_no_batch(monkeypatch):
+    empty = FakeSheet([])
+    monkeypatch.setattr(sheets_session, "worksheet", lambda tab, create=True: (empty, False))
+    sheet_query.reset()
+
+    assert sheet_query.tail_batch("Senior_Decisions", "Date", ["Ticker"]) == []
+    assert empty.ranges == []
@@ -0,0 +1,71 @@
+import pytest
+import lib.gvqm_sheets_session as sheets_session
+import lib.gvqm_sheet_mirror as sheet_mirror
+import lib.gvqm_sheet_writer as sheet_writer
+
+HEADERS = ["Date", "Ticker", "Action"]
+
+class FakeSheet:
+    """Worksheet whose append_rows fails `failures` times before it starts accepting rows."""
+    def __init__(self, failures=0, header_row=HEADERS):
+        self.failures, self.header_row, self.appends = failures, header_row, []
+
+    def row_values(self, index):
+        return list(self.header_row)
+
+    def append_rows(self, rows):
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("503 from Sheets")
+        self.appends.append([list(r) for r in rows])
+
+@pytest.fixture
+def env(monkeypatch):
+    env = {"sheet": FakeSheet(), "sleeps": [], "dirty": []}
+    monkeypatch.setattr(sheet_writer, "_buffers", {})
+    monkeypatch.setattr(sheet_writer, "_checked_headers", set())
+    monkeypatch.setattr(sheet_writer, "stats", {"rows": 0, "flushes": 0, "failed_flushes": 0})
+    monkeypatch.setattr(sheet_writer, "FLUSH_ROWS", 3)
+    monkeypatch.setattr(sheet_writer.time, "sleep", env["sleeps"].append)
+    monkeypatch.setattr(sheets_session, "worksheet", lambda tab, headers=None, size=None: (env["sheet"], False))
+    monkeypatch.setattr(sheets_session, "reset", lambda tab=None: None)
+    monkeypatch.setattr(sheet_mirror, "mark_dirty", env["dirty"].append)
+    return env
+
+def _row(n):
+    return ["2024-06-01 09:00", f"T{n}", "BUY"]
+
+def test_rows_are_buffered_until_the_batch_is_full(env):
+    sheet_writer.append("Trade_Log", _row(1), headers=HEADERS)
+    sheet_writer.append("Trade_Log", _row(2), headers=HEADERS)
+    assert env["sheet"].appends == [] and sheet_writer.pending("Trade_Log") == 2
+
+    sheet_writer.append("Trade_Log", _row(3), headers=HEADERS)
+    assert env["sheet"].appends == [[_row(1), _row(2), _row(3)]]
+    assert sheet_writer.pending() == 0 and env["dirty"] == ["Trade_Log"]
+
+def test_headers_are_written_first_on_an_empty_existing_tab(env):
+    env["sheet"].header_row = []
+    sheet_writer.append("Trade_Log", _row(1), headers=HEADERS)
+    assert sheet_writer.flush()
+    assert env["sheet"].appends == [[HEADERS, _row(1)]]
+
+def test_transient_failures_back_off_and_write_once(env):
+    env["sheet"].failures = 2
+    sheet_writer.append("Trade_Log", _row(1))
+
+    assert sheet_writer.flush("Trade_Log")
+    assert env["sleeps"] == [sheet_writer.BACKOFF_SECONDS, sheet_writer.BACKOFF_SECONDS * 2]
+    assert env["sheet"].appends == [[_row(1)]]
+    assert sheet_writer.stats == {"rows": 1, "flushes": 1, "failed_flushes": 0}
+
+def test_rows_that_cannot_be_written_stay_buffered_in_order(env):
+    env["sheet"].failures = sheet_writer.MAX_ATTEMPTS
+    sheet_writer.append("Trade_Log", _row(1))
+    assert not sheet_writer.flush()
+    assert len(env["sleeps"]) == sheet_writer.MAX_ATTEMPTS - 1 and env["dirty"] == []
+
+    sheet_writer.append("Trade_Log", _row(2))
+    assert sheet_writer.flush()
+    assert env["sheet"].appends == [[_row(1), _row(2)]]
+    assert sheet_writer.stats["failed_flushes"] == 1
@@ -0,0 +1,130 @@
+import pytest
+from alpaca.trading.requests import LimitOrderRequest, TakeProfitRequest, StopLossRequest, GetOrdersRequest
+from alpaca.trading.enums import OrderSide, OrderStatus, OrderType, OrderClass, TimeInForce, QueryOrderStatus
+import lib.gvqm_broker as broker
+import lib.gvqm_order_events as order_events
+import lib.gvqm_sim_broker as sim_broker
+import lib.gvqm_pending_orders_manager as pending_mgr
+import lib.gvqm_alpaca_filled_orders_manager as filled_mgr
+
+class SimpleRequest:
+    """Request object carrying only the fields a call reads."""
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+@pytest.fixture
+def sim():
+    """A SimBroker installed as the backend; the previous backend is restored afterwards."""
+    saved = (broker.BACKEND, dict(broker._clients), order_events.hub.source)
+    sim = broker.use_backend(sim_broker.SimBroker(cash=100000))
+    yield sim
+    broker.BACKEND, order_events.hub.source = saved[0], saved[2]
+    broker._clients.clear()
+    broker._clients.update(saved[1])
+
+def _bracket(sim, symbol="AAA", qty=10, limit=90.0, tp=120.0, sl=80.0):
+    return sim.submit_order(LimitOrderRequest(
+        symbol=symbol, qty=qty, side=OrderSide.BUY, time_in_force=TimeInForce.GTC, limit_price=limit,
+        order_class=OrderClass.BRACKET, take_profit=TakeProfitRequest(limit_price=tp), stop_loss=StopLossRequest(stop_price=sl)))
+
+def _oco(sim, symbol="AAA", qty=10, tp=120.0, sl=80.0):
+    return sim.submit_order(LimitOrderRequest(
+        symbol=symbol, qty=qty, side=OrderSide.SELL, time_in_force=TimeInForce.GTC, limit_price=tp,
+        order_class=OrderClass.OCO, take_profit=TakeProfitRequest(limit_price=tp), stop_loss=StopLossRequest(stop_price=sl)))
+
+def _open(sim, symbol="AAA"):
+    """Flattened live orders, as the trader sees them."""
+    parents = sim.get_orders(GetOrdersRequest(status=QueryOrderStatus.OPEN, symbols=[symbol], nested=True))
+    return [o for p in parents for o in [p] + p.legs if o.status in sim_broker.OPEN_STATUSES]
+
+def test_bracket_entry_fills_and_arms_both_legs(sim):
+    sim.set_prices({"AAA": [100.0, 89.0]})
+    parent = _bracket(sim)
+    assert parent.status == OrderStatus.NEW
+    assert [leg.status for leg in parent.legs] == [OrderStatus.HELD, OrderStatus.HELD]
+
+    sim.step()
+    assert parent.status == OrderStatus.FILLED
+    assert parent.filled_avg_price == 89.0
+    assert [leg.status for leg in parent.legs] == [OrderStatus.NEW, OrderStatus.NEW]
+    position = sim.get_open_position("AAA")
+    assert float(position.qty) == 10 and float(position.qty_available) == 0  # Locked by the exits
+
+def test_take_profit_fill_cancels_the_stop(sim):
+    sim.set_prices({"AAA": [100.0, 121.0]})
+    sim.seed_position("AAA", 10, 100.0)
+    tp = _oco(sim)
+    stop = tp.legs[0]
+
+    sim.step()
+    assert tp.status == OrderStatus.FILLED
+    assert stop.status == OrderStatus.CANCELED
+    assert sim.get_all_positions() == []
+    assert sim.cash == 100000 + 10 * 121.0
+
+def test_cancel_settles_after_the_configured_latency(sim, monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(sim_broker.time, "monotonic", lambda: clock[0])
+    sim.settle_seconds = 2.0
+    sim.set_prices({"AAA": [100.0]})
+    parent = _bracket(sim)
+
+    sim.cancel_order_by_id(parent.id)
+    assert sim.get_order_by_id(parent.id).status == OrderStatus.PENDING_CANCEL
+    clock[0] += 2.0
+    assert sim.get_order_by_id(parent.id).status == OrderStatus.CANCELED
+    assert all(leg.status == OrderStatus.CANCELED for leg in parent.legs)
+
+def test_replace_issues_a_new_id_and_retires_the_old_one(sim):
+    sim.set_prices({"AAA": [100.0]})
+    parent = _bracket(sim)
+    new = sim.replace_order_by_id(parent.id, SimpleRequest(limit_price=95.0))
+
+    assert new.id != parent.id and new.limit_price == 95.0
+    assert parent.status == OrderStatus.REPLACED
+    assert [leg.parent_id for leg in new.legs] == [new.id, new.id]
+    with pytest.raises(sim_broker.SimulatedBrokerError):
+        sim.replace_order_by_id(parent.id, SimpleRequest(limit_price=94.0))
+
+def test_injected_errors_fail_the_next_calls_only(sim):
+    sim.fail_next("get_account", times=2)
+    for _ in range(2):
+        with pytest.raises(sim_broker.SimulatedBrokerError):
+            sim.get_account()
+    assert float(sim.get_account().cash) == 100000
+
+def test_rejected_replace_escalates_to_one_live_bracket(sim):
+    sim.set_prices({"AAA": [100.0]})
+    parent = _bracket(sim)
+    sim.fail_next("replace_order_by_id")
+
+    events = pending_mgr.manage_pending_order(sim, "AAA", parent, 90.0, 125.0, 80.0, _open(sim), dry_run=False)
+
+    assert [e["event"] for e in events] == ["RESUBMIT_PENDING"]
+    live = _open(sim)
+    buys = [o for o in live if o.side == OrderSide.BUY]
+    assert len(buys) == 1 and str(buys[0].id) == events[0]["order_id"]
+    assert sorted((o.type, o.limit_price or o.stop_price) for o in live if o.side == OrderSide.SELL) == \
+        [(OrderType.LIMIT, 125.0), (OrderType.STOP, 80.0)]
+
+def test_failed_leg_replace_on_a_position_regenerates_one_oco(sim):
+    sim.set_prices({"AAA": [100.0]})
+    sim.seed_position("AAA", 10, 100.0)
+    _oco(sim)
+    sim.fail_next("replace_order_by_id")
+
+    events = filled_mgr.manage_active_position(sim, "AAA", 10, 130.0, 80.0, _open(sim), dry_run=False)
+
+    assert [e["event"] for e in events] == ["REGENERATE_LEGS"]
+    live = _open(sim)
+    assert sorted((o.type, o.limit_price or o.stop_price) for o in live) == [(OrderType.LIMIT, 130.0), (OrderType.STOP, 80.0)]
+
+def test_use_backend_routes_lazy_clients_to_the_simulator(sim):
+    sim.set_prices({"AAA": [42.0]})
+    trading, data = broker.LazyClient("trading"), broker.LazyClient("data")
+
+    assert float(trading.get_account().cash) == 100000
+    assert sim.calls["get_account"] == 1
+    trades = data.get_stock_latest_trade(SimpleRequest(symbol_or_symbols=["AAA"]))
+    assert trades["AAA"].price == 42.0
+    assert order_events.hub.source is not None and sim.on_update == order_events.hub.source.emit
@@ -0,0 +1,45 @@
+import datetime
+import pytest
+import lib.gvqm_universe as universe
+
+class FakeResponse:
+    text = "<table></table>"
+    def raise_for_status(self): pass
+
+@pytest.fixture
+def wikipedia_down(tmp_path, monkeypatch):
+    """Wikipedia answers but the table can't be parsed; returns the list of scrape attempts."""
+    attempts = []
+    def read_html(_):
+        attempts.append(1)
+        raise ValueError("No tables found")
+    monkeypatch.setattr(universe.requests, "get", lambda *a, **k: FakeResponse())
+    monkeypatch.setattr(universe.pd, "read_html", read_html)
+    monkeypatch.setattr(universe, "SNAPSHOT_PATH", str(tmp_path / "universe.json"))
+    monkeypatch.setattr(universe, "_cache", {"fetched_at": None, "rows": [], "retry_after": None})
+    monkeypatch.setattr(universe, "_symbol_map", {})
+    return attempts
+
+def test_stale_snapshot_is_served_without_rescraping(wikipedia_down):
+    stale = datetime.datetime.now() - datetime.timedelta(hours=universe.TTL_HOURS + 1)
+    universe._write_snapshot([universe._make_row(s) for s in ["AAPL", "BRK.B"]], stale)
+
+    for _ in range(5):
+        assert universe.get_yahoo_tickers() == ["AAPL", "BRK-B"]
+    assert len(wikipedia_down) == 1
+
+def test_fallback_list_is_cached_too(wikipedia_down):
+    for _ in range(3):
+        assert universe.get_yahoo_tickers() == universe.FALLBACK
+    assert len(wikipedia_down) == 1
+
+def test_scrape_is_retried_once_the_backoff_passes(wikipedia_down):
+    universe.get_universe()
+    universe._cache["retry_after"] = datetime.datetime.now() - datetime.timedelta(seconds=1)
+    universe.get_universe()
+    assert len(wikipedia_down) == 2
+
+def test_force_refresh_ignores_the_backoff(wikipedia_down):
+    universe.get_universe()
+    universe.get_universe(force_refresh=True)
+    assert len(wikipedia_down) == 2